@@ -0,0 +1,364 @@
+'''version: 'SHYqpV1' (evaluation path)
+--Evaluation of fitted SHYqp models: tables of monomials, the 'SHYqpModel' evaluator, the binary model files ('saveModel', 'readModel')
+  and reading the coefficients of a report;
+--Depends only on numpy (no solvers, no plotting libraries, no output folder), so that e.g. FE workers can import it quickly;
+--All the names defined here are also available from 'SHYqpV1' (which imports them);
+--Typical use: 
+  deg,vCoeff=getCoeff(fileName);ddMon=vPoly(deg);nQ,nP=nMonoms(deg);model=SHYqpModel(vCoeff,ddMon,nQ,nP);vF,vG=model.evaluate(sigma,1)
+  or, from a binary model file (*_Model.shyqp, see 'SHYqp_Predictions'): model=SHYqpModel.fromFile(fileName);vF,vG=model.evaluate(sigma,1)
+--This proof of concept code is released under the MIT licence by its author Stefan C. Soare.
+'''
+
+import numpy as np
+import functools
+import os
+import json
+import struct
+
+
+'''
+Exceptions raised by SHYqpV1 and SHYqpEval (instead of aborting the calculations):
+--SHYqpError: base class of all SHYqpV1 errors
+--DataFormatError: missing, unreadable or incorrect input data
+--NonConvexDataError: the input data is not consistent with a convex (proto-)model
+--SolverError: unknown QP solver or solver failure
+--OutputDirError: the folder for saving reports and figures does not exist
+'''
+class SHYqpError(Exception):
+    pass
+
+class DataFormatError(SHYqpError):
+    pass
+
+class NonConvexDataError(SHYqpError):
+    pass
+
+class SolverError(SHYqpError):
+    pass
+
+class OutputDirError(SHYqpError):
+    pass
+
+
+def nMonoms(degQ):
+    deg=degQ//2    
+    return (deg+1)**2,deg*(deg+1)
+
+
+'''
+function:'monomialDerivative'
+--Exponents and coefficients of the partial derivatives w.r.t. component j of the monomials with exponents 'vExp' ((n,3) int array)
+--The derivative of a monomial not depending on component j is recorded as the zero-coefficient monomial (0,0,0)
+'''
+def monomialDerivative(vExp,j):
+    vC=vExp[:,j].copy()
+    vD=vExp.copy()
+    vD[:,j]-=1
+    vD[vC==0]=0
+    return vD,vC
+
+
+'''
+function:'vPolyTables'
+--Calculates the tables of monomials of the P and Q polynomials of degree nQ-1 and nQ (nQ even), memoized for each degree:
+----'vP','vQ': (n,3) int arrays of exponents;
+----'vPidx','vQidx': (nGroups,3) int arrays [power of u3, first index, last index+1] of the groups of monomials with the same power of u3;
+----'vD1P','vC1P',...,'vH23Q','vCH23Q': exponents and coefficients of the first and second order derivatives;
+--All arrays are read-only (shared by all callers); the dictionary contains only numpy arrays (and 'nQ')
+  and can be saved as such (e.g., with np.savez) together with the model coefficients
+'''
+@functools.lru_cache(maxsize=32)
+def vPolyTables(nQ):
+    dd={'nQ':nQ}
+    for XX,deg in (('P',nQ-1),('Q',nQ)):
+        vExp=[];vIdx=[];lv=0
+        for jj in range(0,deg+1,2):
+            kk=np.arange(deg+1-jj)
+            vExp.append(np.stack((deg-jj-kk,kk,jj*np.ones_like(kk)),axis=1))
+            vIdx.append([jj,lv,lv+kk.shape[0]])
+            lv+=kk.shape[0]
+        vExp=np.concatenate(vExp).astype(int)
+        dd['v'+XX]=vExp;dd['v'+XX+'idx']=np.array(vIdx,dtype=int)
+        for j in range(3):
+            dd['vD'+str(j+1)+XX],dd['vC'+str(j+1)+XX]=monomialDerivative(vExp,j)
+        for HH in ['11','12','13','22','23','33']:
+            vH,vCH=monomialDerivative(dd['vD'+HH[0]+XX],int(HH[1])-1)
+            dd['vH'+HH+XX]=vH;dd['vCH'+HH+XX]=dd['vC'+HH[0]+XX]*vCH
+    for key in dd:
+        if(isinstance(dd[key],np.ndarray)):dd[key].flags.writeable=False
+    return dd
+
+
+def vPoly(degree):
+    nQ=int(degree)
+    if(nQ%2):raise DataFormatError("'degree' must be an even integer")
+    return dict(vPolyTables(nQ))
+
+
+'''
+function:'monomialPowers'
+--Calculates the table of powers u^0,u^1,...,u^deg of each component of the points 'vu' (by cumulative multiplication)
+--vu: a (nPoints,nComp)-array (nComp=3, or nComp=2 when the u3-powers are handled by the caller)
+--Returns a (nComp,nPoints,deg+1)-array (of type 'dtype')
+'''
+def monomialPowers(vu,deg,dtype=np.float64):
+    nComp=vu.shape[1]
+    vPow=np.empty((nComp,vu.shape[0],deg+1),dtype=dtype)
+    vPow[:,:,0]=1.0
+    vuT=vu.T
+    for k in range(1,deg+1):
+        vPow[:,:,k]=vPow[:,:,k-1]*vuT
+    return vPow
+
+
+'''
+function:'monomialEval'
+--Gathers the values of the monomials with exponents 'vExp' (list of triplets or (nMon,3)-array, e.g., ddMon['vP'], ddMon['vH11Q'])
+  from a table of powers calculated by 'monomialPowers'
+--Only the first nComp exponents of each monomial are used (nComp=vPow.shape[0])
+--vCf: optional vector of coefficients multiplying each monomial (e.g., ddMon['vCH11Q'])
+--Returns a (nPoints,nMon)-array
+'''
+def monomialEval(vPow,vExp,vCf=None):
+    vExp=np.asarray(vExp)
+    vMon=vPow[0][:,vExp[:,0]]
+    for j in range(1,vPow.shape[0]):
+        vMon*=vPow[j][:,vExp[:,j]]
+    if(vCf is not None):
+        vMon*=vCf
+    return vMon
+
+'''
+class:'SHYqpModel'
+--Evaluates a fitted SHYqp model (vCoeff,ddMon,nQ,nP as returned by 'dataFitSHYqp'/'dataFitSHYqpSymm') on arrays of plane stress states
+--All monomials [P,Q] and their first and second order derivatives are flattened (once) into a table of distinct exponents 'vExp'
+  and a matrix of coefficients 'CC'; one evaluation is then a single product (monomials at all points) x CC
+--Columns of CC: P, Q, grad(P+Q) (3), degPm1*grad(P)+degQm1*grad(Q) (3), hess(P+Q) (11,22,33,12,13,23);
+  reduced tables (only the exponents and columns needed) are kept for each derivative order
+--Constructors: SHYqpModel(vCoeff,ddMon,nQ,nP); SHYqpModel.fromTables(degQ,vExp,CC), from the tables 'vExp','CC' of 'evalTables'
+  (e.g., as saved in a binary model file, see 'readModel'); SHYqpModel.fromFile(fName), from a binary model file
+--Methods (sigma: (N,3)-array of (sxx,syy,sxy); at sigma=0 the value is 0 and, since the yield function is not differentiable there,
+  the gradient and the Hessian are returned as zero, e.g., for the first increment of a FE material routine):
+----value(sigma): yield function values, (N,)-array
+----gradient(sigma): partial derivatives w.r.t. (sxx,syy,sxy), (N,3)-array
+----hessian(sigma): second order partial derivatives, (N,3,3)-array
+----evaluate(sigma,order): the tuple (value,gradient,hessian) up to 'order' (0,1,2) with a single monomial evaluation
+--chunkSize: number of points evaluated at once (the table of monomials is stored transposed, (nExp,chunkSize),
+  so that gathering the powers of each exponent copies contiguous rows)
+'''
+class SHYqpModel:
+    def __init__(self,vCoeff,ddMon,nQ,nP,chunkSize=4096):
+        vExp,CC=SHYqpModel.evalTables(vCoeff,ddMon,nQ,nP)
+        self.setTables(ddMon['nQ'],vExp,CC,chunkSize)
+
+    @staticmethod
+    def evalTables(vCoeff,ddMon,nQ,nP):
+        degQ=ddMon['nQ']
+        cP=np.asarray(vCoeff[0:nP]);cQ=np.asarray(vCoeff[nP:nP+nQ])
+        dExp={};vRow=[];vCol=[];vVal=[]
+        def addTerms(vExp,vCf,col):
+            for ee,cc in zip(vExp,vCf):
+                if(cc==0.0):continue
+                vRow.append(dExp.setdefault(tuple(int(e) for e in ee),len(dExp)));vCol.append(col);vVal.append(cc)
+        for XX,cX,degXm1 in (('P',cP,degQ-2),('Q',cQ,degQ-1)):
+            nX=cX.shape[0]
+            if(nX==0):continue
+            addTerms(ddMon['v'+XX][0:nX],cX,0 if XX=='P' else 1)
+            for j in range(3):
+                vExp=ddMon['vD'+str(j+1)+XX][0:nX];vCf=cX*ddMon['vC'+str(j+1)+XX][0:nX]
+                addTerms(vExp,vCf,2+j)
+                addTerms(vExp,degXm1*vCf,5+j)
+            for j,HH in enumerate(['11','22','33','12','13','23']):
+                addTerms(ddMon['vH'+HH+XX][0:nX],cX*ddMon['vCH'+HH+XX][0:nX],8+j)
+        vExp=np.array(list(dExp.keys()),dtype=int).reshape((len(dExp),3))
+        CC=np.zeros((len(dExp),14))
+        np.add.at(CC,(vRow,vCol),vVal)
+        return vExp,CC
+
+    def setTables(self,degQ,vExp,CC,chunkSize=4096):
+        self.degQ=degQ;self.degQm1=degQ-1;self.degPm1=degQ-2
+        self.chunkSize=chunkSize
+        self.sq32=np.sqrt(1.5)
+        sq6=np.sqrt(6.0);sq2=np.sqrt(2.0)
+        self.LL=np.array([[2.0/sq6,-1.0/sq6,0.0],[0.0,1.0/sq2,0.0],[0.0,0.0,sq2]])##u=LL*sigma
+        self.vExp=vExp;self.CC=CC
+        self.vTables=[]##for each derivative order: only the exponents and columns required
+        for nOut in (2,8,14):
+            idx=np.nonzero(np.any(self.CC[:,0:nOut]!=0.0,axis=1))[0]
+            self.vTables.append((self.vExp[idx],np.ascontiguousarray(self.CC[idx,0:nOut].T)))
+
+    @classmethod
+    def fromTables(cls,degQ,vExp,CC,chunkSize=4096):
+        model=cls.__new__(cls)
+        model.setTables(degQ,vExp,CC,chunkSize)
+        return model
+
+    @classmethod
+    def fromFile(cls,fName,chunkSize=4096):
+        dd=readModel(fName)
+        return cls.fromTables(dd['degQ'],dd['vExp'],dd['CC'],chunkSize)
+
+    def evaluate(self,sigma,order=2):
+        sigma=np.atleast_2d(np.asarray(sigma,dtype=float))
+        nPoints=sigma.shape[0]
+        vu=np.dot(sigma,self.LL.T)
+        vMod=np.sqrt(vu[:,0]**2+vu[:,1]**2+vu[:,2]**2)
+        vZero=(vMod==0.0)
+        if(np.any(vZero)):vMod[vZero]=1.0##zero stress: u=0 (the value is then zero, see below)
+        vu/=vMod.reshape((nPoints,1))
+        vExp,CCT=self.vTables[order]
+        YY=np.zeros((CCT.shape[0],nPoints))
+        for k in range(0,nPoints,self.chunkSize):
+            vuT=vu[k:k+self.chunkSize].T
+            vPow=np.empty((3,self.degQ+1,vuT.shape[1]))
+            vPow[:,0,:]=1.0
+            for j in range(1,self.degQ+1):
+                vPow[:,j,:]=vPow[:,j-1,:]*vuT
+            vMon=vPow[0][vExp[:,0]];vMon*=vPow[1][vExp[:,1]];vMon*=vPow[2][vExp[:,2]]
+            YY[:,k:k+self.chunkSize]=np.dot(CCT,vMon)
+        YY=YY.T
+        vF=self.sq32*vMod*(1.0+YY[:,0]+YY[:,1])
+        vF[vZero]=0.0
+        if(order==0):
+            return (vF,)
+        vPhi=1.0-(self.degPm1*YY[:,0]+self.degQm1*YY[:,1])
+        vG=self.sq32*np.dot(vu*vPhi.reshape((nPoints,1))+YY[:,2:5],self.LL)
+        vG[vZero]=0.0
+        if(order==1):
+            return vF,vG
+        vPhi2=self.degPm1*(self.degPm1+2)*YY[:,0]+self.degQm1*(self.degQm1+2)*YY[:,1]-1.0
+        HU=np.zeros((nPoints,3,3))
+        ii=[0,1,2,0,0,1];jj=[0,1,2,1,2,2]
+        HU[:,ii,jj]=YY[:,8:14];HU[:,jj,ii]=YY[:,8:14]
+        uG=vu[:,:,None]*YY[:,None,5:8]
+        HU+=vPhi2[:,None,None]*vu[:,:,None]*vu[:,None,:]-uG-uG.transpose((0,2,1))
+        HU[:,[0,1,2],[0,1,2]]+=vPhi[:,None]
+        vH=(self.sq32/vMod)[:,None,None]*np.matmul(np.matmul(self.LL.T,HU),self.LL)
+        vH[vZero]=0.0
+        return vF,vG,vH
+
+    def value(self,sigma):
+        return self.evaluate(sigma,0)[0]
+
+    def gradient(self,sigma):
+        return self.evaluate(sigma,1)[1]
+
+    def hessian(self,sigma):
+        return self.evaluate(sigma,2)[2]
+
+
+'''
+Binary model files (*.shyqp):
+--prefix (24 bytes): magic b'SHYQPMDL', format version (uint32), header length (uint32), offset of the data block (uint64)
+--header: json {'degQ','nP','nQ','assym','meta','arrays':{name:[dtype,shape,offset in the data block]}}
+--data block: the arrays 'vCoeff' (float64), 'vExp' (int64), 'CC' (float64), each aligned at 64 bytes
+--'vExp','CC' are the evaluation tables of 'SHYqpModel' (no monomial tables/coefficient processing needed when loading)
+'''
+modelMagic=b'SHYQPMDL'
+modelVersion=1
+modelPrefix=struct.Struct('<8sIIQ')
+modelAlign=64
+
+def alignUp(n,align=modelAlign):
+    return ((n+align-1)//align)*align
+
+
+'''
+function:'saveModel'
+--Saves the SHYqp model (vCoeff,ddMon,nQ,nP) in the binary model file 'fName' (written to a temporary file, then renamed)
+--assym: the symmetry flag of the fit (True: tension-compression asymmetric)
+--meta: dictionary of fit metadata (json serializable: e.g., name, solver, convexity check)
+'''
+def saveModel(fName,vCoeff,ddMon,nQ,nP,assym=True,meta=None):
+    vExp,CC=SHYqpModel.evalTables(vCoeff,ddMon,nQ,nP)
+    vArray=[('vCoeff',np.ascontiguousarray(vCoeff[0:nP+nQ],dtype='<f8')),
+            ('vExp',np.ascontiguousarray(vExp,dtype='<i8')),('CC',np.ascontiguousarray(CC,dtype='<f8'))]
+    header={'degQ':int(ddMon['nQ']),'nP':int(nP),'nQ':int(nQ),'assym':bool(assym),'meta':meta if meta else {},'arrays':{}}
+    offset=0
+    for name,vv in vArray:
+        header['arrays'][name]=[vv.dtype.str,list(vv.shape),offset]
+        offset=alignUp(offset+vv.nbytes)
+    bHeader=json.dumps(header).encode('utf-8')
+    dataStart=alignUp(modelPrefix.size+len(bHeader))
+    fTmp=fName+'.tmp{}'.format(os.getpid())
+    with open(fTmp,'wb') as ff:
+        ff.write(modelPrefix.pack(modelMagic,modelVersion,len(bHeader),dataStart))
+        ff.write(bHeader)
+        for name,vv in vArray:
+            ff.seek(dataStart+header['arrays'][name][2])
+            ff.write(vv.tobytes())
+        ff.truncate(dataStart+offset)
+    os.replace(fTmp,fName)
+    return
+
+def isModelFile(fName):
+    try:
+        with open(fName,'rb') as ff:
+            return ff.read(len(modelMagic))==modelMagic
+    except IOError:
+        return False
+
+
+'''
+function:'readModel'
+--Reads a binary model file (see 'saveModel')
+--mmap=True: the arrays are read-only views of the memory-mapped file (only the pages actually used are read);
+  mmap=False: the file is read at once
+--Returns the dictionary {'version','degQ','nP','nQ','assym','meta','vCoeff','vExp','CC'}
+'''
+def readModel(fName,mmap=True):
+    try:
+        with open(fName,'rb') as ff:
+            prefix=ff.read(modelPrefix.size)
+            if(len(prefix)<modelPrefix.size or prefix[0:len(modelMagic)]!=modelMagic):
+                raise DataFormatError("'{}' is not a SHYqp model file".format(fName))
+            magic,version,nHeader,dataStart=modelPrefix.unpack(prefix)
+            if(version>modelVersion):
+                raise DataFormatError("'{}': model file version {} (this code reads versions <= {})".format(fName,version,modelVersion))
+            dd=json.loads(ff.read(nHeader).decode('utf-8'))
+            if(mmap):
+                buf=np.memmap(ff,dtype=np.uint8,mode='r')
+            else:
+                ff.seek(0)
+                buf=np.frombuffer(ff.read(),dtype=np.uint8)
+    except IOError as err:
+        raise DataFormatError('readModel: cannot read the model file: {}'.format(err))
+    except ValueError as err:
+        raise DataFormatError("'{}': incorrect model file header: {}".format(fName,err))
+    for name,(dtype,shape,offset) in dd.pop('arrays').items():
+        dtype=np.dtype(dtype);nBytes=dtype.itemsize*int(np.prod(shape))
+        if(dataStart+offset+nBytes>buf.shape[0]):
+            raise DataFormatError("'{}': truncated model file".format(fName))
+        dd[name]=buf[dataStart+offset:dataStart+offset+nBytes].view(dtype).reshape(shape)
+    dd['version']=version
+    return dd
+
+
+'''
+function:'getCoeff'
+--Reads the degree and the coefficients [P,Q] of a SHYqp model from its binary model file (*_Model.shyqp, see 'saveModel')
+  or from its report file (*_Err_and_Coeff.txt, see 'SHYqp_Predictions')
+--Returns (degQ,vCoeff)
+'''
+def getCoeff(fName):
+    if(isModelFile(fName)):
+        dd=readModel(fName,mmap=False)
+        return dd['degQ'],np.array(dd['vCoeff'])
+    with open(fName,'r') as ff:
+        line=ff.readline()
+        line=ff.readline()
+        deg=int(line.strip().split(':')[1])
+        while('P-Coeffs' not in line):
+            line=ff.readline()
+        line=ff.readline()    
+        vCoeff=[]    
+        while('Q-Coeffs' not in line):
+            vCoeff.append(float(line.strip()))
+            line=ff.readline()
+        while(True):
+            line=ff.readline().strip()
+            if(line):
+                vCoeff.append(float(line))
+            else:
+                break
+    return deg,np.array(vCoeff)
@@ -9,20 +9,248 @@ A general framework for generating data and for modeling symmetric and asymmetri
 '''
 
 import numpy as np
-import quadprog as qpg
-import cvxopt
-from matplotlib import pyplot as plt
 from os import path as osp
+import os
+import importlib
+import tempfile
+import hashlib
+import secrets
+import functools
+import contextlib
+from time import perf_counter,process_time
+from collections import OrderedDict
+from SHYqpEval import (SHYqpError,DataFormatError,NonConvexDataError,SolverError,OutputDirError,
+                       nMonoms,monomialDerivative,vPolyTables,vPoly,monomialPowers,monomialEval,SHYqpModel,getCoeff,
+                       saveModel,readModel,isModelFile)
+import multiprocessing as mp
+from multiprocessing import shared_memory,resource_tracker
 
 figDir='.\\FIGS\\'
+consCacheVersion='SHYqpV1-cons-2'##version tag of the cached constraint arrays (change it when the constraint generation changes)
 lineWidthUax=1.5
+symmetryGroups=('orthotropic','orthotropicCS')##symmetry descriptors of the constraint/check point sets (see 'symmetryMask')
+consMemBlock=2**27##memory budget (bytes) of a block of points when generating all the constraint rows (see 'genConstraintsRows2D')
+consStage32=False##calculate the monomial powers and basis of a block of constraint points in float32 (see 'genConstraintsRows2D')
+consJobs=1##number of worker processes generating all the constraint rows (see 'genConstraintsRows2D'); 1 = no pool
+consWorkerData={}##data of a constraint generation worker process (see 'constraintRowsWorkerInit')
+protoCacheSize=32##number of proto-model results (protoData, protoDataPoints) kept in memory (see 'protoCached'); 0 = no caching
+protoCache=OrderedDict()##the cached proto-model results, in the order of their last use
+profiler=None##the active stage profiler (see 'StageProfiler'); None = no instrumentation
 
+
+'''
+Lazy imports: the QP solvers and matplotlib are imported on first use ('importSolver', 'pyplot'),
+so that model evaluation ('SHYqpEval') and calibration without plots never load the plotting library
+'''
+'''
+function:'importSolver'
+--Imports (on first use) the QP solver package 'name' ('quadprog' or 'cvxopt'); raises 'SolverError' if it is not installed
+'''
+def importSolver(name):
+    try:
+        return importlib.import_module(name)
+    except ImportError as err:
+        raise SolverError('{}: the solver package is not available ({})'.format(name,err))
+
+
+'''
+function:'pyplot'
+--Imports (on first use) and returns matplotlib.pyplot (called by all plotting functions)
+'''
+def pyplot():
+    from matplotlib import pyplot as plt
+    return plt
+
+
+'''
+function:'setOutputDir'
+--Sets the folder where reports and figures are saved (module variable 'figDir')
+--create=True: the folder is created if it does not exist; otherwise 'OutputDirError' is raised 
+'''
+def setOutputDir(dirName,create=False):
+    global figDir
+    if(create):
+        os.makedirs(dirName,exist_ok=True)
+    if(not osp.isdir(dirName)):
+        raise OutputDirError("The folder '{}' for saving reports and figures was not found\n"
+                             "Make sure it exists (e.g., a folder 'FIGS' at the same location as the calling script)".format(dirName))
+    figDir=osp.join(dirName,'')
+    return figDir
+
+
+'''
+Stage profiling: the stages of the calibration pipeline (the functions decorated with 'profiled') are recorded 
+by the active 'StageProfiler' (module variable 'profiler'); with no active profiler (the default) nothing is recorded
+'''
+'''
+function:'profiled'
+--Decorator of a pipeline stage: each call is recorded as the stage 'name' (default: the function name) by the active profiler, if any
+'''
+def profiled(name=None):
+    def decorator(fn):
+        stageName=name if(name) else fn.__name__
+        @functools.wraps(fn)
+        def wrapper(*args,**kwargs):
+            if(profiler is None):
+                return fn(*args,**kwargs)
+            with profiler.stage(stageName):
+                return fn(*args,**kwargs)
+        return wrapper
+    return decorator
+
+
+'''
+function:'profileInfo'
+--Adds the values 'info' (e.g., the matrix shapes nRow,nCol,nCons or the statistics of a solver) to the record of the current stage
+  of the active profiler (nothing is done if no profiler is active)
+'''
+def profileInfo(**info):
+    if(profiler is not None and profiler.vStack):
+        profiler.vStack[-1]['info'].update(info)
+
+
+'''
+class:'StageProfiler'
+--Records the stages of the calibration pipeline (see 'profiled') while it is active (between 'start()' and 'stop()', or in a 'with' block)
+--Each call of a stage gets a record (in the order of the calls): 
+----'stage' (function name), 'path' (the enclosing stages, e.g., 'dataFitSHYqp/solveQP'), 'depth', 't0' (start, in seconds from 'start()'),
+    'wall' and 'cpu' (seconds), 'peakMemMB' and 'deltaMemMB' (peak and net memory allocated during the stage, if memory=True), 'error';
+----the current 'tags' (e.g., tags['material'], tags['DEG'], set by the calling script);
+----the values of 'profileInfo' in 'info': matrix shapes (nRow,nCol,nCons), solver statistics (iterations, gap, status),
+    active constraints (nActive), cutting-plane iterations, etc.
+--memory=True: the memory is also traced with 'tracemalloc' (python and numpy allocations only, not those of the solver libraries);
+  off by default: the traced calculations are slower, so the wall times of a memory trace are larger than those of an untraced run
+--cProfile=True: the whole active period is also profiled with 'cProfile' (see 'writeCProfile')
+--writeJSON(fName), writeCSV(fName): the trace (CSV: one line per record, the 'info' values as columns);
+  printSummary(): the total times of the stages (by path)
+--Usage: prof=StageProfiler().start(); ...; prof.stop(); prof.writeJSON(figDir+'profile.json')
+'''
+class StageProfiler:
+    def __init__(self,memory=False,cProfile=False):
+        self.memory=memory;self.cProfile=cProfile
+        self.tags={};self.vRecord=[];self.vStack=[]
+        self.prof=None;self.tStart=perf_counter();self.ownTrace=False
+
+    def start(self):
+        global profiler
+        if(self.memory):
+            import tracemalloc
+            self.ownTrace=not tracemalloc.is_tracing()
+            if(self.ownTrace):tracemalloc.start()
+        if(self.cProfile):
+            import cProfile
+            if(self.prof is None):self.prof=cProfile.Profile()
+            self.prof.enable()
+        self.tStart=perf_counter()
+        profiler=self
+        return self
+
+    def stop(self):
+        global profiler
+        if(profiler is self):profiler=None
+        if(self.prof is not None):self.prof.disable()
+        if(self.ownTrace):
+            import tracemalloc
+            tracemalloc.stop();self.ownTrace=False
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self,*args):
+        self.stop()
+        return False
+
+    @contextlib.contextmanager
+    def stage(self,name):
+        rec={'stage':name,'path':'/'.join([pp['stage'] for pp in self.vStack]+[name]),'depth':len(self.vStack),
+             't0':perf_counter()-self.tStart}
+        rec.update(self.tags)
+        rec['info']={}
+        self.vRecord.append(rec)
+        if(self.memory):
+            import tracemalloc
+            cur,peak=tracemalloc.get_traced_memory()
+            if(self.vStack):self.vStack[-1]['_peak']=max(self.vStack[-1]['_peak'],peak)
+            tracemalloc.reset_peak()
+            rec['_mem0']=cur;rec['_peak']=cur
+        self.vStack.append(rec)
+        t0=perf_counter();c0=process_time()
+        try:
+            yield rec
+        except BaseException as err:
+            rec['error']=type(err).__name__
+            raise
+        finally:
+            rec['wall']=perf_counter()-t0;rec['cpu']=process_time()-c0
+            self.vStack.pop()
+            if(self.memory):
+                cur,peak=tracemalloc.get_traced_memory()
+                mem0=rec.pop('_mem0');peak=max(rec.pop('_peak'),peak)
+                rec['peakMemMB']=(peak-mem0)/2.0**20;rec['deltaMemMB']=(cur-mem0)/2.0**20
+                if(self.vStack):self.vStack[-1]['_peak']=max(self.vStack[-1]['_peak'],peak)
+                tracemalloc.reset_peak()
+
+    def records(self):
+        vRec=[]
+        for rec in self.vRecord:
+            rr={key:rec[key] for key in rec if key[0]!='_' and key!='info'}
+            rr.update(rec['info'])
+            vRec.append(rr)
+        return vRec
+
+    def writeJSON(self,fName):
+        import json
+        with open(fName,'w') as ff:
+            json.dump({'tags':self.tags,'stages':[{key:rec[key] for key in rec if key[0]!='_'} for rec in self.vRecord]},
+                      ff,indent=1,default=str)
+        return fName
+
+    def writeCSV(self,fName):
+        return writeProfileCSV(fName,self.records())
+
+    def writeCProfile(self,fName):
+        if(self.prof is None):
+            raise SHYqpError("StageProfiler: no cProfile data (use 'cProfile=True')")
+        self.prof.dump_stats(fName)
+        return fName
+
+    def printSummary(self):
+        vPath={}
+        for rec in self.vRecord:
+            if('wall' not in rec):continue
+            nn,tt,mm=vPath.get(rec['path'],(0,0.0,0.0))
+            vPath[rec['path']]=(nn+1,tt+rec['wall'],max(mm,rec.get('peakMemMB',0.0)))
+        print('{:<60s} {:>6s} {:>10s} {:>12s}'.format('stage','calls','wall (s)','peak (MB)'))
+        for path in vPath:
+            nn,tt,mm=vPath[path]
+            print('{:<60s} {:>6d} {:>10.3f} {:>12.1f}'.format('  '*path.count('/')+path.split('/')[-1],nn,tt,mm))
+
+
+'''
+function:'writeProfileCSV'
+--Writes the stage records 'vRec' (see 'StageProfiler.records', e.g., of several materials) to the CSV file 'fName':
+  the columns are the union of the keys of all the records
+'''
+def writeProfileCSV(fName,vRec):
+    import csv
+    vField=['stage','path','depth','t0','wall','cpu','peakMemMB','deltaMemMB','error']
+    for rec in vRec:
+        vField+=[key for key in rec if key not in vField]
+    with open(fName,'w',newline='') as ff:
+        writer=csv.DictWriter(ff,fieldnames=vField)
+        writer.writeheader()
+        writer.writerows(vRec)
+    return fName
+
+
+@profiled()
 def readData(fName):
     try:
-        ff=open(fName,'r')
+        with open(fName,'r') as ff:
+            vFileLines=ff.readlines()
     except IOError as err:
-        print(err)
-        exit()        
+        raise DataFormatError('cannot read the input file: {}'.format(err))
     vLine=[];fVal=0.0
     data={'name':'','assym':'*','DEG':'*',
             'sT0':'*','sT15':'*','sT22.5':'*','sT30':'*','sT45':'*','sT60':'*','sT67.5':'*','sT75':'*','sT90':'*',
@@ -39,19 +267,17 @@ def readData(fName):
             'rC0':False,'rC15':False,'rC225':False,'rC30':False,'rC45':False,'rC60':False,'rC675':False,'rC75':False,'rC90':False,
             'sTb':False,'sCb':False,'rTb':False,'rCb':False,
             'ww':False,'LTAN':False,'LUAX':False,'LBAX':False,'VLBAX':True,'fileData':False}   
-    for line in ff:
+    for line in vFileLines:
         errLine=line
         line=line.strip()
         if(line=='' or line[0]=='#'):
             continue
         if('=' not in line):
-            print('Incorrect data format (equal sign missing) on line:\n'+errLine+'\nCalculations aborted')
-            exit()
+            raise DataFormatError('Incorrect data format (equal sign missing) on line:\n'+errLine)
         vLine=line.split('=')
         vLine[0]=vLine[0].strip();vLine[1]=vLine[1].strip()
         if(vLine[0]=='' or vLine[1]=='' or len(vLine)!=2):
-            print('incorrect(A) data format on line:\n'+errLine+'\nCalculations aborted')
-            exit()
+            raise DataFormatError('incorrect(A) data format on line:\n'+errLine)
         if(vLine[0]=='name'):
             if(len(vLine[0])>36):
                 print('Warning: name too long (only the first 30 chars are retained):\n')
@@ -59,29 +285,26 @@ def readData(fName):
         if(vLine[0]=='assym'):
             if((vLine[1][0]).upper()=='Y' or vLine[1]=='*'):data['assym']=True
             elif(vLine[1][0].upper()=='N'):data['assym']=False
-            else:print('assym: unknown value\nCalculations aborted');exit()
+            else:raise DataFormatError('assym: unknown value')
             vCheck['assym']=True;continue               
         if(vLine[0] not in ['name','assym','fileData']):            
             try:
                 fVal=float(vLine[1])
                 if(fVal<0.0):
-                    print('incorrect zero-value on line:\n'+errLine+'\nCalculations aborted')
-                    exit()
+                    raise DataFormatError('incorrect zero-value on line:\n'+errLine)
                 if(fVal>10.0**6):  
-                    print('unacceptable large value on line:\n'+errLine+'\nCalculations aborted')
-                    exit()                
+                    raise DataFormatError('unacceptable large value on line:\n'+errLine)
             except ValueError:
                 if(vLine[1]=='*'):
                     fVal='*'
                 else:    
-                    print('incorrect(B) data format on line:\n'+errLine+'\nCalculations aborted')
-                    exit()
+                    raise DataFormatError('incorrect(B) data format on line:\n'+errLine)
         if(vLine[0]=='DEG'):
             if(fVal=='*'):data['DEG']=4
             else:
-                if(fVal-int(fVal)):print("DEG: must be an integer");exit()
+                if(fVal-int(fVal)):raise DataFormatError("DEG: must be an integer")
                 if(int(fVal) not in [2*k for k in range(2,13)]):
-                    print("DEG: incorrect value (must be an even integer >=4 and <=24)");exit()
+                    raise DataFormatError("DEG: incorrect value (must be an even integer >=4 and <=24)")
                 data['DEG']=int(fVal)
             vCheck['DEG']=True;continue                
         if(vLine[0]=='sT0'):
@@ -233,20 +456,17 @@ def readData(fName):
                     #        ffd.write('{:.5f}, {:.5f}\n'.format(ys[0],ys[1]))
                     #    ffd.close()                        
                 except IOError as err:
-                    print(err)
-                    exit()
+                    raise DataFormatError('fileData: cannot read the data file: {}'.format(err))
             else:
                 data['fileData']=np.array([])
             vCheck['fileData']=True;continue                
     if('*' in [data['sT0'],data['sT45'],data['sT90'],data['sC0'],data['sC45'],data['sC90']]):
-        print('Missing value: sT0,sT45,sT90,sC0,sC45,sC90 must be provided\nCalculations aborted');exit()
+        raise DataFormatError('Missing value: sT0,sT45,sT90,sC0,sC45,sC90 must be provided')
     if('*' in [data['rT0'],data['rT45'],data['rT90'],data['rC0'],data['rC45'],data['rC90']]):
-        print('Missing value: rT0,rT45,rT90,rC0,rC45,rC90 must be provided\nCalculations aborted');exit()  
+        raise DataFormatError('Missing value: rT0,rT45,rT90,rC0,rC45,rC90 must be provided')
     for item in vCheck:
         if(not vCheck[item]):
-            print(item+': no data provided\nCalculations aborted')
-            exit()     
-    ff.close()
+            raise DataFormatError(item+': no data provided')
     s0=data['sT0']
     for key in data:
         if((key[0]=='s') and (data[key]!='*')):data[key]/=s0
@@ -287,13 +507,12 @@ def readData(fName):
                 if(int(data[key])==0):
                     data['VLBAX']=data['VLBAX'][0]*np.ones(6) ##all shape parameters equal to 'LBAX1'
         if(len(aData['sT'])!=len(aData['thetaT']) or len(aData['sT'])!=len(aData['rT'])):
-            print('sT and rT: the numbers of directional angles, stresses and r-values are not the same\nCalculations aborted');exit()
+            raise DataFormatError('sT and rT: the numbers of directional angles, stresses and r-values are not the same')
         if(len(aData['sC'])!=len(aData['thetaC']) or len(aData['sC'])!=len(aData['rC'])):
-            print('sC and rC: the numbers of directional angles, stresses and r-values are not the same\nCalculations aborted');exit()
+            raise DataFormatError('sC and rC: the numbers of directional angles, stresses and r-values are not the same')
         for key in ['sT','rT','sC','rC','thetaT','thetaC']:    
             if([k for k in aData[key]] not in options):
-                print("Unknown combination of angles. The options allowed are:")
-                print(options[0]);print(options[1]);print(options[2]);exit()                
+                raise DataFormatError("Unknown combination of angles. The options allowed are:\n{}\n{}\n{}".format(*options))
     else:
         aData={'name':data['name'],'assym':False,'DEG':data['DEG'],
                'sT':{},'sC':{},'rT':{},'rC':{},'thetaT':{},'thetaC':{},
@@ -311,12 +530,12 @@ def readData(fName):
                 if(int(data[key])==0):
                     data['VLBAX']=data['VLBAX'][0]*np.ones(6) ##all shape parameters equal to 'LBAX1'
         if(len(aData['sT'])!=len(aData['thetaT']) or len(aData['sT'])!=len(aData['rT'])):
-            print('sT and rT: the numbers of directional angles, stresses and r-values are not the same\nCalculations aborted');exit()
+            raise DataFormatError('sT and rT: the numbers of directional angles, stresses and r-values are not the same')
         for key in ['sT','rT','thetaT']:    
             if([k for k in aData[key]] not in options):
-                print("Unknown combination of angles. The options allowed are:")
-                print(options[0]);print(options[1]);print(options[2]);exit() 
+                raise DataFormatError("Unknown combination of angles. The options allowed are:\n{}\n{}\n{}".format(*options))
         aData['sC']=aData['sT'];aData['rC']=aData['rT'];aData['thetaC']=aData['thetaT']                
+    profileInfo(name=aData['name'],DEG=aData['DEG'],assym=aData['assym'])
     return aData 
 
 
@@ -364,68 +583,6 @@ def nMonomials2():
     return vDeg    
 
 
-def nMonoms(degQ):
-    deg=degQ//2    
-    return (deg+1)**2,deg*(deg+1)
-
-
-def vPoly(degree):
-    nQ=int(degree)
-    if(nQ%2):print("'degree' must be an even integer\nCalculations aborted");exit()
-    dd={'nQ':nQ}
-    vP=[];vPidx=[];jj=0
-    while(jj<=nQ-1):
-        lv=len(vP)
-        vPidx.append([jj,[k for k in range(lv,lv+nQ-jj)]])
-        vP+=[(nQ-1-jj-k,k,jj) for k in range(nQ-jj)]
-        jj+=2
-    dd['vP']=vP ;dd['vPidx']=vPidx   
-    dd['vD1P']=[(mon[0]-1,mon[1],mon[2]) if(mon[0]>0) else (0,0,0) for mon in vP]
-    dd['vC1P']=np.array([mon[0] if(mon[0]>0) else 0 for mon in vP])
-    dd['vD2P']=[(mon[0],mon[1]-1,mon[2]) if(mon[1]>0) else (0,0,0) for mon in vP]
-    dd['vC2P']=np.array([mon[1] if(mon[1]>0) else 0 for mon in vP])
-    dd['vD3P']=[(mon[0],mon[1],mon[2]-1) if(mon[2]>0) else (0,0,0) for mon in vP]
-    dd['vC3P']=np.array([mon[2] if(mon[2]>0) else 0 for mon in vP]) 
-    dd['vH11P']=[(mon[0]-1,mon[1],mon[2]) if(mon[0]>0) else (0,0,0) for mon in dd['vD1P']]
-    dd['vCH11P']=np.array([cf*mon[0] for (cf,mon) in zip(dd['vC1P'],dd['vD1P'])])
-    dd['vH12P']=[(mon[0],mon[1]-1,mon[2]) if(mon[1]>0) else (0,0,0) for mon in dd['vD1P']]
-    dd['vCH12P']=np.array([cf*mon[1] for (cf,mon) in zip(dd['vC1P'],dd['vD1P'])])
-    dd['vH13P']=[(mon[0],mon[1],mon[2]-1) if(mon[2]>0) else (0,0,0) for mon in dd['vD1P']]
-    dd['vCH13P']=np.array([cf*mon[2] for (cf,mon) in zip(dd['vC1P'],dd['vD1P'])])
-    dd['vH22P']=[(mon[0],mon[1]-1,mon[2]) if(mon[1]>0) else (0,0,0) for mon in dd['vD2P']]
-    dd['vCH22P']=np.array([cf*mon[1] for (cf,mon) in zip(dd['vC2P'],dd['vD2P'])])
-    dd['vH23P']=[(mon[0],mon[1],mon[2]-1) if(mon[2]>0) else (0,0,0) for mon in dd['vD2P']]
-    dd['vCH23P']=np.array([cf*mon[2] for (cf,mon) in zip(dd['vC2P'],dd['vD2P'])])
-    dd['vH33P']=[(mon[0],mon[1],mon[2]-1) if(mon[2]>0) else (0,0,0) for mon in dd['vD3P']]
-    dd['vCH33P']=np.array([cf*mon[2] for (cf,mon) in zip(dd['vC3P'],dd['vD3P'])])    
-    vQ=[];vQidx=[];jj=0
-    while(jj<=nQ):
-        lv=len(vQ)
-        vQidx.append([jj,[k for k in range(lv,lv+nQ+1-jj)]])
-        vQ+=[(nQ-jj-k,k,jj) for k in range(nQ+1-jj)]
-        jj+=2 
-    dd['vQ']=vQ;dd['vQidx']=vQidx
-    dd['vD1Q']=[(mon[0]-1,mon[1],mon[2]) if(mon[0]>0) else (0,0,0) for mon in vQ]
-    dd['vC1Q']=np.array([mon[0] if(mon[0]>0) else 0 for mon in vQ])
-    dd['vD2Q']=[(mon[0],mon[1]-1,mon[2]) if(mon[1]>0) else (0,0,0) for mon in vQ]
-    dd['vC2Q']=np.array([mon[1] if(mon[1]>0) else 0 for mon in vQ])
-    dd['vD3Q']=[(mon[0],mon[1],mon[2]-1) if(mon[2]>0) else (0,0,0) for mon in vQ]
-    dd['vC3Q']=np.array([mon[2] if(mon[2]>0) else 0 for mon in vQ])
-    dd['vH11Q']=[(mon[0]-1,mon[1],mon[2]) if(mon[0]>0) else (0,0,0) for mon in dd['vD1Q']]
-    dd['vCH11Q']=np.array([cf*mon[0] for (cf,mon) in zip(dd['vC1Q'],dd['vD1Q'])])
-    dd['vH12Q']=[(mon[0],mon[1]-1,mon[2]) if(mon[1]>0) else (0,0,0) for mon in dd['vD1Q']]
-    dd['vCH12Q']=np.array([cf*mon[1] for (cf,mon) in zip(dd['vC1Q'],dd['vD1Q'])])
-    dd['vH13Q']=[(mon[0],mon[1],mon[2]-1) if(mon[2]>0) else (0,0,0) for mon in dd['vD1Q']]
-    dd['vCH13Q']=np.array([cf*mon[2] for (cf,mon) in zip(dd['vC1Q'],dd['vD1Q'])])
-    dd['vH22Q']=[(mon[0],mon[1]-1,mon[2]) if(mon[1]>0) else (0,0,0) for mon in dd['vD2Q']]
-    dd['vCH22Q']=np.array([cf*mon[1] for (cf,mon) in zip(dd['vC2Q'],dd['vD2Q'])])
-    dd['vH23Q']=[(mon[0],mon[1],mon[2]-1) if(mon[2]>0) else (0,0,0) for mon in dd['vD2Q']]
-    dd['vCH23Q']=np.array([cf*mon[2] for (cf,mon) in zip(dd['vC2Q'],dd['vD2Q'])])
-    dd['vH33Q']=[(mon[0],mon[1],mon[2]-1) if(mon[2]>0) else (0,0,0) for mon in dd['vD3Q']]
-    dd['vCH33Q']=np.array([cf*mon[2] for (cf,mon) in zip(dd['vC3Q'],dd['vD3Q'])])     
-    return dd
-
-
 '''
 function: 'prtMonomials'
 --Utility for checking that the list of monomials (and derivatives) is correct 
@@ -448,6 +605,7 @@ def prtMonomials(dd):
     print('total number of coeffs = ',len(dd['vP'])+len(dd['vQ']))
     return
 
+
 '''
 def lambdaMax(bOne,tOne,bTwo,tTwo):
     aa=bTwo-bOne
@@ -533,12 +691,28 @@ def curveSegFDF(Bs,Ts,Be,Te,Lshape,vTT):
     return f,df    
 
     
+'''
+function:'curveSegThetaTable'
+--Precalculated inverse of theta(t) on a Bezier segment defined by Bs,Ts,Be,Te,Lshape (see 'curveSegTheta'):
+  the values theta(t) at nTable equidistant t in [0,1] (increasing, since the segment is monotone in theta)
+--Returns the table (vThetaTable,vtTable); np.interp(vTheta,vThetaTable,vtTable) approximates the t-parameters
+  (within ~1/nTable**2; used as the starting values of 'curveSegTheta')
+'''
+def curveSegThetaTable(Bs,Ts,Be,Te,Lshape,nTable=65):
+    vtTable=np.linspace(0.0,1.0,nTable)
+    vThetaTable=curveSegF(Bs,Ts,Be,Te,Lshape,vtTable)
+    return np.maximum.accumulate(vThetaTable),vtTable
+
 '''
 function:'curveSegTheta'
---Calculates the list of t-parameters corresponding to a list of theta values 
-  for a Bezier segment defined by Bs,Ts,Be,Te,Lshape 
+--Calculates the t-parameters corresponding to the theta values 'vTheta' (list or array, in [Bs,Be])
+  for a Bezier segment defined by Bs,Ts,Be,Te,Lshape (theta-components of the end points and unit tangents) 
+--All the values are solved at once: Halley iterations on the array of unconverged values (|theta(t)-theta|>epsF);
+  each root is kept in the bracket [tLow,tHigh] (from the signs of theta(t)-theta, theta(t) being increasing),
+  an iterate outside the bracket is replaced by bisection
+--table: optional (vThetaTable,vtTable) of 'curveSegThetaTable' for the starting values (default: linear interpolation)
 '''
-def curveSegTheta(vTheta,Bs,Ts,Be,Te,Lshape):
+def curveSegTheta(vTheta,Bs,Ts,Be,Te,Lshape,table=None,nIter=100,epsF=1.0e-12):
     TTs=Lshape*Ts;TTe=Lshape*Te
     B1=Bs+TTs;B2=B1+TTs;B4=Be-TTe;B3=B4-TTe
     A1=5.0*(B1-Bs)
@@ -546,21 +720,30 @@ def curveSegTheta(vTheta,Bs,Ts,Be,Te,Lshape):
     A3=10.0*(3.0*B1-Bs+B3-3.0*B2)
     A4=5.0*(Bs-4.0*B1+6.0*B2-4.0*B3+B4)
     A5=5.0*(B1-2.0*B2+2.0*B3-B4)-Bs+Be
-    vtt=[]
-    t=0.0;epsF=1.0e-9;epsDF=1.0e-12
-    for theta in vTheta:
-        nn=0
-        while(nn<500):
-            f=Bs+t*(A1+t*(A2+t*(A3+t*(A4+t*A5))))-theta
-            if(abs(f)<=epsF):break            
-            df=A1+t*(2.0*A2+t*(3.0*A3+t*(4.0*A4+5.0*A5*t)))
-            if(abs(df)<epsDF):break
-            t-=0.75*f/df
-            f=Bs+t*(A1+t*(A2+t*(A3+t*(A4+t*A5))))-theta
-            nn+=1
-        ###print("nIter = ",nn)    
-        vtt.append(t)
-    return np.array(vtt)    
+    vTheta=np.asarray(vTheta,dtype=float).reshape(-1)
+    if(table is None):
+        vtt=np.clip((vTheta-Bs)/(Be-Bs),0.0,1.0)
+    else:
+        vtt=np.interp(vTheta,table[0],table[1])
+    tLow=np.zeros(vtt.shape[0]);tHigh=np.ones(vtt.shape[0])
+    idx=np.arange(vtt.shape[0])
+    for nn in range(nIter):
+        t=vtt[idx]
+        f=Bs+t*(A1+t*(A2+t*(A3+t*(A4+t*A5))))-vTheta[idx]
+        vAct=np.abs(f)>epsF
+        if(not np.any(vAct)):break
+        idx,t,f=idx[vAct],t[vAct],f[vAct]
+        vNeg=f<0.0
+        tLow[idx[vNeg]]=t[vNeg];tHigh[idx[~vNeg]]=t[~vNeg]
+        df=A1+t*(2.0*A2+t*(3.0*A3+t*(4.0*A4+5.0*A5*t)))
+        d2f=2.0*A2+t*(6.0*A3+t*(12.0*A4+20.0*A5*t))
+        with np.errstate(divide='ignore',invalid='ignore'):
+            t=t-2.0*f*df/(2.0*df*df-f*d2f)
+        vOut=~((t>tLow[idx])&(t<tHigh[idx]))##(also NaN)
+        t[vOut]=0.5*(tLow[idx[vOut]]+tHigh[idx[vOut]])
+        vtt[idx]=t
+    ###print("nIter = ",nn)    
+    return vtt    
 
 '''
 function:'uaxLambda'
@@ -572,6 +755,7 @@ function:'uaxLambda'
 --lists of precalculated values of tangents
 --Note: the angle along the theta-axis of each directional data set is in degrees 
 '''
+@profiled()
 def uaxLambda(data):
     vvPolygon={'lambdaSTmax':0,'lambdaRTmax':0,'pointsST':0,'tanST':0,'pointsRT':0,'tanRT':0,
                'sTb':data['sTb'],'rTb':data['rTb'],'shapeUAX':data['shapeUAX'],'assym':data['assym'],'name':data['name'],'shapeBAX':data['shapeBAX']}
@@ -723,11 +907,107 @@ def lambdaMaxDebug(bOne,tOne,bTwo,tTwo):
     print("t1,t2 and min = ",t1,t2,min(t1,t2))
     return    
 
+'''
+function:'hashUpdate'
+--Adds the value 'vv' (array, number, string, or list/tuple/dict of these) to the hash 'hh' (exactly: arrays by their bytes)
+'''
+def hashUpdate(hh,vv):
+    if(isinstance(vv,np.ndarray)):
+        hh.update(repr((vv.dtype.str,vv.shape)).encode());hh.update(np.ascontiguousarray(vv).tobytes())
+    elif(isinstance(vv,dict)):
+        for key in sorted(vv):
+            hh.update(repr(key).encode());hashUpdate(hh,vv[key])
+    elif(isinstance(vv,(list,tuple))):
+        hh.update(repr((type(vv).__name__,len(vv))).encode())
+        for item in vv:hashUpdate(hh,item)
+    else:
+        hh.update(repr(vv).encode())
+    return hh
+
+def setReadOnly(res):
+    if(isinstance(res,np.ndarray)):
+        res.flags.writeable=False
+    elif(isinstance(res,dict)):
+        for vv in res.values():setReadOnly(vv)
+    elif(isinstance(res,(list,tuple))):
+        for vv in res:setReadOnly(vv)
+    return res
+
+'''
+function:'protoCached'
+--Memoizes the proto-model stage: returns the result of 'fGen()' cached under the key ('name', contents of 'uaxData', 'args')
+--The key is a hash of the values (see 'hashUpdate'), so a modified 'uaxData' gets its own entry;
+  the 'protoCacheSize' most recently used results are kept in 'protoCache' (0 = no caching)
+--The arrays of a cached result are read-only (shared by all callers)
+'''
+def protoCached(name,uaxData,args,fGen):
+    if(protoCacheSize<=0):
+        return fGen()
+    tag=hashUpdate(hashUpdate(hashlib.sha1(name.encode()),uaxData),tuple(args)).hexdigest()
+    if(tag in protoCache):
+        protoCache.move_to_end(tag)
+        return protoCache[tag]
+    res=setReadOnly(fGen())
+    protoCache[tag]=res
+    while(len(protoCache)>protoCacheSize):
+        protoCache.popitem(last=False)
+    return res
+
+'''
+function:'vectorProd'
+--Unit vector of the cross product a x b; a,b: 3-vectors or arrays of 3-vectors (..,3) (broadcast)
+'''
 def vectorProd(a,b):
-    vv=np.array([a[1]*b[2]-a[2]*b[1],a[2]*b[0]-a[0]*b[2],a[0]*b[1]-a[1]*b[0]])
-    norm=np.sqrt(np.sum(vv**2))
+    vv=np.stack((a[...,1]*b[...,2]-a[...,2]*b[...,1],a[...,2]*b[...,0]-a[...,0]*b[...,2],a[...,0]*b[...,1]-a[...,1]*b[...,0]),axis=-1)
+    norm=np.sqrt(np.sum(vv**2,axis=-1,keepdims=True))
     return vv/norm
 
+'''
+function:'protoSections'
+--Points and tangents of the tension (TC='T': points 0,1,2 of the plane sections) or compression (TC='C': points 3,4,5) half 
+  of all the plane sections of 'thetaList' (see 'protoTheta') 
+--Returns two (nS,3,3)-arrays: vPoints[s,:,k], vTangents[s,:,k] = point k (and its tangent) of the section s 
+'''
+def protoSections(uaxData,thetaList,TC,LshapeS,LshapeR):
+    rad=np.pi/180.0
+    sg=1.0 if TC=='T' else -1.0##the compression half: the tension formulas with gamma -> -gamma
+    pointsS=uaxData['pointsS'+TC];tanS=uaxData['tanS'+TC]
+    pointsR=uaxData['pointsR'+TC];tanR=uaxData['tanR'+TC]
+    vTheta=[];vST=[];vDST=[];vRT=[];vSB=[];vDSB=[];vRB=[]
+    for dd in thetaList:##for each segment of the interpolated directional properties 
+        vTheta.append(rad*dd['vThetaTop']) ##the list of angles in the segment (in radians)
+        i0,i1=dd['idxTop']
+        vS,vDS=curveSegFDF(pointsS[:,[i0]],tanS[:,[i0]],pointsS[:,[i1]],tanS[:,[i1]],LshapeS,dd['vSttTop'])
+        vST.append(vS[1,:]);vDST.append(vDS[1,:]/(rad*vDS[0,:]))
+        vRT.append(curveSegF(pointsR[:,[i0]],tanR[:,[i0]],pointsR[:,[i1]],tanR[:,[i1]],LshapeR,dd['vRttTop'])[1,:])
+        i0,i1=dd['idxBottom']
+        vS,vDS=curveSegFDF(pointsS[:,[i0]],tanS[:,[i0]],pointsS[:,[i1]],tanS[:,[i1]],LshapeS,dd['vSttBottom'])
+        vSB.append(vS[1,:]);vDSB.append(vDS[1,:]/(rad*vDS[0,:]))
+        vRB.append(curveSegF(pointsR[:,[i0]],tanR[:,[i0]],pointsR[:,[i1]],tanR[:,[i1]],LshapeR,dd['vRttBottom'])[1,:])
+    t=np.concatenate(vTheta)
+    vST,vDST,vRT=np.concatenate(vST),np.concatenate(vDST),np.concatenate(vRT)
+    vSB,vDSB,vRB=np.concatenate(vSB),np.concatenate(vDSB),np.concatenate(vRB)
+    ct=np.cos(t);st=np.sin(t);c2t=np.cos(2*t);s2t=np.sin(2*t)
+    tb=0.5*np.pi-t;ctb=np.cos(tb);stb=np.sin(tb)
+    vV=np.stack((-s2t,s2t,2*c2t),axis=1) ##vectors of PI-plane normals
+    vWtop=np.stack((vRT+st**2,vRT+ct**2,-ct*st),axis=1)
+    vGammaTop=sg*np.stack((ct**2,st**2,ct*st),axis=1)
+    vDGammaTop=sg*np.stack((-s2t,s2t,c2t),axis=1)
+    vWbottom=np.stack((vRB+stb**2,vRB+ctb**2,ctb*stb),axis=1)
+    vGammaBottom=sg*np.stack((st**2,ct**2,-ct*st),axis=1)
+    vDGammaBottom=sg*np.stack((s2t,-s2t,-c2t),axis=1)
+    sb=uaxData['s'+TC+'b'];rb=uaxData['r'+TC+'b']
+    vPoints=np.zeros((t.shape[0],3,3));vTangents=np.zeros((t.shape[0],3,3))
+    vPoints[:,:,0]=vST[:,None]*vGammaTop
+    dGamma=vDST[:,None]*vGammaTop+vST[:,None]*vDGammaTop
+    vTangents[:,:,0]=vectorProd(vV,vectorProd(vWtop,dGamma))
+    vPoints[:,:,1]=[sg*sb,sg*sb,0.0]
+    vTangents[:,:,1]=vectorProd(vV,np.array([sg*1.0,sg*rb,0])/np.sqrt(1.0+rb**2))
+    vPoints[:,:,2]=vSB[:,None]*vGammaBottom
+    dGamma=-vDSB[:,None]*vGammaBottom+vSB[:,None]*vDGammaBottom
+    vTangents[:,:,2]=vectorProd(vV,vectorProd(vWbottom,dGamma))
+    return vPoints,vTangents
+
 '''
 function:'protoData'
 --Interpolates plane sections and calculates the  maximum shape parameter lambda for the yield surface
@@ -735,204 +1015,82 @@ function:'protoData'
 ----data=precalculated data returned by function 'uaxLambda'
 --Output:
 --the max lambda value (shape parameter)
---lists of precalculated values of points and tangents along the uniaxial 3D curves (tension/compression) 
-  and at the two balanced-biaxial yielding points  
+--the points and tangents along the uniaxial 3D curves (tension/compression) and at the two balanced-biaxial yielding points:
+  vPatch={'Points','Tangents'}, (nS,3,6)-arrays (nS=nSections-1 plane sections, six points/tangents on each) 
+--The results are cached (see 'protoCached'; the arrays are read-only); 'protoDataCalc' calculates them
 '''    
+@profiled()
 def protoData(uaxData,nSections=10):
+    vLbdMax,vPatch=protoCached('protoData',uaxData,(nSections,),lambda:protoDataCalc(uaxData,nSections))
+    return vLbdMax,dict(vPatch)
+
+def protoDataCalc(uaxData,nSections):
     ###Generate the sequence of points and tangents for Bez5YS proto-model
     ##print("protoData: nSections = {}".format(nSections))
     thetaTList,thetaCList=protoTheta(uaxData,nSections)
-    ###print("uaxData");print(uaxData)
-    ##print("thetaTList");print(thetaTList)
-    ##print("thetaCList");print(thetaCList)
-    rad=np.pi/180.0
     LshapeST=uaxData['shapeUAX']*uaxData['lambdaSTmax']
     LshapeRT=uaxData['shapeUAX']*uaxData['lambdaRTmax']
-    LshapeSC=uaxData['shapeUAX']*uaxData['lambdaSTmax']
-    LshapeRC=uaxData['shapeUAX']*uaxData['lambdaRTmax']
+    vPointsT,vTangentsT=protoSections(uaxData,thetaTList,'T',LshapeST,LshapeRT)
     if(uaxData['assym']):
         LshapeSC=uaxData['shapeUAX']*uaxData['lambdaSCmax']
         LshapeRC=uaxData['shapeUAX']*uaxData['lambdaRCmax']
-    vPatch=[]
-    BS=np.zeros((2,1));TS=np.zeros((2,1));BE=np.zeros((2,1));TE=np.zeros((2,1))
-    dGamma=np.zeros((3,))
-    for dd in thetaTList:##for each segment of the interpolated directional properties 
-        vThetaTop=rad*dd['vThetaTop'] ##the list of angles in the segment (in radians)
-        vV=np.array([[-np.sin(2*t),np.sin(2*t),2*np.cos(2*t)] for t in vThetaTop]) ##vectors of PI-plane normals
-        vTT=dd['vSttTop'] 
-        BS[:]=uaxData['pointsST'][:,[dd['idxTop'][0]]]
-        TS[:]=uaxData['tanST'][:,[dd['idxTop'][0]]]
-        BE[:]=uaxData['pointsST'][:,[dd['idxTop'][1]]]
-        TE[:]=uaxData['tanST'][:,[dd['idxTop'][1]]]
-        ##print(BS,TS,BE,TE)
-        vSTtop,vDSTtop=curveSegFDF(BS,TS,BE,TE,LshapeST,vTT)
-        vDSTtop=vDSTtop[1,:]/(rad*vDSTtop[0,:])
-        ##print("vSTtop=\n",vSTtop);print("vDSTtop=\n",vDSTtop)
-        vTT=dd['vRttTop'] 
-        BS[:]=uaxData['pointsRT'][:,[dd['idxTop'][0]]]
-        TS[:]=uaxData['tanRT'][:,[dd['idxTop'][0]]]
-        BE[:]=uaxData['pointsRT'][:,[dd['idxTop'][1]]]
-        TE[:]=uaxData['tanRT'][:,[dd['idxTop'][1]]]
-        vRTtop=curveSegF(BS,TS,BE,TE,LshapeRT,vTT)
-        vWtop=np.array([[vRTtop[1,j]+(np.sin(t))**2,vRTtop[1,j]+(np.cos(t))**2,-np.cos(t)*np.sin(t)] for j,t in enumerate(vThetaTop)])
-        vGammaTtop=np.array([[(np.cos(t))**2,(np.sin(t))**2,np.cos(t)*np.sin(t)] for t in vThetaTop])
-        vDGammaTtop=np.array([[-np.sin(2*t),np.sin(2*t),np.cos(2*t)] for t in vThetaTop])
-        vTT=dd['vSttBottom'] 
-        BS[:]=uaxData['pointsST'][:,[dd['idxBottom'][0]]]
-        TS[:]=uaxData['tanST'][:,[dd['idxBottom'][0]]]
-        BE[:]=uaxData['pointsST'][:,[dd['idxBottom'][1]]]
-        TE[:]=uaxData['tanST'][:,[dd['idxBottom'][1]]]
-        vSTbottom,vDSTbottom=curveSegFDF(BS,TS,BE,TE,LshapeST,vTT)
-        vDSTbottom=vDSTbottom[1,:]/(rad*vDSTbottom[0,:])
-        vTT=dd['vRttBottom'] 
-        BS[:]=uaxData['pointsRT'][:,[dd['idxBottom'][0]]]
-        TS[:]=uaxData['tanRT'][:,[dd['idxBottom'][0]]]
-        BE[:]=uaxData['pointsRT'][:,[dd['idxBottom'][1]]]
-        TE[:]=uaxData['tanRT'][:,[dd['idxBottom'][1]]]
-        vRTbottom=curveSegF(BS,TS,BE,TE,LshapeRT,vTT)
-        vWbottom=np.array([[vRTbottom[1,j]+(np.sin(t))**2,vRTbottom[1,j]+(np.cos(t))**2,np.cos(t)*np.sin(t)] for j,t in enumerate(0.5*np.pi-vThetaTop)])
-        vGammaTbottom=np.array([[(np.sin(t))**2,(np.cos(t))**2,-np.cos(t)*np.sin(t)] for t in vThetaTop])
-        vDGammaTbottom=np.array([[np.sin(2*t),-np.sin(2*t),-np.cos(2*t)] for t in vThetaTop])
-        for kk in range(len(vThetaTop)):
-            vPoints=np.zeros((3,6));vTangents=np.zeros((3,6))
-            vPoints[:,0]=vSTtop[1,kk]*vGammaTtop[kk,:]
-            dGamma[:]=vDSTtop[kk]*vGammaTtop[kk]+vSTtop[1,kk]*vDGammaTtop[kk]
-            vTangents[:,0]=vectorProd(vV[kk],vectorProd(vWtop[kk],dGamma))
-            vPoints[:,1]=[uaxData['sTb'],uaxData['sTb'],0.0]
-            vTangents[:,1]=vectorProd(vV[kk],np.array([1.0,uaxData['rTb'],0])/np.sqrt(1.0+uaxData['rTb']**2))
-            vPoints[:,2]=vSTbottom[1,kk]*vGammaTbottom[kk,:]
-            dGamma[:]=-vDSTbottom[kk]*vGammaTbottom[kk]+vSTbottom[1,kk]*vDGammaTbottom[kk]
-            vTangents[:,2]=vectorProd(vV[kk],vectorProd(vWbottom[kk],dGamma))
-            vPatch.append({'Points':vPoints,'Tangents':vTangents})
-    #lbdMax=10.0**3
-    vLbdMax=1.0e+3*np.ones(6)
+        vPointsC,vTangentsC=protoSections(uaxData,thetaCList,'C',LshapeSC,LshapeRC)
+    else:
+        vPointsC,vTangentsC=-vPointsT,-vTangentsT
+    vPatch={'Points':np.concatenate((vPointsT,vPointsC),axis=2),'Tangents':np.concatenate((vTangentsT,vTangentsC),axis=2)}
+    ###shape parameters of the segments (k,k+1) of all sections at once (see 'lambdaMax')
+    P0=vPatch['Points'];T0=vPatch['Tangents']
+    P1=np.roll(P0,-1,axis=2);T1=np.roll(T0,-1,axis=2)
+    bb=P1-P0
+    mdot=np.sum(T0*T1,axis=1)
+    ddet=1.0-mdot*mdot
+    vLbd1=0.5*np.sum(bb*(T0-mdot[:,None,:]*T1),axis=1)/ddet
+    vLbd2=0.5*np.sum(bb*(T1-mdot[:,None,:]*T0),axis=1)/ddet
+    vBad=np.argwhere(~((vLbd1>0)&(vLbd2>0)))
+    if(vBad.shape[0]):
+        s,k=vBad[0]
+        raise NonConvexDataError("protoData: negative plane section shape parameter lambdaMax = {}, {}\n"
+                                 "--Data is not consistent with a convex model".format(vLbd1[s,k],vLbd2[s,k]))
+    vLbdMax=np.minimum(1.0e+3,np.minimum(np.min(vLbd1,axis=0),np.roll(np.min(vLbd2,axis=0),1)))
     if(not uaxData['assym']):
-        for j in range(len(vPatch)):
-            vPatch[j]['Points'][:,3]=-vPatch[j]['Points'][:,0]
-            vPatch[j]['Points'][:,4]=-vPatch[j]['Points'][:,1]
-            vPatch[j]['Points'][:,5]=-vPatch[j]['Points'][:,2]
-            vPatch[j]['Tangents'][:,3]=-vPatch[j]['Tangents'][:,0]
-            vPatch[j]['Tangents'][:,4]=-vPatch[j]['Tangents'][:,1]
-            vPatch[j]['Tangents'][:,5]=-vPatch[j]['Tangents'][:,2]
-            for kk in range(5):
-                #lbd=lambdaMax(vPatch[j]['Points'][:,kk],vPatch[j]['Tangents'][:,kk],vPatch[j]['Points'][:,kk+1],vPatch[j]['Tangents'][:,kk+1])
-                lbd1,lbd2=lambdaMax(vPatch[j]['Points'][:,kk],vPatch[j]['Tangents'][:,kk],vPatch[j]['Points'][:,kk+1],vPatch[j]['Tangents'][:,kk+1])
-                if(lbd1>0 and lbd2>0):
-                    #lbdMax=min(lbdMax,lbd)
-                    vLbdMax[kk]=min(vLbdMax[kk],lbd1)
-                    vLbdMax[kk+1]=min(vLbdMax[kk+1],lbd2)
-                else:
-                    print("WARNING from 'protoData':")
-                    print("--Negative plane section shape parameter lambdaMax = ",lbd)
-                    print("--Data is not consistent with a convex model")
-                    print("Calculations aborted");exit()
-            lbd1,lbd2=lambdaMax(vPatch[j]['Points'][:,5],vPatch[j]['Tangents'][:,5],vPatch[j]['Points'][:,0],vPatch[j]['Tangents'][:,0])
-            if(lbd1>0 and lbd2>0):
-                vLbdMax[5]=min(vLbdMax[5],lbd1)
-                vLbdMax[0]=min(vLbdMax[0],lbd2)
-            else:
-                print("WARNING from 'protoData':")
-                print("--Negative plane section shape parameter lambdaMax = ",lbd)
-                print("--Data is not consistent with a convex model")
-                print("Calculations aborted");exit()        
-        ##return lbdMax,vPatch
         vLbdMax=np.array([vLbdMax[0],vLbdMax[1],vLbdMax[0],vLbdMax[0],vLbdMax[1],vLbdMax[0]])
-        if(uaxData['shapeBAX']==0):
-            vLbdMax=np.min(vLbdMax)*np.ones(6)
-        return vLbdMax,vPatch
-    jj=0    ##;print("thetaTList\n",thetaTList);print("thetaCList\n",thetaCList)
-    for dd in thetaCList:##for each segment of the interpolated directional properties 
-        vThetaTop=rad*dd['vThetaTop'] ##the list of angles in the segment (in radians)
-        vV=np.array([[-np.sin(2*t),np.sin(2*t),2*np.cos(2*t)] for t in vThetaTop]) ##vectors of PI-plane normals
-        vTT=dd['vSttTop'] 
-        BS[:]=uaxData['pointsSC'][:,[dd['idxTop'][0]]]
-        TS[:]=uaxData['tanSC'][:,[dd['idxTop'][0]]]
-        BE[:]=uaxData['pointsSC'][:,[dd['idxTop'][1]]]
-        TE[:]=uaxData['tanSC'][:,[dd['idxTop'][1]]]
-        vSTtop,vDSTtop=curveSegFDF(BS,TS,BE,TE,LshapeSC,vTT)
-        vDSTtop=vDSTtop[1,:]/(rad*vDSTtop[0,:])
-        vTT=dd['vRttTop'] 
-        BS[:]=uaxData['pointsRC'][:,[dd['idxTop'][0]]]
-        TS[:]=uaxData['tanRC'][:,[dd['idxTop'][0]]]
-        BE[:]=uaxData['pointsRC'][:,[dd['idxTop'][1]]]
-        TE[:]=uaxData['tanRC'][:,[dd['idxTop'][1]]]
-        vRTtop=curveSegF(BS,TS,BE,TE,LshapeRC,vTT)
-        vWtop=np.array([[vRTtop[1,j]+(np.sin(t))**2,vRTtop[1,j]+(np.cos(t))**2,-np.cos(t)*np.sin(t)] for j,t in enumerate(vThetaTop)])###surface normal points downwards
-        vGammaTtop=np.array([[-(np.cos(t))**2,-(np.sin(t))**2,-np.cos(t)*np.sin(t)] for t in vThetaTop])##This is actually the bottom part 
-        vDGammaTtop=np.array([[np.sin(2*t),-np.sin(2*t),-np.cos(2*t)] for t in vThetaTop])
-        vTT=dd['vSttBottom'] 
-        BS[:]=uaxData['pointsSC'][:,[dd['idxBottom'][0]]]
-        TS[:]=uaxData['tanSC'][:,[dd['idxBottom'][0]]]
-        BE[:]=uaxData['pointsSC'][:,[dd['idxBottom'][1]]]
-        TE[:]=uaxData['tanSC'][:,[dd['idxBottom'][1]]]
-        vSTbottom,vDSTbottom=curveSegFDF(BS,TS,BE,TE,LshapeSC,vTT)
-        vDSTbottom=vDSTbottom[1,:]/(rad*vDSTbottom[0,:])
-        vTT=dd['vRttBottom'] 
-        BS[:]=uaxData['pointsRC'][:,[dd['idxBottom'][0]]]
-        TS[:]=uaxData['tanRC'][:,[dd['idxBottom'][0]]]
-        BE[:]=uaxData['pointsRC'][:,[dd['idxBottom'][1]]]
-        TE[:]=uaxData['tanRC'][:,[dd['idxBottom'][1]]]
-        vRTbottom=curveSegF(BS,TS,BE,TE,LshapeRC,vTT)
-        vWbottom=np.array([[vRTbottom[1,j]+(np.sin(t))**2,vRTbottom[1,j]+(np.cos(t))**2,np.cos(t)*np.sin(t)] for j,t in enumerate(0.5*np.pi-vThetaTop)])
-        vGammaTbottom=np.array([[-(np.sin(t))**2,-(np.cos(t))**2,np.cos(t)*np.sin(t)] for t in vThetaTop])##This is actually the top part 
-        vDGammaTbottom=np.array([[-np.sin(2*t),np.sin(2*t),np.cos(2*t)] for t in vThetaTop])
-        for kk in range(len(vThetaTop)):
-            vPatch[jj]['Points'][:,3]=vSTtop[1,kk]*vGammaTtop[kk,:]
-            dGamma[:]=vDSTtop[kk]*vGammaTtop[kk]+vSTtop[1,kk]*vDGammaTtop[kk]
-            vPatch[jj]['Tangents'][:,3]=vectorProd(vV[kk],vectorProd(vWtop[kk],dGamma))
-            vPatch[jj]['Points'][:,4]=[-uaxData['sCb'],-uaxData['sCb'],0.0]
-            vPatch[jj]['Tangents'][:,4]=vectorProd(vV[kk],np.array([-1.0,-uaxData['rCb'],0])/np.sqrt(1.0+uaxData['rCb']**2))
-            vPatch[jj]['Points'][:,5]=vSTbottom[1,kk]*vGammaTbottom[kk,:]
-            dGamma[:]=-vDSTbottom[kk]*vGammaTbottom[kk]+vSTbottom[1,kk]*vDGammaTbottom[kk]
-            vPatch[jj]['Tangents'][:,5]=vectorProd(vV[kk],vectorProd(vWbottom[kk],dGamma))
-            for qq in range(5):
-                lbd1,lbd2=lambdaMax(vPatch[jj]['Points'][:,qq],vPatch[jj]['Tangents'][:,qq],vPatch[jj]['Points'][:,qq+1],vPatch[jj]['Tangents'][:,qq+1])
-                if(lbd1>0 and lbd2>0):
-                    vLbdMax[qq]=min(vLbdMax[qq],lbd1)
-                    vLbdMax[qq+1]=min(vLbdMax[qq+1],lbd2)    
-                else:
-                    print("WARNING from 'protoData':")
-                    print("--Negative plane section shape parameter lambdaMax = ",lbd)
-                    print("--Data is not consistent with a convex model")
-                    print("Calculations aborted");exit()
-            lbd1,lbd2=lambdaMax(vPatch[jj]['Points'][:,5],vPatch[jj]['Tangents'][:,5],vPatch[jj]['Points'][:,0],vPatch[jj]['Tangents'][:,0])
-            if(lbd1>0 and lbd2>0):
-                vLbdMax[5]=min(vLbdMax[5],lbd1)
-                vLbdMax[0]=min(vLbdMax[0],lbd2)    
-            else:
-                print("WARNING from 'protoData':")
-                print("--Negative plane section shape parameter lambdaMax = ",lbd)
-                print("--Data is not consistent with a convex model")
-                print("Calculations aborted");exit()
-            jj+=1
-    aa=min(vLbdMax[0],vLbdMax[2]);bb=min(vLbdMax[3],vLbdMax[5])        
-    #vLbdMax=np.array([vLbdMax[0],vLbdMax[1],vLbdMax[0],vLbdMax[2],vLbdMax[3],vLbdMax[2]])
-    vLbdMax=np.array([aa,vLbdMax[1],aa,bb,vLbdMax[4],bb])     
+    else:
+        aa=min(vLbdMax[0],vLbdMax[2]);bb=min(vLbdMax[3],vLbdMax[5])        
+        #vLbdMax=np.array([vLbdMax[0],vLbdMax[1],vLbdMax[0],vLbdMax[2],vLbdMax[3],vLbdMax[2]])
+        vLbdMax=np.array([aa,vLbdMax[1],aa,bb,vLbdMax[4],bb])     
     if(uaxData['shapeBAX']==0):
             vLbdMax=np.min(vLbdMax)*np.ones(6)
     return vLbdMax,vPatch
 
 
+'''
+function:'protoSectionCurves'
+--Bezier curves of all the plane sections of 'vPatch' (see 'protoData') with the shape parameters 'lbd' (six values)
+--plot=True: 101 points on each segment; plot=False: nTT points (see 'curveSeg3')
+--Returns a (nS,6,3,nPoints)-array: [s,k] = the segment (k,k+1) of the section s
+'''
+def protoSectionCurves(lbd,vPatch,plot=True,nTT=5):
+    P=vPatch['Points'][:,:,:,None];T=vPatch['Tangents'][:,:,:,None]
+    return np.stack([curveSeg3(P[:,:,kk],T[:,:,kk],P[:,:,(kk+1)%6],T[:,:,(kk+1)%6],lbd[kk],lbd[(kk+1)%6],plot,nTT) for kk in range(6)],axis=1)
+
+
 '''
 function:'protoDataPoints'
 --Calculates a list of points on the proto-model of the yield surface 
+--The results are cached (see 'protoCached'; the array is read-only)
 '''
+@profiled()
 def protoDataPoints(lbd,shapeVBAX,uaxData,nSections,nPointsSegment):
+    return protoCached('protoDataPoints',uaxData,(lbd,shapeVBAX,nSections,nPointsSegment),
+                       lambda:protoDataPointsCalc(lbd,shapeVBAX,uaxData,nSections,nPointsSegment))
+
+def protoDataPointsCalc(lbd,shapeVBAX,uaxData,nSections,nPointsSegment):
     ##print("Using: nSections={}, nPoints/SectionSegment={}".format(nSections,nPointsSegment))
-    lbd2,data=protoData(uaxData,nSections) 
+    lbd2,vPatch=protoData(uaxData,nSections) 
     lbd=np.min((lbd2,lbd),axis=0)*shapeVBAX
     #lbd=lbd*shapeBAX
-    vYSpoints=np.zeros(((nSections-1)*6*nPointsSegment,3))
-    jj=0
-    for dd in data:
-        for kk in range(5):
-            vYSpoints[jj:jj+nPointsSegment]=curveSeg3(
-            dd['Points'][:,kk].reshape(3,1),dd['Tangents'][:,kk].reshape(3,1),dd['Points'][:,kk+1].reshape(3,1),dd['Tangents'][:,kk+1].reshape(3,1),lbd[kk],lbd[kk+1],False,nPointsSegment).T
-            jj+=nPointsSegment
-        vYSpoints[jj:jj+nPointsSegment]=curveSeg3(
-        dd['Points'][:,5].reshape(3,1),dd['Tangents'][:,5].reshape(3,1),dd['Points'][:,0].reshape(3,1),dd['Tangents'][:,0].reshape(3,1),lbd[5],lbd[0],False,nPointsSegment).T
-        jj+=nPointsSegment    
-    return vYSpoints
+    vCurves=protoSectionCurves(lbd,vPatch,False,nPointsSegment)
+    return vCurves.transpose((0,1,3,2)).reshape((-1,3))
 
 
 
@@ -966,7 +1124,70 @@ def genConstraintsPoints2D(nPoints):
             vP.append(np.array([vv,g1,g2,g3,g4]).reshape((15,)))
     return np.array(vP)
     
-def genConstraintsPoints2DOpt(nPoints,number=False):
+'''
+function:'symmetryMask'
+--Returns the mask of the points 'vu' (on the unit sphere) that lie in the fundamental domain of the symmetry group 'symmetry':
+----'orthotropic': P and Q are even in u3 (all SHYqp models); the domain is the hemisphere u3>=0
+----'orthotropicCS': also centro-symmetric, f(-u)=f(u) (the symmetric SHYq models); 
+    the domain is the quarter of the sphere u3>=0 and azimuth in [0,pi) (the points (-u1,-u2,u3) are equivalent)
+--The convexity conditions (and the Gaussian curvature) at equivalent points are the same
+  (for the tangent directions mapped by the same group element, see 'symmetryFoldRows')
+'''
+def symmetryMask(vu,symmetry='orthotropic'):
+    if(symmetry not in symmetryGroups):
+        raise SHYqpError("symmetry = {}: must be one of {}".format(symmetry,symmetryGroups))
+    mask=vu[:,2]>=0
+    if(symmetry=='orthotropicCS'):
+        mask&=(vu[:,1]>1.0e-12)|((np.abs(vu[:,1])<=1.0e-12)&(vu[:,0]>=0))
+    return mask
+
+
+'''
+function:'symmetryFold'
+--Maps each point of 'vu' (on the unit sphere) to its equivalent point in the fundamental domain of 'symmetry' (see 'symmetryMask')
+'''
+def symmetryFold(vu,symmetry='orthotropic'):
+    vu=vu.copy()
+    vu[:,2]=np.abs(vu[:,2])
+    if(symmetry=='orthotropicCS'):
+        vu[~symmetryMask(vu,symmetry),0:2]*=-1.0
+    return vu
+
+
+'''
+function:'symmetryFoldRows'
+--Maps the rows 'vP' (point, tangent basis and fan of tangent directions, see 'genConstraintsPoints2DOpt'; or points only)
+  of the hemisphere u3>=0 to the fundamental domain of 'symmetry' (see 'symmetryMask'):
+  the point and all the tangent vectors of a row outside the domain are mapped by the same group element (rotation by pi about u3),
+  so that the convexity conditions of the folded rows are those of the original rows (the reduction is exact);
+  the folded rows at the location of a row of the domain are removed (the grid points at azimuths phi and phi+pi have the same fan)
+'''
+def symmetryFoldRows(vP,symmetry='orthotropic'):
+    mask=symmetryMask(vP[:,0:3],symmetry)
+    if(symmetry=='orthotropic'):
+        return vP[mask]
+    vR=vP[~mask].reshape((-1,vP.shape[1]//3,3)).copy()
+    vR[:,:,0:2]*=-1.0
+    vP=np.concatenate((vP[mask],vR.reshape((-1,vP.shape[1]))),axis=0)
+    idx=np.unique(np.round(vP[:,0:3],9)+0.0,axis=0,return_index=True)[1]##+0.0: no -0.0
+    return vP[np.sort(idx)]
+
+
+'''
+function:'modelSymmetry'
+--Returns the symmetry descriptor of the SHYqp coefficients 'vCoeff' (see 'symmetryMask'): 'orthotropicCS' if all P-coefficients are zero
+'''
+def modelSymmetry(vCoeff,nP):
+    return 'orthotropic' if np.any(vCoeff[0:nP]) else 'orthotropicCS'
+
+
+'''
+function:'genConstraintsPoints2DOpt'
+--Optimized version of 'genConstraintsPoints2D': points on the hemisphere u3>=0 with the orthonormal tangent basis (g1,g2)
+  and a fan of 49 tangent directions
+--symmetry: the points (and their tangents) are folded into the fundamental domain (see 'symmetryFoldRows')
+'''
+def genConstraintsPoints2DOpt(nPoints,number=False,symmetry='orthotropic'):
     N1=int(0.25*nPoints)
     vt1=np.linspace(0,np.pi/2,N1+1)
     vc1=np.cos(vt1[1:]);vs1=np.sin(vt1[1:])
@@ -981,7 +1202,7 @@ def genConstraintsPoints2DOpt(nPoints,number=False):
     ##(because of limited numerical precision)    
     tt=[(np.cos(t),np.sin(t)) for t in np.linspace(0,np.pi,51)[1:-1]]        
     nVec=len(tt)
-    if(number): return (np.sum(vN2)+1,3*(nVec+3))
+    if(number and symmetry=='orthotropic'): return (np.sum(vN2)+1,3*(nVec+3))
     vP=np.zeros((np.sum(vN2)+1,3*(nVec+3)))
     vN2[:]+=1
     vP[0,2]=1.0
@@ -1016,14 +1237,35 @@ def genConstraintsPoints2DOpt(nPoints,number=False):
             vP[jj:jN2,i]=gg[:,0];vP[jj:jN2,i+1]=gg[:,1];vP[jj:jN2,i+2]=gg[:,2]
             i+=3
         jj=jN2
+    if(symmetry!='orthotropic'):
+        vP=symmetryFoldRows(vP,symmetry)
+    if(number): return vP.shape
     return vP        
 
+'''
+function:'genConstraintsPointsAngles'
+--The same rows as 'genConstraintsPoints2DOpt' (point, tangent basis (g1,g2) and fan of 49 tangent directions)
+  at the points of spherical angles (vTheta,vPhi): u=(sin(theta)cos(phi),sin(theta)sin(phi),cos(theta))
+'''
+def genConstraintsPointsAngles(vTheta,vPhi):
+    ct1=np.cos(vTheta);st1=np.sin(vTheta);vc2=np.cos(vPhi);vs2=np.sin(vPhi)
+    vt=np.linspace(0,np.pi,51)[1:-1]
+    vP=np.zeros((vTheta.shape[0],3*(vt.shape[0]+3)))
+    vP[:,0]=st1*vc2;vP[:,1]=st1*vs2;vP[:,2]=ct1
+    vP[:,3]=-vs2;vP[:,4]=vc2
+    vP[:,6]=ct1*vc2;vP[:,7]=ct1*vs2;vP[:,8]=-st1
+    gg=np.cos(vt).reshape((1,vt.shape[0],1))*vP[:,None,3:6]+np.sin(vt).reshape((1,vt.shape[0],1))*vP[:,None,6:9]
+    gg/=np.sqrt(np.sum(gg*gg,axis=2,keepdims=True))
+    vP[:,9:]=gg.reshape((vTheta.shape[0],3*vt.shape[0]))
+    return vP
+
+
 '''
 function: genConstraintsPoints2DOptPoints
 --the same as 'genConstraintsPoints2DOpt' but returns only points (no tangents)
---used for testing/debugging
+--used for testing/debugging (and by 'SHYqp_HessGaussCheck')
 '''
-def genConstraintsPoints2DOptPoints(nPoints):
+def genConstraintsPoints2DOptPoints(nPoints,symmetry='orthotropic'):
     N1=int(0.25*nPoints)
     vt1=np.linspace(0,np.pi/2,N1+1)
     vc1=np.cos(vt1[1:]);vs1=np.sin(vt1[1:])
@@ -1042,591 +1284,1214 @@ def genConstraintsPoints2DOptPoints(nPoints):
         vP[jj:jN2,1]=st1*vs2
         vP[jj:jN2,2]=ct1
         jj=jN2
+    if(symmetry!='orthotropic'):
+        vP=symmetryFoldRows(vP,symmetry)
     return vP        
 
+'''
+function:'cachedArray'
+--Returns the array 'name' identified by the tuple 'key' from the directory 'cacheDir' (as a read-only memory map);
+  if not found, the array is calculated by 'fGen()' and saved (to a temporary file, then renamed, so that
+  concurrent runs sharing the same 'cacheDir' never read a partially written file; the temporary file is removed if 'fGen' fails)
+--The file name is a hash of (consCacheVersion,name,key)
+--cacheDir=None: no caching (returns 'fGen()')
+--shape given: 'fGen(out)' fills the preallocated (float64) array 'out' of this shape;
+  when caching, 'out' is a memory map of the temporary file (the array is never held in memory as a whole)
+'''
+def cachedArray(cacheDir,name,key,fGen,shape=None):
+    if(cacheDir is None):
+        return fGen() if(shape is None) else fGen(np.empty(shape))
+    tag=hashlib.sha1(repr((consCacheVersion,name)+tuple(key)).encode()).hexdigest()[0:16]
+    fName=osp.join(cacheDir,'{}_{}.npy'.format(name,tag))
+    try:
+        return np.load(fName,mmap_mode='r')
+    except (IOError,ValueError):
+        pass
+    os.makedirs(cacheDir,exist_ok=True)
+    fd,fTmp=tempfile.mkstemp(suffix='.tmp',dir=cacheDir)
+    try:
+        if(shape is None):
+            with os.fdopen(fd,'wb') as ff:
+                np.save(ff,fGen())
+        else:
+            os.close(fd)
+            vArr=np.lib.format.open_memmap(fTmp,mode='w+',dtype=np.float64,shape=shape)
+            fGen(vArr);vArr.flush()
+            del vArr
+        os.chmod(fTmp,0o644)
+        os.replace(fTmp,fName)
+    except BaseException:
+        vArr=None##release the memory map before removing the file
+        os.unlink(fTmp)##the partial (possibly full size) temporary file
+        raise
+    return np.load(fName,mmap_mode='r')
+
+
+'''
+function:'constraintBasis'
+--Returns the (material independent) points and tangent vectors of 'genConstraintsPoints2DOpt(nEquator)',
+  the basis of 'genConstraintsBasis2D' (nP+nQ columns) and the tangent forms of 'genTangentForms2D'
+--cacheDir: directory of cached arrays (see 'cachedArray'); None = no caching
+--symmetry: only the points of the fundamental domain of the symmetry group are used (see 'symmetryMask')
+--nP: None = all the P-columns; nP=0: only the Q-columns (the symmetric case)
+'''
+@profiled()
+def constraintBasis(ddMon,degQ,nEquator,cacheDir=None,symmetry='orthotropic',nP=None):
+    nQ,nPall=nMonoms(degQ)
+    if(nP is None):nP=nPall
+    vUG=cachedArray(cacheDir,'points',(nEquator,symmetry),lambda:genConstraintsPoints2DOpt(nEquator,symmetry=symmetry))
+    vBasis=cachedArray(cacheDir,'basis',(degQ,nEquator,symmetry,nP),lambda:genConstraintsBasis2D(ddMon,degQ,nP,nQ,vUG[:,0:3]))
+    GG=cachedArray(cacheDir,'tangents',(nEquator,symmetry),lambda:genTangentForms2D(vUG))
+    profileInfo(nPoints=vUG.shape[0],nCol=vBasis.shape[2],cached=cacheDir is not None)
+    return vUG,vBasis,GG
+
+
+'''
+function:'constraintRows'
+--Returns the (material independent) rows of all the convexity constraints of the grid 'genConstraintsPoints2DOpt(nEquator)'
+  (nP+nQ columns; nP=None: all the P-columns, nP=0: only the Q-columns, the symmetric case)
+--cacheDir: directory of cached arrays (see 'cachedArray'); None = no caching
+--The rows are generated block by block directly into the cached file (see 'genConstraintsRows2D');
+  rows generated with and without 'consStage32' are cached separately
+'''
+def constraintRows(ddMon,degQ,nEquator,cacheDir=None,symmetry='orthotropic',nP=None):
+    nQ,nPall=nMonoms(degQ)
+    if(nP is None):nP=nPall
+    vUG=cachedArray(cacheDir,'points',(nEquator,symmetry),lambda:genConstraintsPoints2DOpt(nEquator,symmetry=symmetry))
+    nRows=vUG.shape[0]*((vUG.shape[1]-3)//3)
+    return cachedArray(cacheDir,'rows',(degQ,nEquator,symmetry,consStage32,nP),lambda out:genConstraintsRows2D(ddMon,degQ,nP,nQ,vUG,out=out),
+                       shape=(nRows,nP+nQ))
+
+
+'''
+function:'constraintMatrix'
+--Returns the matrix of all the convexity constraints and the vector of bounds (see 'reduceConstraints')
+  of the grid 'genConstraintsPoints2DOpt(nEquator)' for the free columns 'vFree' (nP=0: the symmetric case, only the Q-columns)
+--cacheDir=None: the matrix is generated block by block (see 'genConstraintsRows2D'; no full set of rows is formed);
+  otherwise it is extracted from the cached rows ('constraintRows')
+'''
+@profiled()
+def constraintMatrix(ddMon,degQ,nP,vFree,vFixed,cFixed,nEquator,epsilon=0.01,cacheDir=None,symmetry='orthotropic'):
+    if(cacheDir is None):
+        vUG=genConstraintsPoints2DOpt(nEquator,symmetry=symmetry)
+        MCC,MUB=genConstraintsRows2D(ddMon,degQ,nP,nMonoms(degQ)[0],vUG,vFree,vFixed,cFixed,epsilon)
+    else:
+        vv=constraintRows(ddMon,degQ,nEquator,cacheDir,symmetry,nP)
+        MCC,MUB=reduceConstraints(vv,vFree,vFixed,cFixed,epsilon)
+    profileInfo(nCons=MCC.shape[0],nCol=MCC.shape[1],cached=cacheDir is not None)
+    return MCC,MUB
+
+
+'''
+function:'genConstraintsRows2D'
+--Calculates the rows of all the convexity constraints at the points and tangents 'vUG' (see 'genConstraintsPoints2DOpt')
+  one block of points at a time, written directly into the output: 
+  the peak memory is the output plus one block of about 'memBlock' bytes (default: 'consMemBlock')
+--nP=0: only the Q-columns (the symmetric case)
+--vFixed=None: returns all the rows, (nPoints*nVec,nP+nQ)-array 
+--vFixed,cFixed given: returns the matrix of constraints (the columns 'vFree') and the vector of bounds (see 'reduceConstraints')
+--out: preallocated output (rows or matrix of constraints), e.g., a memory map (see 'cachedArray'); default: a new array
+--stage32=True (default: 'consStage32'): the monomial powers and the basis of a block are calculated in float32 (twice as many points per block);
+  the relative round-off (~1e-7) is far below the margin 'epsilon' of the constraints; the rows are combined and stored in float64
+--nJobs>1 (default: 'consJobs'): the points are split among a pool of worker processes; each worker writes its rows 
+  into a shared memory block (named here, only the name is sent back) which is copied into the output and released;
+  if a task fails, the blocks created and not yet copied are released before the error is raised
+  (the peak memory is the output plus about one block per worker); the rows agree with the serial generation
+  up to round-off (~1e-15: the blocks of points, and thus the BLAS block sizes, differ);
+  not available inside daemonic processes (e.g., the workers of 'SHYqp_batch'), where the rows are generated serially;
+  NOTE: with the 'spawn' start method (Windows, macOS) the calling script must be protected by "if __name__=='__main__':"
+'''
+def genConstraintsRows2D(ddMon,degQ,nP,nQ,vUG,vFree=None,vFixed=None,cFixed=None,epsilon=0.01,out=None,memBlock=None,stage32=None,
+                         nJobs=None):
+    if(memBlock is None):memBlock=consMemBlock
+    if(stage32 is None):stage32=consStage32
+    if(nJobs is None):nJobs=consJobs
+    stage=np.float32 if stage32 else np.float64
+    nPoints=vUG.shape[0];nVec=(vUG.shape[1]-3)//3;nCol=nP+nQ
+    nFree=nCol if(vFree is None) else len(vFree)
+    nBlock=max(1,int(memBlock//((7*np.dtype(stage).itemsize+24*nVec)*nCol)))
+    if(out is None):out=np.empty((nPoints*nVec,nFree))
+    if(vFixed is not None):MUB=np.empty((nPoints*nVec,1))
+    if(nJobs>1 and not mp.current_process().daemon):
+        nTask=max(4*nJobs,-(-nPoints//nBlock))
+        vTask=[(p0,p1) for p0,p1 in zip(np.linspace(0,nPoints,nTask+1,dtype=int)[:-1],np.linspace(0,nPoints,nTask+1,dtype=int)[1:]) if p1>p0]
+        prefix='shyqp{}_{}_'.format(os.getpid(),secrets.token_hex(4))##short: 31 characters at most on macOS
+        vTask=[(p0,p1,prefix+str(k)) for k,(p0,p1) in enumerate(vTask)]
+        vPending=set(task[2] for task in vTask)
+        args=(ddMon,degQ,nP,nQ,np.ascontiguousarray(vUG),vFree,vFixed,cFixed,epsilon,memBlock,stage32)
+        resource_tracker.ensure_running()##shared by the workers: the blocks are released by the main process only
+        try:
+            with mp.Pool(processes=nJobs,initializer=constraintRowsWorkerInit,initargs=args) as pool:
+                for p0,p1,name in pool.imap_unordered(constraintRowsWorker,vTask):
+                    shm=shared_memory.SharedMemory(name=name)
+                    vPending.discard(name)
+                    vBlock=np.ndarray(((p1-p0)*nVec,nFree+(vFixed is not None)),buffer=shm.buf)
+                    out[p0*nVec:p1*nVec]=vBlock[:,0:nFree]
+                    if(vFixed is not None):MUB[p0*nVec:p1*nVec,0]=vBlock[:,nFree]
+                    del vBlock
+                    shm.close();shm.unlink()
+        finally:##the pool is terminated: release the blocks of the tasks completed but not copied
+            for name in vPending:
+                try:
+                    shm=shared_memory.SharedMemory(name=name)
+                except FileNotFoundError:
+                    continue
+                shm.close();shm.unlink()
+        return out if(vFixed is None) else (out,MUB)
+    for p0 in range(0,nPoints,nBlock):
+        p1=min(p0+nBlock,nPoints)
+        vBasis=genConstraintsBasis2D(ddMon,degQ,nP,nQ,vUG[p0:p1,0:3],dtype=stage)
+        GG=genTangentForms2D(vUG[p0:p1])
+        vv=(vBasis[:,0:1,:]-np.einsum('pvk,pkc->pvc',GG,vBasis[:,1:,:])).reshape(((p1-p0)*nVec,nCol))
+        out[p0*nVec:p1*nVec]=vv if(vFree is None) else vv[:,vFree]
+        if(vFixed is not None):
+            MUB[p0*nVec:p1*nVec,0]=1.0-epsilon-np.dot(vv[:,vFixed],cFixed)
+    if(vFixed is None):
+        return out
+    return out,MUB
+
+
+'''
+function:'constraintRowsWorkerInit'
+--Initializer of the worker processes of 'genConstraintsRows2D': keeps the arguments of the generation in 'consWorkerData'
+'''
+def constraintRowsWorkerInit(ddMon,degQ,nP,nQ,vUG,vFree,vFixed,cFixed,epsilon,memBlock,stage32):
+    consWorkerData.update(ddMon=ddMon,degQ=degQ,nP=nP,nQ=nQ,vUG=vUG,vFree=vFree,vFixed=vFixed,cFixed=cFixed,epsilon=epsilon,
+                          memBlock=memBlock,stage32=stage32)
+
+
+'''
+function:'constraintRowsWorker'
+--Generates (in a worker process of 'genConstraintsRows2D') the rows of the points p0:p1 into a new shared memory block
+  named 'name' (task=(p0,p1,name)):
+  (nRows,nFree) constraint rows followed, if 'vFixed' is given, by the column of bounds
+--Returns (p0,p1,name of the shared memory block); the block is released by the main process
+  (or here, if the generation fails)
+'''
+def constraintRowsWorker(task):
+    p0,p1,name=task
+    dd=consWorkerData
+    nVec=(dd['vUG'].shape[1]-3)//3
+    nFree=dd['nP']+dd['nQ'] if(dd['vFree'] is None) else len(dd['vFree'])
+    nB=int(dd['vFixed'] is not None)
+    shm=shared_memory.SharedMemory(name=name,create=True,size=8*(p1-p0)*nVec*(nFree+nB))
+    try:
+        vBlock=np.ndarray(((p1-p0)*nVec,nFree+nB),buffer=shm.buf)
+        res=genConstraintsRows2D(dd['ddMon'],dd['degQ'],dd['nP'],dd['nQ'],dd['vUG'][p0:p1],dd['vFree'],dd['vFixed'],dd['cFixed'],dd['epsilon'],
+                                 out=vBlock[:,0:nFree],memBlock=dd['memBlock'],stage32=dd['stage32'],nJobs=1)
+        if(nB):vBlock[:,nFree]=res[1][:,0]
+        del vBlock,res
+    except BaseException:
+        vBlock=res=None##release the views of the buffer before closing
+        shm.close();shm.unlink()
+        raise
+    shm.close()
+    return p0,p1,name
+
+
+'''
+function:'constraintRowsSOC'
+--Returns the (material independent) rows of the second-order-cone form of the convexity constraints 
+  at the points of 'genConstraintsPoints2DOpt(nEquator)' (nP+nQ columns; nP=None: all the P-columns, nP=0: only the Q-columns):
+----with (t1,t2) the orthonormal basis of the tangent plane at a point (the first two tangent vectors), the linear condition
+    of 'constraintRows' holds for all tangent directions iff the 2x2 matrix A=[(1-epsilon)-vv(ti)*c+ti'*H(c)*tj] is positive semidefinite,
+    that is, iff (A11+A22,A11-A22,2*A12) lies in the 3-dim second order cone 
+----the three rows of a point are (vv(t1)+vv(t2),vv(t1)-vv(t2),-2*t1'*H*t2), so that the cone vector is (2*(1-epsilon),0,0)-rows*c
+--cacheDir: directory of cached arrays (see 'cachedArray'); None = no caching
+'''
+@profiled()
+def constraintRowsSOC(ddMon,degQ,nEquator,cacheDir=None,symmetry='orthotropic',nP=None):
+    if(nP is None):nP=nMonoms(degQ)[1]
+    def fGen():
+        return genConstraintsSOCRows2D(*constraintBasis(ddMon,degQ,nEquator,cacheDir,symmetry,nP))
+    vSOC=cachedArray(cacheDir,'socRows',(degQ,nEquator,symmetry,nP),fGen)
+    profileInfo(nCons=vSOC.shape[0],nCol=vSOC.shape[1],cached=cacheDir is not None)
+    return vSOC
+
+
+'''
+function:'genConstraintsSOCRows2D'
+--Calculates the rows of 'constraintRowsSOC' from the points and tangents 'vUG', the basis 'vBasis' and the tangent forms 'GG'
+  (as returned by 'constraintBasis'); returns a (3*nPoints,nCol)-array
+'''
+def genConstraintsSOCRows2D(vUG,vBasis,GG):
+    t1=vUG[:,3:6];t2=vUG[:,6:9]
+    G12=np.stack((t1[:,0]*t2[:,0],t1[:,1]*t2[:,1],t1[:,2]*t2[:,2],t1[:,0]*t2[:,1]+t1[:,1]*t2[:,0],
+                  t1[:,0]*t2[:,2]+t1[:,2]*t2[:,0],t1[:,1]*t2[:,2]+t1[:,2]*t2[:,1]),axis=1)
+    va=vBasis[:,0,:]-np.einsum('pk,pkc->pc',GG[:,0,:],vBasis[:,1:,:])
+    vd=vBasis[:,0,:]-np.einsum('pk,pkc->pc',GG[:,1,:],vBasis[:,1:,:])
+    vb=np.einsum('pk,pkc->pc',G12,vBasis[:,1:,:])
+    return np.stack((va+vd,va-vd,-2.0*vb),axis=1).reshape((3*GG.shape[0],vBasis.shape[2]))
+
+
 '''
 function:'genConstraints2D'
 --Calculates the constraints based on points (locations) and tangents 
 --Returns: matrix of constraints and vector of bounds 
+--The constraint rows are material independent and can be cached (cacheDir, see 'constraintRows'); only the bounds depend on the material
 '''
-def genConstraints2D(ddMon,degQ,nP,nQ,cP0,cP1,cQ0,cQ1,nEquator,epsilon=0.01):
+def genConstraints2D(ddMon,degQ,nP,nQ,cP0,cP1,cQ0,cQ1,nEquator,epsilon=0.01,cacheDir=None):
     print('generating constraints with nEquator = {} and epsilon = {} ...'.format(nEquator,epsilon))
-    degPm1=degQ-2;degQm1=degQ-1;nCol=nQ+nP
-    vP=ddMon['vP']
-    vDD11P=ddMon['vH11P'];vDD12P=ddMon['vH12P'];vDD13P=ddMon['vH13P']
-    vDD22P=ddMon['vH22P'];vDD23P=ddMon['vH23P'];vDD33P=ddMon['vH33P']
-    vCD11P=ddMon['vCH11P'];vCD12P=ddMon['vCH12P'];vCD13P=ddMon['vCH13P']
-    vCD22P=ddMon['vCH22P'];vCD23P=ddMon['vCH23P'];vCD33P=ddMon['vCH33P']
-    vQ=ddMon['vQ']
-    vDD11Q=ddMon['vH11Q'];vDD12Q=ddMon['vH12Q'];vDD13Q=ddMon['vH13Q']
-    vDD22Q=ddMon['vH22Q'];vDD23Q=ddMon['vH23Q'];vDD33Q=ddMon['vH33Q']
-    vCD11Q=ddMon['vCH11Q'];vCD12Q=ddMon['vCH12Q'];vCD13Q=ddMon['vCH13Q']
-    vCD22Q=ddMon['vCH22Q'];vCD23Q=ddMon['vCH23Q'];vCD33Q=ddMon['vCH33Q']
-    ##vUG=genConstraintsPoints2D()
-    vUG=genConstraintsPoints2DOpt(nEquator)
-    nPoints=vUG.shape[0]
-    nVec=(vUG.shape[1]-3)//3##number of tangent vectors 
-    nCons=nPoints*nVec##number of constraints
-    GG=np.zeros((nPoints,6*nVec))##'6' is specific to 2D
-    vPoints=np.zeros((nPoints,3*nVec))##'3' is specific to 2D
-    jj=3;jG=0
-    for kk in range(nVec):
-        GG[:,jG]=vUG[:,jj]**2;jG+=1
-        GG[:,jG]=vUG[:,jj+1]**2;jG+=1
-        GG[:,jG]=vUG[:,jj+2]**2;jG+=1
-        GG[:,jG]=2*vUG[:,jj]*vUG[:,jj+1];jG+=1
-        GG[:,jG]=2*vUG[:,jj]*vUG[:,jj+2];jG+=1
-        GG[:,jG]=2*vUG[:,jj+1]*vUG[:,jj+2];jG+=1
-        vPoints[:,jj-3:jj]=vUG[:,0:3]
-        jj+=3
-    GG=GG.reshape((nCons,6))    
-    vPoints=vPoints.reshape((nCons,3))
-    vPowers1=np.zeros((nCons,nP))
-    vPowers2=np.zeros((nCons,nP))
-    vPowers3=np.zeros((nCons,nP))
-    vv=np.zeros((nCons,nCol))
-    for k in range(nP):
-        vPowers1[:,k]=vPoints[:,0]**vP[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vP[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vP[k][2]
-    vv[:,0:nP]=degPm1*vPowers1*vPowers2*vPowers3
-    for k in range(nP):
-        vPowers1[:,k]=vPoints[:,0]**vDD11P[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vDD11P[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vDD11P[k][2]
-    vv[:,0:nP]-=vCD11P[:]*vPowers1*vPowers2*vPowers3*GG[:,0].reshape((nCons,1))
-    for k in range(nP):
-        vPowers1[:,k]=vPoints[:,0]**vDD22P[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vDD22P[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vDD22P[k][2]
-    vv[:,0:nP]-=vCD22P[:]*vPowers1*vPowers2*vPowers3*GG[:,1].reshape((nCons,1))
-    for k in range(nP):
-        vPowers1[:,k]=vPoints[:,0]**vDD33P[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vDD33P[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vDD33P[k][2]
-    vv[:,0:nP]-=vCD33P[:]*vPowers1*vPowers2*vPowers3*GG[:,2].reshape((nCons,1))
-    for k in range(nP):
-        vPowers1[:,k]=vPoints[:,0]**vDD12P[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vDD12P[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vDD12P[k][2]
-    vv[:,0:nP]-=vCD12P[:]*vPowers1*vPowers2*vPowers3*GG[:,3].reshape((nCons,1))
-    for k in range(nP):
-        vPowers1[:,k]=vPoints[:,0]**vDD13P[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vDD13P[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vDD13P[k][2]
-    vv[:,0:nP]-=vCD13P[:]*vPowers1*vPowers2*vPowers3*GG[:,4].reshape((nCons,1))
-    for k in range(nP):
-        vPowers1[:,k]=vPoints[:,0]**vDD23P[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vDD23P[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vDD23P[k][2]
-    vv[:,0:nP]-=vCD23P[:]*vPowers1*vPowers2*vPowers3*GG[:,5].reshape((nCons,1))
-    vPowers1=np.zeros((nCons,nQ))
-    vPowers2=np.zeros((nCons,nQ))
-    vPowers3=np.zeros((nCons,nQ))
-    for k in range(nQ):
-        vPowers1[:,k]=vPoints[:,0]**vQ[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vQ[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vQ[k][2]
-    vv[:,nP:]=degQm1*vPowers1*vPowers2*vPowers3
-    for k in range(nQ):
-        vPowers1[:,k]=vPoints[:,0]**vDD11Q[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vDD11Q[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vDD11Q[k][2]
-    vv[:,nP:]-=vCD11Q[:]*vPowers1*vPowers2*vPowers3*GG[:,0].reshape((nCons,1))
-    for k in range(nQ):
-        vPowers1[:,k]=vPoints[:,0]**vDD22Q[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vDD22Q[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vDD22Q[k][2]
-    vv[:,nP:]-=vCD22Q[:]*vPowers1*vPowers2*vPowers3*GG[:,1].reshape((nCons,1))
-    for k in range(nQ):
-        vPowers1[:,k]=vPoints[:,0]**vDD33Q[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vDD33Q[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vDD33Q[k][2]
-    vv[:,nP:]-=vCD33Q[:]*vPowers1*vPowers2*vPowers3*GG[:,2].reshape((nCons,1))
-    for k in range(nQ):
-        vPowers1[:,k]=vPoints[:,0]**vDD12Q[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vDD12Q[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vDD12Q[k][2]
-    vv[:,nP:]-=vCD12Q[:]*vPowers1*vPowers2*vPowers3*GG[:,3].reshape((nCons,1))
-    for k in range(nQ):
-        vPowers1[:,k]=vPoints[:,0]**vDD13Q[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vDD13Q[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vDD13Q[k][2]
-    vv[:,nP:]-=vCD13Q[:]*vPowers1*vPowers2*vPowers3*GG[:,4].reshape((nCons,1))
-    for k in range(nQ):
-        vPowers1[:,k]=vPoints[:,0]**vDD23Q[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vDD23Q[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vDD23Q[k][2]
-    vv[:,nP:]-=vCD23Q[:]*vPowers1*vPowers2*vPowers3*GG[:,5].reshape((nCons,1))
-    MCC=np.zeros((nCons,nCol-4))
-    MUB=np.zeros((nCons,1))
-    MCC[:,0:nP-2]=vv[:,2:nP];MCC[:,nP-2:]=vv[:,nP+2:]
-    MUB[:,0]=1.0-epsilon-(cP0*vv[:,0]+cP1*vv[:,1]+cQ0*vv[:,nP]+cQ1*vv[:,nP+1])
-    return MCC,MUB    
-
-
-def genConstraints2DSymm(ddMon,degQ,nQ,cQ1,nEquator,epsilon=0.01):
+    return constraintMatrix(ddMon,degQ,nP,list(range(2,nP))+list(range(nP+2,nP+nQ)),[0,1,nP,nP+1],np.array([cP0,cP1,cQ0,cQ1]),
+                            nEquator,epsilon,cacheDir)
+
+
+'''
+function:'genConstraints2DSymm'
+--The same as 'genConstraints2D' for the SHY(Q) model (only the Q-columns);
+  by default, only the points of the fundamental domain of the centro-symmetric model are used (see 'symmetryMask')
+'''
+def genConstraints2DSymm(ddMon,degQ,nQ,cQ1,nEquator,epsilon=0.01,cacheDir=None,symmetry='orthotropicCS'):
     print('generating constraints with nEquator = {} and epsilon = {} ...'.format(nEquator,epsilon))
-    degPm1=degQ-2;degQm1=degQ-1;nCol=nQ
-    vQ=ddMon['vQ']
-    vDD11Q=ddMon['vH11Q'];vDD12Q=ddMon['vH12Q'];vDD13Q=ddMon['vH13Q']
-    vDD22Q=ddMon['vH22Q'];vDD23Q=ddMon['vH23Q'];vDD33Q=ddMon['vH33Q']
-    vCD11Q=ddMon['vCH11Q'];vCD12Q=ddMon['vCH12Q'];vCD13Q=ddMon['vCH13Q']
-    vCD22Q=ddMon['vCH22Q'];vCD23Q=ddMon['vCH23Q'];vCD33Q=ddMon['vCH33Q']  
-    vUG=genConstraintsPoints2DOpt(nEquator)    
+    return constraintMatrix(ddMon,degQ,0,list(range(2,nQ)),[1],np.array([cQ1]),nEquator,epsilon,cacheDir,symmetry)
+
+
+'''
+function:'genConstraintsSOC2D'
+--Calculates the second-order-cone constraints (see 'constraintRowsSOC'), 3 rows per point instead of one row per tangent direction
+--nP=0: the symmetric case (only the Q-columns)
+--Returns: matrix of constraints and vector of bounds (see 'reduceConstraintsSOC')
+'''
+def genConstraintsSOC2D(ddMon,degQ,nP,vFree,vFixed,cFixed,nEquator,epsilon=0.01,cacheDir=None,symmetry='orthotropic'):
+    print('generating SOC constraints with nEquator = {} and epsilon = {} ...'.format(nEquator,epsilon))
+    vv=constraintRowsSOC(ddMon,degQ,nEquator,cacheDir,symmetry,nP)
+    return reduceConstraintsSOC(vv,vFree,vFixed,cFixed,epsilon)
+
+
+'''
+function:'genConstraintsBasis2D'
+--Calculates, at each location of 'vPoints' (on the unit sphere), the degree-weighted monomials
+  and the (coefficient weighted) second order derivatives of all monomials
+--Returns a (nPoints,7,nCol)-array: slot 0 holds the weighted monomials, slots 1-6 hold the
+  derivatives 11,22,33,12,13,23 (the ordering of the columns of 'GG' in 'genTangentForms2D')
+--The constraint row of a tangent vector g at a point is then:
+  vBasis[:,0,:]-sum_k GG_k*vBasis[:,k+1,:] with GG=(g1^2,g2^2,g3^2,2g1g2,2g1g3,2g2g3)
+--Note: with nP=0 only the Q-monomials are used (the symmetric case)
+--dtype: type of the powers and of the basis (see 'genConstraintsRows2D')
+'''
+def genConstraintsBasis2D(ddMon,degQ,nP,nQ,vPoints,dtype=np.float64):
+    degPm1=degQ-2;degQm1=degQ-1;nCol=nP+nQ
+    nPoints=vPoints.shape[0]
+    vBasis=np.zeros((nPoints,7,nCol),dtype=dtype)
+    vPow=monomialPowers(vPoints,degQ,dtype)
+    vHess=['11','22','33','12','13','23']
+    if(nP):
+        vBasis[:,0,0:nP]=degPm1*monomialEval(vPow,ddMon['vP'])
+        for hh in range(6):
+            vBasis[:,hh+1,0:nP]=monomialEval(vPow,ddMon['vH'+vHess[hh]+'P'],ddMon['vCH'+vHess[hh]+'P'])
+    vBasis[:,0,nP:]=degQm1*monomialEval(vPow,ddMon['vQ'])
+    for hh in range(6):
+        vBasis[:,hh+1,nP:]=monomialEval(vPow,ddMon['vH'+vHess[hh]+'Q'],ddMon['vCH'+vHess[hh]+'Q'])
+    return vBasis
+
+
+'''
+function:'genTangentForms2D'
+--Calculates the quadratic forms (g1^2,g2^2,g3^2,2g1g2,2g1g3,2g2g3) of all tangent vectors
+  returned by 'genConstraintsPoints2DOpt'
+--Returns a (nPoints,nVec,6)-array
+'''
+def genTangentForms2D(vUG):
     nPoints=vUG.shape[0]
-    nVec=(vUG.shape[1]-3)//3##number of tangent vectors 
-    nCons=nPoints*nVec##number of constraints
-    GG=np.zeros((nPoints,6*nVec))##'6' is specific to 2D
-    vPoints=np.zeros((nPoints,3*nVec))##'3' is specific to 2D
-    jj=3;jG=0
-    for kk in range(nVec):
-        GG[:,jG]=vUG[:,jj]**2;jG+=1
-        GG[:,jG]=vUG[:,jj+1]**2;jG+=1
-        GG[:,jG]=vUG[:,jj+2]**2;jG+=1
-        GG[:,jG]=2*vUG[:,jj]*vUG[:,jj+1];jG+=1
-        GG[:,jG]=2*vUG[:,jj]*vUG[:,jj+2];jG+=1
-        GG[:,jG]=2*vUG[:,jj+1]*vUG[:,jj+2];jG+=1
-        vPoints[:,jj-3:jj]=vUG[:,0:3]
-        jj+=3
-    GG=GG.reshape((nCons,6))    
-    vPoints=vPoints.reshape((nCons,3))
-    vPowers1=np.zeros((nCons,nQ))
-    vPowers2=np.zeros((nCons,nQ))
-    vPowers3=np.zeros((nCons,nQ))
-    vv=np.zeros((nCons,nCol))
-    nP=0
-    for k in range(nQ):
-        vPowers1[:,k]=vPoints[:,0]**vQ[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vQ[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vQ[k][2]
-    vv[:,nP:]=degQm1*vPowers1*vPowers2*vPowers3
-    for k in range(nQ):
-        vPowers1[:,k]=vPoints[:,0]**vDD11Q[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vDD11Q[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vDD11Q[k][2]
-    vv[:,nP:]-=vCD11Q[:]*vPowers1*vPowers2*vPowers3*GG[:,0].reshape((nCons,1))
-    for k in range(nQ):
-        vPowers1[:,k]=vPoints[:,0]**vDD22Q[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vDD22Q[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vDD22Q[k][2]
-    vv[:,nP:]-=vCD22Q[:]*vPowers1*vPowers2*vPowers3*GG[:,1].reshape((nCons,1))
-    for k in range(nQ):
-        vPowers1[:,k]=vPoints[:,0]**vDD33Q[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vDD33Q[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vDD33Q[k][2]
-    vv[:,nP:]-=vCD33Q[:]*vPowers1*vPowers2*vPowers3*GG[:,2].reshape((nCons,1))
-    for k in range(nQ):
-        vPowers1[:,k]=vPoints[:,0]**vDD12Q[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vDD12Q[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vDD12Q[k][2]
-    vv[:,nP:]-=vCD12Q[:]*vPowers1*vPowers2*vPowers3*GG[:,3].reshape((nCons,1))
-    for k in range(nQ):
-        vPowers1[:,k]=vPoints[:,0]**vDD13Q[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vDD13Q[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vDD13Q[k][2]
-    vv[:,nP:]-=vCD13Q[:]*vPowers1*vPowers2*vPowers3*GG[:,4].reshape((nCons,1))
-    for k in range(nQ):
-        vPowers1[:,k]=vPoints[:,0]**vDD23Q[k][0]
-        vPowers2[:,k]=vPoints[:,1]**vDD23Q[k][1]
-        vPowers3[:,k]=vPoints[:,2]**vDD23Q[k][2]
-    vv[:,nP:]-=vCD23Q[:]*vPowers1*vPowers2*vPowers3*GG[:,5].reshape((nCons,1))
-    MCC=np.zeros((nCons,nCol-2))
-    MUB=np.zeros((nCons,1))
-    MCC[:,nP:]=vv[:,nP+2:]
-    MUB[:,0]=1.0-epsilon-(cQ1*vv[:,nP+1])
-    return MCC,MUB        
+    nVec=(vUG.shape[1]-3)//3
+    vT=vUG[:,3:].reshape((nPoints,nVec,3))
+    GG=np.zeros((nPoints,nVec,6))
+    GG[:,:,0]=vT[:,:,0]**2;GG[:,:,1]=vT[:,:,1]**2;GG[:,:,2]=vT[:,:,2]**2
+    GG[:,:,3]=2*vT[:,:,0]*vT[:,:,1];GG[:,:,4]=2*vT[:,:,0]*vT[:,:,2];GG[:,:,5]=2*vT[:,:,1]*vT[:,:,2]
+    return GG
 
 
 '''
-function:'dataFitSHYqp'
---Calculates the SHY(Q)(P) coefficients by minimizing the weighted distance to the proto-model(Bezier5YS)
---Input: 
-----data=the overall data structure of the material
-----
+function:'reduceConstraints'
+--Splits the rows 'vv' of convexity constraints into the matrix of constraints (for the free coefficients)
+  and the vector of bounds (the fixed coefficients 'cFixed' of the columns 'vFixed' are moved to the right side)
+'''
+def reduceConstraints(vv,vFree,vFixed,cFixed,epsilon):
+    MCC=vv[:,vFree]
+    MUB=(1.0-epsilon-np.dot(vv[:,vFixed],cFixed)).reshape((vv.shape[0],1))
+    return MCC,MUB
+
+
+'''
+function:'reduceConstraintsSOC'
+--The same as 'reduceConstraints' for the rows of 'constraintRowsSOC': 
+  MUB-MCC*x must lie in the product of 3-dim second order cones (one cone for each three consecutive rows)
+'''
+def reduceConstraintsSOC(vv,vFree,vFixed,cFixed,epsilon):
+    MCC=vv[:,vFree]
+    MUB=np.zeros((vv.shape[0],1))
+    MUB[0::3,0]=2.0*(1.0-epsilon)
+    MUB[:,0]-=np.dot(vv[:,vFixed],cFixed)
+    return MCC,MUB
+
+
+'''
+function:'gramUpdate'
+--Accumulates (in place) the weighted normal equations of a block of least-squares rows: 
+----MAA+=AA'*W*AA, MBB+=AA'*W*BB, with W=diag(vW)
+--The rows are scaled by sqrt(vW) (no nRow x nRow diagonal matrix is formed)
+'''
+def gramUpdate(MAA,MBB,AA,BB,vW):
+    sw=np.sqrt(vW).reshape((AA.shape[0],1))
+    AW=sw*AA
+    MAA+=np.dot(AW.T,AW)
+    MBB+=np.dot(AW.T,sw*BB)
+    return
+
+
+'''
+function:'weightedGram'
+--Calculates the weighted normal equations MAA=AA'*W*AA, MBB=AA'*W*BB (W=diag(vW))
+  by accumulating blocks of 'chunkSize' rows (the memory overhead is independent of the number of rows)
+--vCol: only these columns of AA are used (selected block by block, the reduced matrix is never formed); None = all columns
+'''
+def weightedGram(AA,BB,vW,chunkSize=2048,vCol=None):
+    nRow=AA.shape[0]
+    nCol=AA.shape[1] if(vCol is None) else len(vCol)
+    MAA=np.zeros((nCol,nCol));MBB=np.zeros((nCol,BB.shape[1]))
+    for k in range(0,nRow,chunkSize):
+        AAk=AA[k:k+chunkSize] if(vCol is None) else AA[k:k+chunkSize][:,vCol]
+        gramUpdate(MAA,MBB,AAk,BB[k:k+chunkSize],vW[k:k+chunkSize])
+    return MAA,MBB
+
+
+'''
+function:'solveQP'
+--Solves the quadratic problem: min (0.5*x'*MAA*x-MBB'*x) subject to MCC*x<=MUB
+--qpSolver: 'cvxopt' or 'quadprog';
+  'cvxoptSOC': MCC,MUB are second-order-cone constraints (see 'reduceConstraintsSOC'), solved with 'cvxopt.solvers.coneqp'
+--warmStart: dictionary of the primal/dual solution ('x','z') of a previous (similar) problem, updated with the new solution;
+  'cvxopt' is started from it (slacks and multipliers are kept at least 'warmFloor' away from the boundary of the cone);
+  'quadprog' (dual active-set method) always starts cold; None = no warm start
+--Raises 'SolverError' if the solver is unknown or fails
+'''
+@profiled()
+def solveQP(MAA,MBB,MCC,MUB,qpSolver,warmStart=None,warmFloor=0.01):
+    if(qpSolver=='quadprog'):##use quadprog
+        qpg=importSolver('quadprog')
+        meq=0
+        try:
+            sol=qpg.solve_qp(MAA,MBB.reshape((MBB.shape[0],)),-MCC.T,-MUB.reshape((MUB.shape[0],)),meq)
+        except ValueError as err:
+            raise SolverError('quadprog: {}'.format(err))
+        vsq,vz=sol[0],sol[4]
+        vStats={'iterations':int(sol[3][0]),'status':'optimal'}
+    elif(qpSolver in ('cvxopt','cvxoptSOC')):##use cvxopt
+        soc=(qpSolver=='cvxoptSOC')
+        cvxopt=importSolver('cvxopt')
+        args = [cvxopt.matrix(MAA), cvxopt.matrix(-MBB.reshape((MBB.shape[0],))),cvxopt.matrix(MCC),cvxopt.matrix(MUB.reshape((MUB.shape[0],)))]
+        initvals=None
+        if(warmStart and 'x' in warmStart and warmStart['z'].shape[0]==MCC.shape[0]):
+            vs=MUB.reshape((MUB.shape[0],))-np.dot(MCC,warmStart['x'])
+            initvals={'x':cvxopt.matrix(warmStart['x']),'s':cvxopt.matrix(coneInterior(vs,warmFloor,soc)),
+                      'z':cvxopt.matrix(coneInterior(warmStart['z'],warmFloor,soc))}
+        if(soc):
+            dims={'l':0,'q':[3]*(MCC.shape[0]//3),'s':[]}
+            sol=cvxopt.solvers.coneqp(args[0],args[1],args[2],args[3],dims,initvals=initvals)
+        else:
+            sol=cvxopt.solvers.qp(*args,initvals=initvals)
+        if(sol['x'] is None):
+            raise SolverError('{}: no solution found (status: {})'.format(qpSolver,sol['status']))
+        vsq=np.array(sol['x']).reshape(len(sol['x']))
+        vz=np.array(sol['z']).reshape(len(sol['z']))
+        vStats={'iterations':sol['iterations'],'gap':sol['gap'],'status':sol['status'],'warmStart':initvals is not None}
+    else:##unknown solver
+        raise SolverError('qpSolver = {}: unknown solver'.format(qpSolver))
+    if(warmStart is not None):
+        warmStart['x']=vsq;warmStart['z']=vz
+    if(profiler is not None):
+        profileInfo(solver=qpSolver,nCons=MCC.shape[0],nCol=MCC.shape[1],nActive=activeConstraints(MCC,MUB,vsq,qpSolver=='cvxoptSOC'),**vStats)
+    return vsq
+
+
+'''
+function:'activeConstraints'
+--Returns the number of constraints MCC*x<=MUB that are active (slack below 'tol') at the solution 'vsq' of 'solveQP'
+  (the bounds are about 1; the interior-point solutions of 'cvxopt' keep slacks of about 1e-6 at the active constraints)
+--soc=True: the number of active cones (see 'reduceConstraintsSOC')
+'''
+def activeConstraints(MCC,MUB,vsq,soc=False,tol=1.0e-4):
+    vs=MUB.reshape((MUB.shape[0],))-np.dot(MCC,vsq)
+    if(soc):
+        vs=vs.reshape((vs.shape[0]//3,3))
+        vs=vs[:,0]-np.sqrt(vs[:,1]**2+vs[:,2]**2)
+    return int(np.count_nonzero(vs<=tol))
+
+
+'''
+function:'coneInterior'
+--Moves the vector 'vs' into the interior of the cone of the constraints (at least 'floor' away from its boundary):
+  the nonnegative orthant (soc=False) or the product of 3-dim second order cones (soc=True)
+'''
+def coneInterior(vs,floor,soc=False):
+    if(not soc):
+        return np.maximum(vs,floor)
+    vs=vs.reshape((vs.shape[0]//3,3)).copy()
+    vs[:,0]=np.maximum(vs[:,0],np.sqrt(vs[:,1]**2+vs[:,2]**2)+floor)
+    return vs.reshape((3*vs.shape[0],))
+
+
+'''
+function:'solveQPCuttingPlane'
+--Solves the SHYqp quadratic problem by iteratively generating the convexity constraints (cutting-planes):
+----the problem is first solved with a coarse subset of the constraints of the dense grid 'genConstraintsPoints2DOpt(nEquator)';
+----the convexity condition of the current solution is then evaluated at all points and tangents of the dense grid
+    and only the violated (or nearly active) constraints are added;
+----iterations stop when no constraint of the dense grid is violated (the solution is then that of the full problem);
+    raises 'SolverError' if violated constraints remain after 'maxIter' iterations
+--vFree,vFixed,cFixed: the columns of the free and fixed coefficients (and the values of the latter)
+--nCoarse: the initial set of constraints is that of the dense points nearest to the coarse grid 'genConstraintsPoints2DOpt(nCoarse)'
+  (every 8th tangent direction; all directions with qpSolver='cvxoptSOC')
+--tolActive: constraints with slack below this value are candidates (at most one tangent per location is added)
+--tolViolation: the accepted violation of a constraint
+--cacheDir: directory of cached constraint arrays (see 'constraintBasis'); None = no caching
+--warmStart: dictionary of the final state of a previous (similar) problem ('vActive': the generated constraints,
+  'vZ': their multipliers, 'x': the solution), updated with the new state; the iterations start from the
+  constraints generated before and each solve is warm-started (see 'solveQP'); None = cold start
+--qpSolver='cvxoptSOC': the constraints are the cones of 'constraintRowsSOC' (one per location, all tangents at once);
+  the slack of a location is then the minimum slack over all its tangent directions
+--symmetry: the dense grid is restricted to the fundamental domain of the symmetry group (see 'symmetryMask')
+--vUG: points and tangents (rows of 'genConstraintsPoints2DOpt') used instead of the dense grid of 'nEquator' (not cached);
+  a warm start from a previous set of points is used if the new points are appended to it (see 'solveQPAdaptive')
+--basis: the arrays (vUG,vBasis,GG) of 'constraintBasis(nEquator)' already in memory (e.g., kept by 'SHYqpSession'; the last nP+nQ columns
+  of vBasis are used); None = 'constraintBasis'
+'''
+@profiled()
+def solveQPCuttingPlane(MAA,MBB,ddMon,degQ,nP,nQ,vFree,vFixed,cFixed,qpSolver,nEquator,epsilon,
+                        nCoarse=40,tolActive=0.005,tolViolation=1.0e-7,maxIter=50,cacheDir=None,warmStart=None,symmetry='orthotropic',
+                        vUG=None,basis=None):
+    soc=(qpSolver=='cvxoptSOC')
+    if(vUG is None):
+        print('generating constraints (cutting-plane) with nEquator = {} and epsilon = {} ...'.format(nEquator,epsilon))
+        if(basis is None):
+            vUG,vBasis,GG=constraintBasis(ddMon,degQ,nEquator,cacheDir,symmetry,nP)
+            if(soc):vSOC=constraintRowsSOC(ddMon,degQ,nEquator,cacheDir,symmetry,nP)
+        else:
+            vUG,vBasis,GG=basis
+            vBasis=vBasis[:,:,vBasis.shape[2]-(nP+nQ):]##nP=0: only the Q-columns
+            if(soc):vSOC=genConstraintsSOCRows2D(vUG,vBasis,GG)
+    else:
+        print('generating constraints (cutting-plane) at {} points with epsilon = {} ...'.format(vUG.shape[0],epsilon))
+        vBasis=genConstraintsBasis2D(ddMon,degQ,nP,nQ,vUG[:,0:3]);GG=genTangentForms2D(vUG)
+        if(soc):vSOC=genConstraintsSOCRows2D(vUG,vBasis,GG)
+    nPoints,nVec=GG.shape[0],GG.shape[1]
+    ##initial constraints: the points of the dense grid nearest to those of the coarse grid 'nCoarse'
+    vCoarse=genConstraintsPoints2DOptPoints(max(4,nCoarse),symmetry)
+    idxCoarse=np.unique(np.argmax(np.dot(vUG[:,0:3],vCoarse.T),axis=0))
+    if(soc):
+        vSOC=vSOC.reshape((nPoints,3,vSOC.shape[1]))
+        vActive=np.zeros((nPoints,1),dtype=bool)
+        vActive[idxCoarse,:]=True
+        vZ=np.zeros((nPoints,3))
+    else:
+        vActive=np.zeros((nPoints,nVec),dtype=bool)
+        vActive[idxCoarse,::8]=True
+        vZ=np.zeros((nPoints,nVec))
+    wsQP=None
+    if(warmStart is not None):
+        wsQP={}
+        if('vActive' in warmStart and warmStart['vActive'].shape[1]==vActive.shape[1] and warmStart['vActive'].shape[0]<=nPoints):
+            nOld=warmStart['vActive'].shape[0]
+            vActive[0:nOld]|=warmStart['vActive'];vZ[0:nOld]=warmStart['vZ']
+            wsQP['x']=warmStart['x']
+    vCoeff=np.zeros(nP+nQ)
+    vCoeff[vFixed]=cFixed
+    nIter=0
+    while(nIter<maxIter):
+        idxP,idxV=np.nonzero(vActive)
+        if(soc):
+            MCC,MUB=reduceConstraintsSOC(vSOC[idxP].reshape((3*idxP.shape[0],vSOC.shape[2])),vFree,vFixed,cFixed,epsilon)
+        else:
+            vv=vBasis[idxP,0,:]-np.einsum('nk,nkc->nc',GG[idxP,idxV,:],vBasis[idxP,1:,:])
+            MCC,MUB=reduceConstraints(vv,vFree,vFixed,cFixed,epsilon)
+        print('--cutting-plane iteration {}: {} constraints'.format(nIter,MCC.shape[0]))
+        if(wsQP is not None and 'x' in wsQP):wsQP['z']=vZ[idxP].reshape((MCC.shape[0],)) if soc else vZ[idxP,idxV]
+        vsq=solveQP(MAA,MBB,MCC,MUB,qpSolver,wsQP)
+        if(wsQP is not None):
+            if(soc):vZ[idxP]=wsQP['z'].reshape((idxP.shape[0],3))
+            else:vZ[idxP,idxV]=wsQP['z']
+        vCoeff[vFree]=vsq
+        if(soc):
+            vs=-np.dot(vSOC,vCoeff)
+            vs[:,0]+=2.0*(1.0-epsilon)
+            vSlack=0.5*(vs[:,0:1]-np.sqrt(vs[:,1:2]**2+vs[:,2:3]**2))##minimum eigenvalue of the 2x2 form
+        else:
+            vb=np.dot(vBasis,vCoeff)
+            vSlack=(1.0-epsilon)-(vb[:,0:1]-np.einsum('pvk,pk->pv',GG,vb[:,1:]))
+        vSlack[vActive]=np.inf
+        if(np.min(vSlack)>=-tolViolation):break
+        kk=np.argmin(vSlack,axis=1)
+        idxP=np.nonzero(vSlack[np.arange(nPoints),kk]<tolActive)[0]
+        vActive[idxP,kk[idxP]]=True
+        nIter+=1
+    if(nIter==maxIter):
+        raise SolverError("solveQPCuttingPlane: convexity constraints still violated after maxIter = {} iterations".format(maxIter))
+    profileInfo(nPoints=nPoints,nIter=nIter+1,nCons=MCC.shape[0])
+    if(warmStart is not None):
+        warmStart['vActive']=vActive;warmStart['vZ']=vZ;warmStart['x']=vsq
+    return vsq
+
+
+'''
+function:'solveQPAdaptive'
+--Solves the SHYqp quadratic problem on an adaptively refined set of constraint points:
+----the problem is first solved (see 'solveQPCuttingPlane') at the nodes of a coarse grid of spherical cells:
+    nEquator/4 bands of latitude, each divided in about nEquator*sin(theta) cells of longitude 
+    (the number of cells is doubled from a band to the next, so that the bands share their nodes);
+----at the current solution, the margin of a cell is the minimum, over its nodes, of the smallest eigenvalue of the 2x2 tangent-plane form 
+    of the convexity condition (the slack of all tangent directions, see 'constraintRowsSOC');
+----the cells with margin below 'tolRefine' are divided in four (new nodes at the mid-edges and at the center) and the problem is solved again;
+    each level halves the spacing of the grid where convexity is tight (refineLevels=3 with nEquator=80: the spacing of nEquator=640 there)
+--The solves are warm-started from the previous level (the new points are appended)
+--symmetry: the cells cover the fundamental domain of the symmetry group (see 'symmetryMask')
+--Returns the solution and the set of points used (rows of 'genConstraintsPointsAngles')
+'''
+@profiled()
+def solveQPAdaptive(MAA,MBB,ddMon,degQ,nP,nQ,vFree,vFixed,cFixed,qpSolver,nEquator,epsilon,
+                    refineLevels=3,tolRefine=0.02,symmetry='orthotropic'):
+    symmetryMask(np.zeros((1,3)),symmetry)##check the descriptor
+    phiMax=2.0*np.pi if symmetry=='orthotropic' else np.pi
+    N1=max(2,nEquator//4)
+    vT=np.linspace(0,np.pi/2,N1+1)
+    vCell=[]
+    nF=max(2,int(nEquator*np.sin(vT[1])*phiMax/(2.0*np.pi)))
+    for k in range(N1):
+        if(2*nF<=1.4*nEquator*np.sin(vT[k+1])*phiMax/(2.0*np.pi)):nF*=2
+        vF=np.linspace(0,phiMax,nF+1)
+        vCell.append(np.stack((np.full(nF,vT[k]),np.full(nF,vT[k+1]),vF[0:-1],vF[1:]),axis=1))
+    vCell=np.concatenate(vCell)##cells (theta0,theta1,phi0,phi1)
+    vNode={'u':np.zeros((0,3)),'theta':np.zeros(0),'phi':np.zeros(0)}
+    def nodeIdx(vTh,vPh):##indices of the nodes (theta,phi), new nodes are appended (in the order of first occurrence)
+        vu=np.round(np.stack((np.sin(vTh)*np.cos(vPh),np.sin(vTh)*np.sin(vPh),np.cos(vTh)),axis=1),10)+0.0
+        nOld=vNode['u'].shape[0]
+        vFirst,vInv=np.unique(np.concatenate((vNode['u'],vu)),axis=0,return_index=True,return_inverse=True)[1:]
+        vOrder=np.argsort(vFirst)
+        vNewU=vOrder[vFirst[vOrder]>=nOld]##the new unique nodes, in the order of first occurrence
+        vMap=vFirst.copy()##the old nodes are distinct: their index is that of their first occurrence
+        vMap[vNewU]=nOld+np.arange(vNewU.shape[0])
+        vNew=vFirst[vNewU]-nOld
+        vNode['u']=np.concatenate((vNode['u'],vu[vNew]))
+        vNode['theta']=np.concatenate((vNode['theta'],vTh[vNew]));vNode['phi']=np.concatenate((vNode['phi'],vPh[vNew]))
+        return vMap[vInv.reshape(-1)[nOld:]]
+    vCorner=np.stack([nodeIdx(vCell[:,jT],vCell[:,jF]) for jT,jF in ((0,2),(0,3),(1,2),(1,3))],axis=1)
+    vCoeff=np.zeros(nP+nQ)
+    vCoeff[vFixed]=cFixed
+    warmStart={}
+    vUG=np.zeros((0,genConstraintsPointsAngles(np.zeros(1),np.zeros(1)).shape[1]));vSOC=np.zeros((0,3,nP+nQ))
+    for level in range(refineLevels+1):
+        nOld=vUG.shape[0]
+        vUGnew=genConstraintsPointsAngles(vNode['theta'][nOld:],vNode['phi'][nOld:])
+        vBasis=genConstraintsBasis2D(ddMon,degQ,nP,nQ,vUGnew[:,0:3])
+        vSOCnew=genConstraintsSOCRows2D(vUGnew,vBasis,genTangentForms2D(vUGnew))
+        vUG=np.concatenate((vUG,vUGnew));vSOC=np.concatenate((vSOC,vSOCnew.reshape((vUGnew.shape[0],3,nP+nQ))))
+        print('--adaptive refinement level {}: {} cells, {} points'.format(level,vCell.shape[0],vUG.shape[0]))
+        vsq=solveQPCuttingPlane(MAA,MBB,ddMon,degQ,nP,nQ,vFree,vFixed,cFixed,qpSolver,nEquator,epsilon,
+                                nCoarse=max(1,nEquator//4),warmStart=warmStart,symmetry=symmetry,vUG=vUG)
+        if(level==refineLevels):break
+        vCoeff[vFree]=vsq
+        vs=-np.dot(vSOC,vCoeff)
+        vs[:,0]+=2.0*(1.0-epsilon)
+        vMargin=0.5*(vs[:,0]-np.sqrt(vs[:,1]**2+vs[:,2]**2))
+        vRefine=np.nonzero(np.min(vMargin[vCorner],axis=1)<tolRefine)[0]
+        if(vRefine.shape[0]==0):break
+        T0,T1,F0,F1=[vCell[vRefine,j] for j in range(4)]
+        TM=0.5*(T0+T1);FM=0.5*(F0+F1)
+        vChild=np.concatenate([np.stack(cc,axis=1) for cc in ((T0,TM,F0,FM),(T0,TM,FM,F1),(TM,T1,F0,FM),(TM,T1,FM,F1))])
+        vKeep=np.ones(vCell.shape[0],dtype=bool);vKeep[vRefine]=False
+        vCell=np.concatenate((vCell[vKeep],vChild))
+        vCorner=np.concatenate((vCorner[vKeep],np.stack([nodeIdx(vChild[:,jT],vChild[:,jF]) for jT,jF in ((0,2),(0,3),(1,2),(1,3))],axis=1)))
+    profileInfo(nLevels=level+1,nCells=vCell.shape[0],nPoints=vUG.shape[0])
+    return vsq,vUG
+
+
+'''
+function:'uaxFitSamples'
+--Samples the directional data curves (Bezier segments of 'uaxData') used by the fits:
+----nSeg points on each segment of the yield stress curve and the r-values at the same directions
+--TC='T' (tension) or 'C' (compression)
+--Returns the directions (in radians), the yield stresses and the r-values (the first direction, theta=0, is excluded)
+'''
+def uaxFitSamples(data,uaxData,TC,nSeg):
+    nSamples=(len(data['s'+TC])-1)*(nSeg-1)
+    vTT=np.linspace(0.0,1.0,nSeg)
+    vTheta=np.zeros(nSamples);sData=np.zeros(nSamples);rData=np.zeros(nSamples)
+    lbdS=data['shapeUAX']*uaxData['lambdaS'+TC+'max']
+    lbdR=data['shapeUAX']*uaxData['lambdaR'+TC+'max']
+    pointsS=uaxData['pointsS'+TC];tanS=uaxData['tanS'+TC]
+    pointsR=uaxData['pointsR'+TC];tanR=uaxData['tanR'+TC]
+    hh=0
+    for k in range(pointsS.shape[1]-1):
+        vData=curveSegF(pointsS[:,k:k+1],tanS[:,k:k+1],pointsS[:,k+1:k+2],tanS[:,k+1:k+2],lbdS,vTT)
+        vTheta[hh:hh+nSeg-1]=vData[0,1:]
+        sData[hh:hh+nSeg-1]=vData[1,1:]
+        vTTr=curveSegTheta(vData[0,:],pointsR[0,k],tanR[0,k],pointsR[0,k+1],tanR[0,k+1],lbdR)
+        vData=curveSegF(pointsR[:,k:k+1],tanR[:,k:k+1],pointsR[:,k+1:k+2],tanR[:,k+1:k+2],lbdR,vTTr)
+        rData[hh:hh+nSeg-1]=vData[1,1:]
+        hh+=nSeg-1
+    return (np.pi/180.0)*vTheta[1:],sData[1:],rData[1:]
+
+
+'''
+function:'fitRowsValue'
+--Calculates the monomials [P,Q] at the points 'vu' (on the unit sphere), in a single pass over all points
+--nP=0: only the Q-monomials are calculated (symmetric case)
+--Returns a (nPoints,nP+nQ)-array
+'''
+def fitRowsValue(ddMon,degQ,nP,vu):
+    vPow=monomialPowers(vu,degQ)
+    vv=monomialEval(vPow,ddMon['vQ'])
+    if(nP):
+        vv=np.hstack((monomialEval(vPow,ddMon['vP']),vv))
+    return vv
+
+
+'''
+function:'fitRowsSlope'
+--Calculates the rows of the r-value conditions at the points 'vu' (vv: the monomial values calculated by 'fitRowsValue'):
+----cc*deg*vv+vA*D1+vB*D2+vC*D3 (D1,D2,D3: the partial derivatives of the monomials, deg: their degree of homogeneity)
+--cc,vA,vB,vC: scalars or vectors (one value for each point)
+'''
+def fitRowsSlope(ddMon,degQ,nP,vu,vv,cc,vA,vB,vC):
+    nPoints=vu.shape[0]
+    cc,vA,vB,vC=[np.broadcast_to(x,(nPoints,)).reshape((nPoints,1)) for x in (cc,vA,vB,vC)]
+    vPow=monomialPowers(vu,degQ)
+    vs=np.zeros(vv.shape)
+    for XX,deg,jS,jE in (('P',degQ-2,0,nP),('Q',degQ-1,nP,vv.shape[1])):
+        if(jS==jE):continue
+        vs[:,jS:jE]=cc*deg*vv[:,jS:jE]+vA*monomialEval(vPow,ddMon['vD1'+XX],ddMon['vC1'+XX])+\
+                    vB*monomialEval(vPow,ddMon['vD2'+XX],ddMon['vC2'+XX])+vC*monomialEval(vPow,ddMon['vD3'+XX],ddMon['vC3'+XX])
+    return vs
+
+
+'''
+function:'fitRowsUax'
+--Calculates the rows of the directional data (yield stresses 'vS' and r-values 'vR' along the directions 'vTheta', in radians)
+--sign=1.0 for tension data, sign=-1.0 for compression data
+--Returns the rows and targets of the yield stress conditions and the rows and targets of the r-value conditions
 '''
-def dataFitSHYqp(data,uaxData,lbd,qpSolver='cvxopt',nEquator=200,epsilon=0.01,nSections=19):
-    degQ=data['DEG'];degQm1=degQ-1;degQm2=degQ-2;degPm1=degQm2;degPm2=degPm1-1
+def fitRowsUax(ddMon,degQ,nP,vTheta,vS,vR,sign=1.0):
+    sq3=np.sqrt(3.0)
+    cTheta=np.cos(vTheta);sTheta=np.sin(vTheta)
+    vu=sign*np.stack((cTheta**2-0.5*sTheta**2,0.5*sq3*sTheta**2,sq3*cTheta*sTheta),axis=1)
+    vvS=fitRowsValue(ddMon,degQ,nP,vu)
+    alpha=vR+sTheta**2
+    beta=vR+cTheta**2
+    omega=cTheta*sTheta
+    b2a=alpha-0.5*beta
+    cc=-b2a*vu[:,0]-0.5*sq3*beta*vu[:,1]+omega*sq3*vu[:,2]
+    vvR=fitRowsSlope(ddMon,degQ,nP,vu,vvS,cc,b2a,0.5*sq3*beta,-sq3*omega)
+    return vvS,1.0/vS-1.0,vvR,cc
+
+
+'''
+function:'fitRowsBax'
+--Calculates the rows of the balanced-biaxial data (yield stress 'sb' and r-value 'rb')
+--sign=1.0 for tension data, sign=-1.0 for compression data
+--Returns the rows and targets of the yield stress condition and the rows and targets of the r-value condition
+'''
+def fitRowsBax(ddMon,degQ,nP,sb,rb,sign=1.0):
+    sq3=np.sqrt(3.0)
+    vu=sign*np.array([[0.5,0.5*sq3,0.0]])
+    vvS=fitRowsValue(ddMon,degQ,nP,vu)
+    b2a=rb+0.5
+    cc=0.5*sign*(rb-1.0)
+    vvR=fitRowsSlope(ddMon,degQ,nP,vu,vvS,cc,-b2a,0.5*sq3,0.0)
+    return vvS,np.array([1.0/sb-1.0]),vvR,np.array([cc])
+
+
+'''
+function:'fitRowsPoints'
+--Calculates the rows of the yield surface points 'vPoints' (array of (sxx,syy,sxy) stress states)
+--Returns the rows and the targets 
+'''
+def fitRowsPoints(ddMon,degQ,nP,vPoints):
+    sq32=np.sqrt(1.5);sq6=np.sqrt(6.0);sq2=np.sqrt(2.0)
+    vu=np.stack(((2*vPoints[:,0]-vPoints[:,1])/sq6,vPoints[:,1]/sq2,vPoints[:,2]*sq2),axis=1)
+    modS=np.sqrt(vu[:,0]**2+vu[:,1]**2+vu[:,2]**2)
+    vu/=modS.reshape((vu.shape[0],1))
+    return fitRowsValue(ddMon,degQ,nP,vu),1.0/(sq32*modS)-1.0
+
+
+'''
+function:'fitGram'
+--Accumulates the weighted normal equations of the list of row blocks 'vBlocks' (tuples (rows,targets,weight))
+--The fixed coefficients 'cFixed' (columns 'vFixed') are moved to the right side; only the columns 'vFree' are kept
+'''
+def fitGram(vBlocks,vFree,vFixed,cFixed):
+    nFree=len(vFree)
+    MAA=np.zeros((nFree,nFree));MBB=np.zeros((nFree,1))
+    for vv,vb,ww in vBlocks:
+        nRow=vv.shape[0]
+        if(nRow==0):continue
+        BB=(vb-np.dot(vv[:,vFixed],cFixed)).reshape((nRow,1))
+        MAAk,MBBk=weightedGram(vv,BB,np.full(nRow,ww),vCol=vFree)
+        MAA+=MAAk;MBB+=MBBk
+    return MAA,MBB
+
+
+'''
+function:'fitFixedCoeff'
+--Returns the columns and the values of the fixed coefficients of the SHY(Q)(P) fit:
+----cP0,cP1,cQ0,cQ1 (columns 0,1,nP,nP+1) from sC0, rT0 and rC0; symmetric case: cQ0,cQ1 (columns 0,1 of Q) from rT0
+'''
+def fitFixedCoeff(data,degQ):
+    sq3=np.sqrt(3.0)
+    rt=(1.0-data['rT']['0'])/(1.0+data['rT']['0'])
+    if(not data['assym']):
+        return [0,1],np.array([0.0,rt/sq3])
     nQ,nP=nMonoms(degQ)
-    nPm2=nP-2;nP1=nP+1;nP2=nP+2
-    sq3=np.sqrt(3.0);sq32=np.sqrt(1.5);sq6=np.sqrt(6.0);sq2=np.sqrt(2.0)
-    ddMon=vPoly(degQ)
-    vP=ddMon['vP']
-    vD1P=ddMon['vD1P'];vD2P=ddMon['vD2P'];vD3P=ddMon['vD3P']
-    vC1P=ddMon['vC1P'];vC2P=ddMon['vC2P'];vC3P=ddMon['vC3P']
-    vQ=ddMon['vQ']
-    vD1Q=ddMon['vD1Q'];vD2Q=ddMon['vD2Q'];vD3Q=ddMon['vD3Q']
-    vC1Q=ddMon['vC1Q'];vC2Q=ddMon['vC2Q'];vC3Q=ddMon['vC3Q']
     cQ0=0.5*(1.0/data['sC']['0']-1.0);cP0=-cQ0
-    rt=(1.0-data['rT']['0'])/(1.0+data['rT']['0'])
     rc=(1.0-data['rC']['0'])/(data['sC']['0']*(1.0+data['rC']['0']))
     cP1=0.5*(rt-rc)/sq3;cQ1=0.5*(rt+rc)/sq3
-    vYSpoints=protoDataPoints(lbd,data['shapeVBAX'],uaxData,nSections=11,nPointsSegment=10)
-    nYSpoints=vYSpoints.shape[0]
-    nZZpoints=data['fileData'].shape[0]  ##number of additional data points read from 'fileData'
+    return [0,1,nP,nP+1],np.array([cP0,cP1,cQ0,cQ1])
+
+
+'''
+function:'fitBlocksSHYqp'
+--Calculates the blocks of least-squares rows of the SHY(Q)(P) fit of degree degQ (all nP+nQ columns)
+--Returns the list of blocks (rows,targets,kind,owner) and the fixed coefficients (columns and values)
+----kind='S' (yield stresses), 'R' (r-values), 'YS' (proto-model points), 'ZZ' (additional data points); see 'fitNormalEquations'
+----owner=the input data the rows are calculated from: 'uaxT','uaxC' (directional data), 'baxT','baxC' (balanced-biaxial data),
+    'YS' (proto-model), 'ZZ' (additional data points); see 'SHYqpSession'
+--vOwner: only the blocks of these owners are calculated; None = all blocks
+'''
+def fitBlocksSHYqp(data,uaxData,lbd,ddMon,degQ,vOwner=None):
+    nQ,nP=nMonoms(degQ)
     nSeg=23
-    nsT=(len(data['sT'])-1)*(nSeg-1);nsC=(len(data['sC'])-1)*(nSeg-1)
-    nData=2*(nsT+nsC-2)+data['wsTb']*(1+data['wrTb'])+data['wsCb']*(1+data['wrCb'])
-    nRow=nData+nYSpoints+nZZpoints
-    nCol=nQ+nP
-    vv=np.zeros(nCol)##stores monomial values on a (u1,u2,u3) tuple 
-    AA=np.zeros((nRow,nCol-4));BB=np.zeros((nRow,1))
-    vu=np.zeros((1,3))
-    powerP=np.zeros((nP,3));powerP1=np.zeros((nP,3));powerP2=np.zeros((nP,3));powerP3=np.zeros((nP,3))
-    powerQ=np.zeros((nQ,3));powerQ1=np.zeros((nQ,3));powerQ2=np.zeros((nQ,3));powerQ3=np.zeros((nQ,3))
-    vTT=np.linspace(0.0,1.0,nSeg);vTTr=np.zeros(nSeg)
-    vTheta=np.zeros(nsT);sTData=np.zeros(nsT);rTData=np.zeros(nsT)
-    lbdST=data['shapeUAX']*uaxData['lambdaSTmax']
-    lbdRT=data['shapeUAX']*uaxData['lambdaRTmax']
-    hh=0
-    for k in range(uaxData['pointsST'].shape[1]-1):
-        BS=uaxData['pointsST'][:,k].reshape(2,1)
-        BE=uaxData['pointsST'][:,k+1].reshape(2,1)
-        TS=uaxData['tanST'][:,k].reshape(2,1)
-        TE=uaxData['tanST'][:,k+1].reshape(2,1)
-        vData=curveSegF(BS,TS,BE,TE,lbdST,vTT)
-        vTheta[hh:hh+nSeg-1]=vData[0,1:]
-        sTData[hh:hh+nSeg-1]=vData[1,1:]
-        BS=uaxData['pointsRT'][:,k].reshape(2,1)
-        BE=uaxData['pointsRT'][:,k+1].reshape(2,1)
-        TS=uaxData['tanRT'][:,k].reshape(2,1)
-        TE=uaxData['tanRT'][:,k+1].reshape(2,1)
-        vTTr[:]=curveSegTheta(vData[0,:],BS[0,0],TS[0,0],BE[0,0],TE[0,0],lbdRT)
-        vData=curveSegF(BS,TS,BE,TE,lbdRT,vTTr)
-        rTData[hh:hh+nSeg-1]=vData[1,1:]
-        hh+=nSeg-1
-    vTheta[:]*=(np.pi/180.0)
-    cTheta=np.cos(vTheta);sTheta=np.sin(vTheta)
-    ##print("sTData shape = {}\n".format(sTData.shape),sTData);print("rTData shape = {}\n".format(rTData.shape),rTData)
-    vecDiag=np.ones(nRow)
-    wData=data['weight']
+    vBlocks=[]
+    for TC,sign in (('T',1.0),('C',-1.0)):
+        if(vOwner is not None and 'uax'+TC not in vOwner):continue
+        vTheta,sData,rData=uaxFitSamples(data,uaxData,TC,nSeg)
+        vvS,vbS,vvR,vbR=fitRowsUax(ddMon,degQ,nP,vTheta,sData,rData,sign)
+        vBlocks+=[(vvS,vbS,'S','uax'+TC),(vvR,vbR,'R','uax'+TC)]
+    for TC,sign in (('T',1.0),('C',-1.0)):
+        if(vOwner is not None and 'bax'+TC not in vOwner):continue
+        if(data['ws'+TC+'b']):
+            vvS,vbS,vvR,vbR=fitRowsBax(ddMon,degQ,nP,data['s'+TC+'b'],data['r'+TC+'b'],sign)
+            vBlocks.append((vvS,vbS,'S','bax'+TC))
+            if(data['wr'+TC+'b']):vBlocks.append((vvR,vbR,'R','bax'+TC))
+    if(vOwner is None or 'YS' in vOwner):
+        vYSpoints=protoDataPoints(lbd,data['shapeVBAX'],uaxData,nSections=11,nPointsSegment=10)
+        vv,vb=fitRowsPoints(ddMon,degQ,nP,vYSpoints)
+        vBlocks.append((vv,vb,'YS','YS'))
+    if((vOwner is None or 'ZZ' in vOwner) and data['fileData'].shape[0]):
+        vv,vb=fitRowsPoints(ddMon,degQ,nP,data['fileData'])
+        vBlocks.append((vv,vb,'ZZ','ZZ'))
+    vFixed,cFixed=fitFixedCoeff(data,degQ)
+    return vBlocks,vFixed,cFixed
+
+
+'''
+function:'fitBlocksSHYqpSymm'
+--Calculates the blocks of least-squares rows of the SHY(Q) fit of degree degQ (only the nQ columns of Q)
+--Returns the list of blocks (rows,targets,kind,owner) and the fixed coefficients (see 'fitBlocksSHYqp'; owners 'uaxT','baxT','YS','ZZ')
+'''
+def fitBlocksSHYqpSymm(data,uaxData,lbd,ddMon,degQ,nSections=15,vOwner=None):
+    nSeg=21
+    vBlocks=[]
+    if(vOwner is None or 'uaxT' in vOwner):
+        vTheta,sTData,rTData=uaxFitSamples(data,uaxData,'T',nSeg)
+        vvS,vbS,vvR,vbR=fitRowsUax(ddMon,degQ,0,vTheta,sTData,rTData)
+        vBlocks+=[(vvS,vbS,'S','uaxT'),(vvR,vbR,'R','uaxT')]
+    if((vOwner is None or 'baxT' in vOwner) and data['wsTb']):
+        vvS,vbS,vvR,vbR=fitRowsBax(ddMon,degQ,0,data['sTb'],data['rTb'])
+        vBlocks.append((vvS,vbS,'S','baxT'))
+        if(data['wrTb']):vBlocks.append((vvR,vbR,'R','baxT'))
+    if(vOwner is None or 'YS' in vOwner):
+        vYSpoints=protoDataPoints(lbd,data['shapeVBAX'],uaxData,nSections,nPointsSegment=10)
+        vv,vb=fitRowsPoints(ddMon,degQ,0,vYSpoints)
+        vBlocks.append((vv,vb,'YS','YS'))
+    if((vOwner is None or 'ZZ' in vOwner) and data['fileData'].shape[0]):
+        vv,vb=fitRowsPoints(ddMon,degQ,0,data['fileData'])
+        vBlocks.append((vv,vb,'ZZ','ZZ'))
+    vFixed,cFixed=fitFixedCoeff(data,degQ)
+    return vBlocks,vFixed,cFixed
+
+
+'''
+function:'fitProblem'
+--Assembles the (weight and epsilon independent) parts of the SHYqp fit of degree degQ (default: data['DEG']):
+  the unit-weight normal equations of each block of rows and the fixed coefficients
+--The normal equations for any weight 'ww' are then a linear combination (see 'fitNormalEquations')
+--Returns a dictionary; 'nPqp' is the number of P-columns of the quadratic problem (0 in the symmetric case)
+--symmetry: the symmetry group of the constraint points (see 'symmetryMask'); default: 'orthotropicCS' for symmetric materials
+'''
+@profiled()
+def fitProblem(data,uaxData,lbd,degQ=None,nSections=15,symmetry=None):
+    if(degQ is None):degQ=data['DEG']
+    if(degQ not in [2*k for k in range(2,13)]):
+        raise DataFormatError("DEG = {}: incorrect value (must be an even integer >=4 and <=24)".format(degQ))
+    nQ,nP=nMonoms(degQ)
+    ddMon=vPoly(degQ)
+    if(data['assym']):
+        vBlocks,vFixed,cFixed=fitBlocksSHYqp(data,uaxData,lbd,ddMon,degQ)
+        nPqp=nP
+    else:
+        vBlocks,vFixed,cFixed=fitBlocksSHYqpSymm(data,uaxData,lbd,ddMon,degQ,nSections)
+        nPqp=0
+    vFree=[k for k in range(nPqp+nQ) if k not in vFixed]
+    vGram=[]
+    for vv,vb,kind,owner in vBlocks:
+        MAAk,MBBk=fitGram([(vv,vb,1.0)],vFree,vFixed,cFixed)
+        vGram.append((kind,vv.shape[0],MAAk,MBBk))
+    if(symmetry is None):symmetry='orthotropic' if data['assym'] else 'orthotropicCS'
+    profileInfo(DEG=degQ,nRow=sum(nRow for kind,nRow,MAAk,MBBk in vGram),nCol=len(vFree))
+    return {'degQ':degQ,'nQ':nQ,'nP':nP,'nPqp':nPqp,'ddMon':ddMon,'assym':data['assym'],'symmetry':symmetry,
+            'vFree':vFree,'vFixed':vFixed,'cFixed':cFixed,'vGram':vGram}
+
+
+'''
+function:'fitNormalEquations'
+--Calculates the normal equations (MAA,MBB) of the fit problem 'fp' (see 'fitProblem') for the weight 'ww' of the data
+  (the proto-model points have the weight 1-ww; 5% of the data weight goes to the additional data points, if any)
+'''
+def fitNormalEquations(fp,ww):
+    nData=sum(nRow for kind,nRow,MAAk,MBBk in fp['vGram'] if kind in ('S','R'))
+    nYSpoints=sum(nRow for kind,nRow,MAAk,MBBk in fp['vGram'] if kind=='YS')
+    nZZpoints=sum(nRow for kind,nRow,MAAk,MBBk in fp['vGram'] if kind=='ZZ')
+    wData=ww
     wDataZZ=0.0
     wwZZ=0.95
     if(nZZpoints):
-        wData=wwZZ*data['weight']
-        wDataZZ=(1-wwZZ)*data['weight']/nZZpoints    
-    wDataS=0.8*wData/(0.5*nData);wDataR=0.2*wData/(0.5*nData)
-    kRow=0
-    for kk in range(1,nsT):
-        vu[:]=cTheta[kk]**2-0.5*sTheta[kk]**2,0.5*sq3*sTheta[kk]**2,cTheta[kk]*sTheta[kk]*sq3
-        powerP[:]=vu**vP
-        vv[0:nP]=powerP[:,0]*powerP[:,1]*powerP[:,2]
-        powerQ[:]=vu**vQ
-        vv[nP:]=powerQ[:,0]*powerQ[:,1]*powerQ[:,2]
-        AA[kRow,0:nPm2]=vv[2:nP];AA[kRow,nPm2:]=vv[nP2:]
-        BB[kRow,0]=1.0/sTData[kk]-1.0-(cP0*vv[0]+cP1*vv[1]+cQ0*vv[nP]+cQ1*vv[nP1])
-        vecDiag[kRow]=wDataS
-        kRow+=1
-        alpha=rTData[kk]+sTheta[kk]**2
-        beta=rTData[kk]+cTheta[kk]**2
-        omega=cTheta[kk]*sTheta[kk]
-        b2a=alpha-0.5*beta
-        cc=-b2a*vu[0,0]-0.5*sq3*beta*vu[0,1]+omega*sq3*vu[0,2]
-        powerP1[:]=vu**vD1P;powerP2[:]=vu**vD2P;powerP3[:]=vu**vD3P
-        vv[0:nP]=cc*degPm1*vv[0:nP]+b2a*vC1P[:]*powerP1[:,0]*powerP1[:,1]*powerP1[:,2]+\
-                 0.5*beta*sq3*vC2P[:]*powerP2[:,0]*powerP2[:,1]*powerP2[:,2]-\
-                 omega*sq3*vC3P[:]*powerP3[:,0]*powerP3[:,1]*powerP3[:,2]
-        powerQ1[:]=vu**vD1Q;powerQ2[:]=vu**vD2Q;powerQ3[:]=vu**vD3Q
-        vv[nP:]=cc*degQm1*vv[nP:]+b2a*vC1Q[:]*powerQ1[:,0]*powerQ1[:,1]*powerQ1[:,2]+\
-                 0.5*beta*sq3*vC2Q[:]*powerQ2[:,0]*powerQ2[:,1]*powerQ2[:,2]-\
-                 omega*sq3*vC3Q[:]*powerQ3[:,0]*powerQ3[:,1]*powerQ3[:,2]
-        AA[kRow,0:nPm2]=vv[2:nP];AA[kRow,nPm2:]=vv[nP2:]
-        BB[kRow,0]=cc-(cP0*vv[0]+cP1*vv[1]+cQ0*vv[nP]+cQ1*vv[nP1])
-        vecDiag[kRow]=wDataR
-        kRow+=1
-    vTheta=np.zeros(nsC);sCData=np.zeros(nsC);rCData=np.zeros(nsC)
-    lbdSC=data['shapeUAX']*uaxData['lambdaSCmax']
-    lbdRC=data['shapeUAX']*uaxData['lambdaRCmax']
-    hh=0
-    for k in range(uaxData['pointsSC'].shape[1]-1):
-        BS=uaxData['pointsSC'][:,k].reshape(2,1)
-        BE=uaxData['pointsSC'][:,k+1].reshape(2,1)
-        TS=uaxData['tanSC'][:,k].reshape(2,1)
-        TE=uaxData['tanSC'][:,k+1].reshape(2,1)
-        vData=curveSegF(BS,TS,BE,TE,lbdSC,vTT)
-        vTheta[hh:hh+nSeg-1]=vData[0,1:]
-        sCData[hh:hh+nSeg-1]=vData[1,1:]
-        BS=uaxData['pointsRC'][:,k].reshape(2,1)
-        BE=uaxData['pointsRC'][:,k+1].reshape(2,1)
-        TS=uaxData['tanRC'][:,k].reshape(2,1)
-        TE=uaxData['tanRC'][:,k+1].reshape(2,1)
-        vTTr[:]=curveSegTheta(vData[0,:],BS[0,0],TS[0,0],BE[0,0],TE[0,0],lbdRC)
-        vData=curveSegF(BS,TS,BE,TE,lbdRC,vTTr)
-        rCData[hh:hh+nSeg-1]=vData[1,1:]
-        hh+=nSeg-1
-    vTheta[:]*=(np.pi/180.0)
-    cTheta=np.cos(vTheta);sTheta=np.sin(vTheta)
-    for kk in range(1,nsC):
-        vu[:]=-cTheta[kk]**2+0.5*sTheta[kk]**2,-0.5*sq3*sTheta[kk]**2,-cTheta[kk]*sTheta[kk]*sq3
-        powerP[:]=vu**vP
-        vv[0:nP]=powerP[:,0]*powerP[:,1]*powerP[:,2]
-        powerQ[:]=vu**vQ
-        vv[nP:]=powerQ[:,0]*powerQ[:,1]*powerQ[:,2]
-        AA[kRow,0:nPm2]=vv[2:nP];AA[kRow,nPm2:]=vv[nP2:]
-        BB[kRow,0]=1.0/sCData[kk]-1.0-(cP0*vv[0]+cP1*vv[1]+cQ0*vv[nP]+cQ1*vv[nP1])
-        vecDiag[kRow]=wDataS
-        kRow+=1
-        alpha=rCData[kk]+sTheta[kk]**2
-        beta=rCData[kk]+cTheta[kk]**2
-        omega=cTheta[kk]*sTheta[kk]
-        b2a=alpha-0.5*beta
-        cc=-b2a*vu[0,0]-0.5*sq3*beta*vu[0,1]+omega*sq3*vu[0,2]
-        powerP1[:]=vu**vD1P;powerP2[:]=vu**vD2P;powerP3[:]=vu**vD3P
-        vv[0:nP]=cc*degPm1*vv[0:nP]+b2a*vC1P[:]*powerP1[:,0]*powerP1[:,1]*powerP1[:,2]+\
-                 0.5*beta*sq3*vC2P[:]*powerP2[:,0]*powerP2[:,1]*powerP2[:,2]-\
-                 omega*sq3*vC3P[:]*powerP3[:,0]*powerP3[:,1]*powerP3[:,2]
-        powerQ1[:]=vu**vD1Q;powerQ2[:]=vu**vD2Q;powerQ3[:]=vu**vD3Q
-        vv[nP:]=cc*degQm1*vv[nP:]+b2a*vC1Q[:]*powerQ1[:,0]*powerQ1[:,1]*powerQ1[:,2]+\
-                 0.5*beta*sq3*vC2Q[:]*powerQ2[:,0]*powerQ2[:,1]*powerQ2[:,2]-\
-                 omega*sq3*vC3Q[:]*powerQ3[:,0]*powerQ3[:,1]*powerQ3[:,2]
-        AA[kRow,0:nPm2]=vv[2:nP];AA[kRow,nPm2:]=vv[nP2:]
-        BB[kRow,0]=cc-(cP0*vv[0]+cP1*vv[1]+cQ0*vv[nP]+cQ1*vv[nP1])
-        vecDiag[kRow]=wDataR
-        kRow+=1    
-    if(data['wsTb']):
-        vu[:]=0.5,0.5*sq3,0.0   ##sTb
-        powerP[:]=vu**vP
-        vv[0:nP]=powerP[:,0]*powerP[:,1]*powerP[:,2]
-        powerQ[:]=vu**vQ
-        vv[nP:]=powerQ[:,0]*powerQ[:,1]*powerQ[:,2]
-        AA[kRow,0:nPm2]=vv[2:nP];AA[kRow,nPm2:]=vv[nP2:]
-        BB[kRow,0]=1.0/data['sTb']-1.0-(cP0*vv[0]+cP1*vv[1]+cQ0*vv[nP]+cQ1*vv[nP1])
-        vecDiag[kRow]=wDataS
-        kRow+=1
-    if(data['wsTb']*data['wrTb']):  ##rTb
-        b2a=data['rTb']+0.5
-        cc=0.5*(data['rTb']-1.0)
-        powerP1[:]=vu**vD1P;powerP2[:]=vu**vD2P
-        vv[0:nP]=cc*degPm1*vv[0:nP]-b2a*vC1P[:]*powerP1[:,0]*powerP1[:,1]*powerP1[:,2]+\
-                 0.5*sq3*vC2P[:]*powerP2[:,0]*powerP2[:,1]*powerP2[:,2]
-        powerQ1[:]=vu**vD1Q;powerQ2[:]=vu**vD2Q
-        vv[nP:]=cc*degQm1*vv[nP:]-b2a*vC1Q[:]*powerQ1[:,0]*powerQ1[:,1]*powerQ1[:,2]+\
-                 0.5*sq3*vC2Q[:]*powerQ2[:,0]*powerQ2[:,1]*powerQ2[:,2]
-        AA[kRow,0:nPm2]=vv[2:nP];AA[kRow,nPm2:]=vv[nP2:]
-        BB[kRow,0]=cc-(cP0*vv[0]+cP1*vv[1]+cQ0*vv[nP]+cQ1*vv[nP1])
-        vecDiag[kRow]=wDataR
-        kRow+=1
-    if(data['wsCb']):
-        vu[:]=-0.5,-0.5*sq3,0.0   ##sCb
-        powerP[:]=vu**vP
-        vv[0:nP]=powerP[:,0]*powerP[:,1]*powerP[:,2]
-        powerQ[:]=vu**vQ
-        vv[nP:]=powerQ[:,0]*powerQ[:,1]*powerQ[:,2]
-        AA[kRow,0:nPm2]=vv[2:nP];AA[kRow,nPm2:]=vv[nP2:]
-        BB[kRow,0]=1.0/data['sCb']-1.0-(cP0*vv[0]+cP1*vv[1]+cQ0*vv[nP]+cQ1*vv[nP1])
-        vecDiag[kRow]=wDataS
-        kRow+=1
-    if(data['wsCb']*data['wrCb']):  ##rCb
-        b2a=data['rCb']+0.5
-        cc=0.5*(-data['rCb']+1.0)
-        powerP1[:]=vu**vD1P;powerP2[:]=vu**vD2P
-        vv[0:nP]=cc*degPm1*vv[0:nP]-b2a*vC1P[:]*powerP1[:,0]*powerP1[:,1]*powerP1[:,2]+\
-                 0.5*sq3*vC2P[:]*powerP2[:,0]*powerP2[:,1]*powerP2[:,2]
-        powerQ1[:]=vu**vD1Q;powerQ2[:]=vu**vD2Q
-        vv[nP:]=cc*degQm1*vv[nP:]-b2a*vC1Q[:]*powerQ1[:,0]*powerQ1[:,1]*powerQ1[:,2]+\
-                 0.5*sq3*vC2Q[:]*powerQ2[:,0]*powerQ2[:,1]*powerQ2[:,2]
-        AA[kRow,0:nPm2]=vv[2:nP];AA[kRow,nPm2:]=vv[nP2:]
-        BB[kRow,0]=cc-(cP0*vv[0]+cP1*vv[1]+cQ0*vv[nP]+cQ1*vv[nP1])
-        vecDiag[kRow]=wDataR
-        kRow+=1
-    wDataYS=(1.0-data['weight'])/nYSpoints    
-    for kk in range(nYSpoints):
-        vu[0,:]=(2*vYSpoints[kk,0]-vYSpoints[kk,1])/sq6,vYSpoints[kk,1]/sq2,vYSpoints[kk,2]*sq2
-        modS=np.sqrt(vu[0,0]**2+vu[0,1]**2+vu[0,2]**2)
-        vu[0,:]/=modS
-        powerP[:]=vu**vP
-        vv[0:nP]=powerP[:,0]*powerP[:,1]*powerP[:,2]
-        powerQ[:]=vu**vQ
-        vv[nP:]=powerQ[:,0]*powerQ[:,1]*powerQ[:,2]
-        AA[kRow,0:nPm2]=vv[2:nP];AA[kRow,nPm2:]=vv[nP2:]
-        BB[kRow,0]=1.0/(sq32*modS)-1.0-(cP0*vv[0]+cP1*vv[1]+cQ0*vv[nP]+cQ1*vv[nP1])
-        vecDiag[kRow]=wDataYS
-        kRow+=1 
-    vYSpoints=data['fileData']    
-    for kk in range(nZZpoints):
-        vu[0,:]=(2*vYSpoints[kk,0]-vYSpoints[kk,1])/sq6,vYSpoints[kk,1]/sq2,vYSpoints[kk,2]*sq2
-        modS=np.sqrt(vu[0,0]**2+vu[0,1]**2+vu[0,2]**2)
-        vu[0,:]/=modS
-        powerP[:]=vu**vP
-        vv[0:nP]=powerP[:,0]*powerP[:,1]*powerP[:,2]
-        powerQ[:]=vu**vQ
-        vv[nP:]=powerQ[:,0]*powerQ[:,1]*powerQ[:,2]
-        AA[kRow,0:nPm2]=vv[2:nP];AA[kRow,nPm2:]=vv[nP2:]
-        BB[kRow,0]=1.0/(sq32*modS)-1.0-(cP0*vv[0]+cP1*vv[1]+cQ0*vv[nP]+cQ1*vv[nP1])
-        vecDiag[kRow]=wDataZZ
-        kRow+=1            
-    vDiag=np.diag(vecDiag)
-    MAA=np.dot(AA.T,np.dot(vDiag,AA));MAA=0.5*(MAA.T+MAA)+1.0e-12*np.eye(MAA.shape[0])
-    MBB=np.dot(AA.T,np.dot(vDiag,BB))
+        wData=wwZZ*ww
+        wDataZZ=(1-wwZZ)*ww/nZZpoints
+    vW={'S':0.8*wData/(0.5*nData),'R':0.2*wData/(0.5*nData),'YS':(1.0-ww)/nYSpoints,'ZZ':wDataZZ}
+    nFree=len(fp['vFree'])
+    MAA=np.zeros((nFree,nFree));MBB=np.zeros((nFree,1))
+    for kind,nRow,MAAk,MBBk in fp['vGram']:
+        MAA+=vW[kind]*MAAk;MBB+=vW[kind]*MBBk
+    MAA=0.5*(MAA.T+MAA)+1.0e-12*np.eye(MAA.shape[0])
+    return MAA,MBB
+
+
+'''
+function:'fitCoeff'
+--Returns the vector of all nP+nQ coefficients from the solution 'vsq' (free coefficients) of the fit problem 'fp'
+'''
+def fitCoeff(fp,vsq):
+    nPqp=fp['nPqp']
+    vCoeff=np.zeros(nPqp+fp['nQ'])
+    vCoeff[fp['vFixed']]=fp['cFixed'];vCoeff[fp['vFree']]=vsq
+    if(nPqp):
+        return vCoeff
+    return np.concatenate((np.zeros(fp['nP']),vCoeff))
+
+
+'''
+function:'dataFitSHYqp'
+--Calculates the SHY(Q)(P) coefficients by minimizing the weighted distance to the proto-model(Bezier5YS)
+--Input: 
+----data=the overall data structure of the material
+----qpSolver='cvxopt', 'quadprog' or 'cvxoptSOC' (second-order-cone constraints, see 'constraintRowsSOC')
+----cuttingPlane=if True, the convexity constraints are generated iteratively (see 'solveQPCuttingPlane')
+----cacheDir=directory where the material independent constraint arrays are cached and reused (see 'cachedArray'); None = no caching
+----refineLevels=if >0, the grid of 'nEquator' is refined (this number of times) where convexity is tight (see 'solveQPAdaptive')
+'''
+@profiled()
+def dataFitSHYqp(data,uaxData,lbd,qpSolver='cvxopt',nEquator=200,epsilon=0.01,nSections=19,cuttingPlane=False,cacheDir=None,refineLevels=0):
+    fp=fitProblem(data,uaxData,lbd)
+    degQ,nQ,nP,ddMon=fp['degQ'],fp['nQ'],fp['nP'],fp['ddMon']
+    MAA,MBB=fitNormalEquations(fp,data['weight'])
     print("Generating constraints....")
-    MCC,MUB=genConstraints2D(ddMon,degQ,nP,nQ,cP0,cP1,cQ0,cQ1,nEquator,epsilon)
-    print("{}: Calculating SHYqp parameters....".format(qpSolver))    
-    #meq=0
-    #vsq=qpg.solve_qp(MAA,MBB.reshape((MBB.shape[0],)),-MCC.T,-MUB.reshape((MUB.shape[0],)), meq)[0]
-    if(qpSolver=='quadprog'):##use quadprog
-        meq=0    
-        vsq=qpg.solve_qp(MAA,MBB.reshape((MBB.shape[0],)),-MCC.T,-MUB.reshape((MUB.shape[0],)),meq)[0]
-    elif(qpSolver=='cvxopt'):##use cvxopt    
-        args = [cvxopt.matrix(MAA), cvxopt.matrix(-MBB.reshape((MBB.shape[0],))),cvxopt.matrix(MCC),cvxopt.matrix(MUB.reshape((MUB.shape[0],)))]
-        vsq=cvxopt.solvers.qp(*args)['x']
-        vsq=np.array(vsq).reshape(len(vsq))
-    else:##unknown solver
-        print('sqSolver = {}: unknown solver\nCalculations aborted'.format(sqSolver))
-        exit()       
-    vCoeff=np.zeros(nCol)
-    vCoeff[0]=cP0;vCoeff[1]=cP1;vCoeff[2:nP]=vsq[0:nP-2];vCoeff[nP]=cQ0;vCoeff[nP+1]=cQ1;vCoeff[nP+2:]=vsq[nP-2:]
-    return vCoeff,ddMon,nQ,nP
+    if(refineLevels):
+        print("{}: Calculating SHYqp parameters....".format(qpSolver))
+        vsq,vUG=solveQPAdaptive(MAA,MBB,ddMon,degQ,nP,nQ,fp['vFree'],fp['vFixed'],fp['cFixed'],qpSolver,nEquator,epsilon,refineLevels)
+    elif(cuttingPlane):
+        print("{}: Calculating SHYqp parameters....".format(qpSolver))
+        vsq=solveQPCuttingPlane(MAA,MBB,ddMon,degQ,nP,nQ,fp['vFree'],fp['vFixed'],fp['cFixed'],qpSolver,nEquator,epsilon,cacheDir=cacheDir)
+    elif(qpSolver=='cvxoptSOC'):
+        MCC,MUB=genConstraintsSOC2D(ddMon,degQ,nP,fp['vFree'],fp['vFixed'],fp['cFixed'],nEquator,epsilon,cacheDir)
+        print("{}: Calculating SHYqp parameters....".format(qpSolver))    
+        vsq=solveQP(MAA,MBB,MCC,MUB,qpSolver)
+    else:
+        cP0,cP1,cQ0,cQ1=fp['cFixed']
+        MCC,MUB=genConstraints2D(ddMon,degQ,nP,nQ,cP0,cP1,cQ0,cQ1,nEquator,epsilon,cacheDir)
+        print("{}: Calculating SHYqp parameters....".format(qpSolver))    
+        vsq=solveQP(MAA,MBB,MCC,MUB,qpSolver)
+    return fitCoeff(fp,vsq),ddMon,nQ,nP
 
 
 '''
 function:'dataFitSHYqpSymm'
 --Calculates the SHY(Q) coefficients by minimizing the weighted distance to the proto-model(Bezier5YS)
+--cuttingPlane=if True, the convexity constraints are generated iteratively (see 'solveQPCuttingPlane')
+--cacheDir=directory where the material independent constraint arrays are cached and reused (see 'cachedArray'); None = no caching
+--symmetry=the symmetry group of the constraint points (see 'symmetryMask'); 'orthotropicCS' uses about 3/4 of the points of 'orthotropic'
+  (the same constraints, see 'symmetryFoldRows')
+--refineLevels=if >0, the grid of 'nEquator' is refined (this number of times) where convexity is tight (see 'solveQPAdaptive')
 '''
-def dataFitSHYqpSymm(data,uaxData,lbd,qpSolver='cvxopt',nEquator=200,epsilon=0.01,nSections=15):
-    degQ=data['DEG'];degQm1=degQ-1;degQm2=degQ-2;degPm1=degQm2;degPm2=degPm1-1
-    nQ,nP=nMonoms(degQ)
-    nPm2=nP-2;nP1=nP+1;nP2=nP+2
-    sq3=np.sqrt(3.0);sq32=np.sqrt(1.5);sq6=np.sqrt(6.0);sq2=np.sqrt(2.0)
-    ddMon=vPoly(degQ)
-    vQ=ddMon['vQ']
-    vD1Q=ddMon['vD1Q'];vD2Q=ddMon['vD2Q'];vD3Q=ddMon['vD3Q']
-    vC1Q=ddMon['vC1Q'];vC2Q=ddMon['vC2Q'];vC3Q=ddMon['vC3Q']
-    cQ0=0.0
-    rt=(1.0-data['rT']['0'])/(1.0+data['rT']['0'])
-    cQ1=rt/sq3
-    vYSpoints=protoDataPoints(lbd,data['shapeVBAX'],uaxData,nSections,nPointsSegment=10)
-    nYSpoints=vYSpoints.shape[0]
-    ###nsT=len(data['sT']);nsC=len(data['sC'])
-    nSeg=21
-    nsT=(len(data['sT'])-1)*(nSeg-1)
-    nData=2*(nsT-1)+data['wsTb']*(1+data['wrTb'])
-    nZZpoints=data['fileData'].shape[0]  ##number of additional data points read from 'fileData'
-    nRow=nData+nYSpoints+nZZpoints
-    nCol=nQ
-    vv=np.zeros(nCol)##stores monomial values on a (u1,u2,u3) tuple 
-    AA=np.zeros((nRow,nCol-2));BB=np.zeros((nRow,1))
-    vu=np.zeros((1,3))
-    powerQ=np.zeros((nQ,3));powerQ1=np.zeros((nQ,3));powerQ2=np.zeros((nQ,3));powerQ3=np.zeros((nQ,3))
-    vTT=np.linspace(0.0,1.0,nSeg);vTTr=np.zeros(nSeg)
-    vTheta=np.zeros(nsT);sTData=np.zeros(nsT);rTData=np.zeros(nsT)
-    lbdST=data['shapeUAX']*uaxData['lambdaSTmax']
-    lbdRT=data['shapeUAX']*uaxData['lambdaRTmax']
-    hh=0
-    for k in range(uaxData['pointsST'].shape[1]-1):
-        BS=uaxData['pointsST'][:,k].reshape(2,1)
-        BE=uaxData['pointsST'][:,k+1].reshape(2,1)
-        TS=uaxData['tanST'][:,k].reshape(2,1)
-        TE=uaxData['tanST'][:,k+1].reshape(2,1)
-        vData=curveSegF(BS,TS,BE,TE,lbdST,vTT)
-        vTheta[hh:hh+nSeg-1]=vData[0,1:]
-        sTData[hh:hh+nSeg-1]=vData[1,1:]
-        BS=uaxData['pointsRT'][:,k].reshape(2,1)
-        BE=uaxData['pointsRT'][:,k+1].reshape(2,1)
-        TS=uaxData['tanRT'][:,k].reshape(2,1)
-        TE=uaxData['tanRT'][:,k+1].reshape(2,1)
-        vTTr[:]=curveSegTheta(vData[0,:],BS[0,0],TS[0,0],BE[0,0],TE[0,0],lbdRT)
-        vData=curveSegF(BS,TS,BE,TE,lbdRT,vTTr)
-        rTData[hh:hh+nSeg-1]=vData[1,1:]
-        hh+=nSeg-1
-    vTheta[:]*=(np.pi/180.0)
-    cTheta=np.cos(vTheta);sTheta=np.sin(vTheta)
-    ##print("sTData shape = {}\n".format(sTData.shape),sTData);print("rTData shape = {}\n".format(rTData.shape),rTData)
-    vecDiag=np.ones(nRow)
-    wData=data['weight']
-    wDataZZ=0.0
-    wwZZ=0.95
-    if(nZZpoints):
-        wData=wwZZ*data['weight']
-        wDataZZ=(1-wwZZ)*data['weight']/nZZpoints    
-    wDataS=0.8*wData/(0.5*nData);wDataR=0.2*wData/(0.5*nData)
-    kRow=0
-    #vecDiag=np.ones(nRow)
-    #wData=data['weight']/nData;
-    #wDataS=0.8*data['weight']/(0.5*nData);wDataR=0.2*data['weight']/(0.5*nData)
-    #kRow=0
-    for kk in range(1,nsT):
-        vu[:]=cTheta[kk]**2-0.5*sTheta[kk]**2,0.5*sq3*sTheta[kk]**2,cTheta[kk]*sTheta[kk]*sq3
-        powerQ[:]=vu**vQ
-        vv[:]=powerQ[:,0]*powerQ[:,1]*powerQ[:,2]
-        AA[kRow,:]=vv[2:]
-        BB[kRow,0]=1.0/sTData[kk]-1.0-(cQ1*vv[1])
-        vecDiag[kRow]=wDataS
-        kRow+=1
-        alpha=rTData[kk]+sTheta[kk]**2
-        beta=rTData[kk]+cTheta[kk]**2
-        omega=cTheta[kk]*sTheta[kk]
-        b2a=alpha-0.5*beta
-        cc=-b2a*vu[0,0]-0.5*sq3*beta*vu[0,1]+omega*sq3*vu[0,2]
-        powerQ1[:]=vu**vD1Q;powerQ2[:]=vu**vD2Q;powerQ3[:]=vu**vD3Q
-        vv[:]=cc*degQm1*vv[:]+b2a*vC1Q[:]*powerQ1[:,0]*powerQ1[:,1]*powerQ1[:,2]+\
-                 0.5*beta*sq3*vC2Q[:]*powerQ2[:,0]*powerQ2[:,1]*powerQ2[:,2]-\
-                 omega*sq3*vC3Q[:]*powerQ3[:,0]*powerQ3[:,1]*powerQ3[:,2]
-        AA[kRow,:]=vv[2:]
-        BB[kRow,0]=cc-(cQ1*vv[1])
-        vecDiag[kRow]=wDataR
-        kRow+=1
-    if(data['wsTb']):
-        vu[:]=0.5,0.5*sq3,0.0   ##sTb
-        powerQ[:]=vu**vQ
-        vv[:]=powerQ[:,0]*powerQ[:,1]*powerQ[:,2]
-        AA[kRow,:]=vv[2:]
-        BB[kRow,0]=1.0/data['sTb']-1.0-(cQ1*vv[1])
-        vecDiag[kRow]=wDataS
-        kRow+=1
-    if(data['wsTb']*data['wrTb']):  ##rTb
-        b2a=data['rTb']+0.5
-        cc=0.5*(data['rTb']-1.0)
-        powerQ1[:]=vu**vD1Q;powerQ2[:]=vu**vD2Q
-        vv[:]=cc*degQm1*vv[:]-b2a*vC1Q[:]*powerQ1[:,0]*powerQ1[:,1]*powerQ1[:,2]+\
-              0.5*sq3*vC2Q[:]*powerQ2[:,0]*powerQ2[:,1]*powerQ2[:,2]
-        AA[kRow,:]=vv[2:]
-        BB[kRow,0]=cc-(cQ1*vv[1])
-        vecDiag[kRow]=wDataR
-        kRow+=1
-    wDataYS=(1.0-data['weight'])/nYSpoints    
-    for kk in range(nYSpoints):
-        vu[:]=(2*vYSpoints[kk,0]-vYSpoints[kk,1])/sq6,vYSpoints[kk,1]/sq2,vYSpoints[kk,2]*sq2
-        modS=np.sqrt(vu[0,0]**2+vu[0,1]**2+vu[0,2]**2)
-        vu[:]/=modS
-        powerQ[:]=vu**vQ
-        vv[:]=powerQ[:,0]*powerQ[:,1]*powerQ[:,2]
-        AA[kRow,:]=vv[2:]
-        BB[kRow,0]=1.0/(sq32*modS)-1.0-(cQ1*vv[1])
-        vecDiag[kRow]=wDataYS
-        kRow+=1
-    vYSpoints=data['fileData']    
-    for kk in range(nZZpoints):
-        vu[:]=(2*vYSpoints[kk,0]-vYSpoints[kk,1])/sq6,vYSpoints[kk,1]/sq2,vYSpoints[kk,2]*sq2
-        modS=np.sqrt(vu[0,0]**2+vu[0,1]**2+vu[0,2]**2)
-        vu[:]/=modS
-        powerQ[:]=vu**vQ
-        vv[:]=powerQ[:,0]*powerQ[:,1]*powerQ[:,2]
-        AA[kRow,:]=vv[2:]
-        BB[kRow,0]=1.0/(sq32*modS)-1.0-(cQ1*vv[1])
-        vecDiag[kRow]=wDataZZ
-        kRow+=1          
-    vDiag=np.diag(vecDiag)
-    MAA=np.dot(AA.T,np.dot(vDiag,AA));MAA=0.5*(MAA.T+MAA)+1.0e-12*np.eye(MAA.shape[0])
-    MBB=np.dot(AA.T,np.dot(vDiag,BB))
+@profiled()
+def dataFitSHYqpSymm(data,uaxData,lbd,qpSolver='cvxopt',nEquator=200,epsilon=0.01,nSections=15,cuttingPlane=False,cacheDir=None,
+                     symmetry='orthotropicCS',refineLevels=0):
+    fp=fitProblem(data,uaxData,lbd,nSections=nSections,symmetry=symmetry)
+    degQ,nQ,nP,ddMon=fp['degQ'],fp['nQ'],fp['nP'],fp['ddMon']
+    MAA,MBB=fitNormalEquations(fp,data['weight'])
     print("Generating constraints....")
-    MCC,MUB=genConstraints2DSymm(ddMon,degQ,nQ,cQ1,nEquator,epsilon)
-    print("{}: Calculating SHYq parameters....".format(qpSolver))    
-    if(qpSolver=='quadprog'):##use quadprog
-        meq=0    
-        vsq=qpg.solve_qp(MAA,MBB.reshape((MBB.shape[0],)),-MCC.T,-MUB.reshape((MUB.shape[0],)),meq)[0]
-    elif(qpSolver=='cvxopt'):##use cvxopt    
-        args = [cvxopt.matrix(MAA), cvxopt.matrix(-MBB.reshape((MBB.shape[0],))),cvxopt.matrix(MCC),cvxopt.matrix(MUB.reshape((MUB.shape[0],)))]
-        vsq=cvxopt.solvers.qp(*args)['x']
-        vsq=np.array(vsq).reshape(len(vsq))
-    else:##unknown solver
-        print('sqSolver = {}: unknown solver\nCalculations aborted'.format(sqSolver))
-        exit()        
-    vCoeff=np.zeros(nP+nCol)
-    vCoeff[nP]=cQ0;vCoeff[nP+1]=cQ1;vCoeff[nP+2:]=vsq[:]
-    return vCoeff,ddMon,nQ,nP
+    if(refineLevels):
+        print("{}: Calculating SHYq parameters....".format(qpSolver))
+        vsq,vUG=solveQPAdaptive(MAA,MBB,ddMon,degQ,0,nQ,fp['vFree'],fp['vFixed'],fp['cFixed'],qpSolver,nEquator,epsilon,refineLevels,
+                                symmetry=symmetry)
+    elif(cuttingPlane):
+        print("{}: Calculating SHYq parameters....".format(qpSolver))
+        vsq=solveQPCuttingPlane(MAA,MBB,ddMon,degQ,0,nQ,fp['vFree'],fp['vFixed'],fp['cFixed'],qpSolver,nEquator,epsilon,cacheDir=cacheDir,
+                                symmetry=symmetry)
+    elif(qpSolver=='cvxoptSOC'):
+        MCC,MUB=genConstraintsSOC2D(ddMon,degQ,0,fp['vFree'],fp['vFixed'],fp['cFixed'],nEquator,epsilon,cacheDir,symmetry)
+        print("{}: Calculating SHYq parameters....".format(qpSolver))    
+        vsq=solveQP(MAA,MBB,MCC,MUB,qpSolver)
+    else:
+        MCC,MUB=genConstraints2DSymm(ddMon,degQ,nQ,fp['cFixed'][1],nEquator,epsilon,cacheDir,symmetry)
+        print("{}: Calculating SHYq parameters....".format(qpSolver))    
+        vsq=solveQP(MAA,MBB,MCC,MUB,qpSolver)
+    return fitCoeff(fp,vsq),ddMon,nQ,nP
+
+
+'''
+function:'fitSweep'
+--Calculates the SHYqp coefficients for all combinations of degrees 'vDeg', data weights 'vWeight' and
+  convexity bounds 'vEpsilon' (defaults: data['DEG'], data['weight'], 0.01)
+--Reuses everything that does not change along the sweep:
+----the blocks of rows and their normal equations are assembled once per degree (only their weighted sum changes with 'ww');
+----the matrix of constraints is calculated once per degree (only the bounds change with 'epsilon');
+----each solve is warm-started from the previous solution of the same degree (see 'solveQP' and 'solveQPCuttingPlane')
+--check=True: the convexity of each solution is checked with 'SHYqp_HessGaussCheck'
+--Returns a list of dictionaries (one for each solve, in the order of the sweep) with keys
+  'DEG','weight','epsilon','vCoeff','ddMon','nQ','nP' and (check=True) 'cvxCheck','convex'
+'''
+@profiled()
+def fitSweep(data,uaxData,lbd,qpSolver='cvxopt',vEpsilon=None,vWeight=None,vDeg=None,nEquator=200,nSections=15,
+             cuttingPlane=False,cacheDir=None,check=True,tolKG=0.0,refineLevels=0):
+    vRes=[]
+    for degQ in (vDeg if vDeg else [data['DEG']]):
+        fp=fitProblem(data,uaxData,lbd,degQ,nSections)
+        warmStart={}
+        for ww in (vWeight if vWeight else [data['weight']]):
+            MAA,MBB=fitNormalEquations(fp,ww)
+            for epsilon in (vEpsilon if vEpsilon else [0.01]):
+                print('fitSweep: DEG = {}, weight = {}, epsilon = {}'.format(degQ,ww,epsilon))
+                vRes.append(fitSweepSolve(fp,MAA,MBB,ww,epsilon,qpSolver,nEquator,cuttingPlane,cacheDir,warmStart,check,tolKG,refineLevels))
+    return vRes
 
 
-def SHYqp_uax_Plot(uaxData,vCoeff,ddMon,nQ,nP,savePng=False):
+'''
+function:'fitSweepSolve'
+--Solves the fit problem 'fp' (normal equations MAA,MBB) for the convexity bound 'epsilon' (used by 'fitSweep' and 'fitMinEpsilon')
+--The matrix of constraints (full generation) is kept in 'warmStart' together with the previous solution
+--refineLevels>0: adaptive grid (see 'solveQPAdaptive'; each solve refines its own grid, no warm start)
+'''
+def fitSweepSolve(fp,MAA,MBB,ww,epsilon,qpSolver,nEquator,cuttingPlane,cacheDir,warmStart,check=True,tolKG=0.0,refineLevels=0):
+    degQ,nQ,nP,nPqp,ddMon=fp['degQ'],fp['nQ'],fp['nP'],fp['nPqp'],fp['ddMon']
+    if(refineLevels):
+        vsq,vUG=solveQPAdaptive(MAA,MBB,ddMon,degQ,nPqp,nQ,fp['vFree'],fp['vFixed'],fp['cFixed'],qpSolver,nEquator,epsilon,refineLevels,
+                                symmetry=fp['symmetry'])
+    elif(cuttingPlane):
+        vsq=solveQPCuttingPlane(MAA,MBB,ddMon,degQ,nPqp,nQ,fp['vFree'],fp['vFixed'],fp['cFixed'],qpSolver,nEquator,epsilon,
+                                cacheDir=cacheDir,warmStart=warmStart,symmetry=fp['symmetry'])
+    else:
+        if('MCC' not in warmStart):
+            if(qpSolver=='cvxoptSOC'):
+                vv=constraintRowsSOC(ddMon,degQ,nEquator,cacheDir,fp['symmetry'],nPqp)
+                warmStart['MCC'],warmStart['MUB']=reduceConstraintsSOC(vv,fp['vFree'],fp['vFixed'],fp['cFixed'],0.0)
+                warmStart['dMUB']=np.zeros(warmStart['MUB'].shape);warmStart['dMUB'][0::3]=2.0
+            else:
+                warmStart['MCC'],warmStart['MUB']=constraintMatrix(ddMon,degQ,nPqp,fp['vFree'],fp['vFixed'],fp['cFixed'],nEquator,0.0,
+                                                                   cacheDir,fp['symmetry'])
+                warmStart['dMUB']=1.0
+        vsq=solveQP(MAA,MBB,warmStart['MCC'],warmStart['MUB']-epsilon*warmStart['dMUB'],qpSolver,warmStart)
+    rec={'DEG':degQ,'weight':ww,'epsilon':epsilon,'vCoeff':fitCoeff(fp,vsq),'ddMon':ddMon,'nQ':nQ,'nP':nP}
+    if(check):
+        rec['cvxCheck']=SHYqp_HessGaussCheck(rec['vCoeff'],ddMon,nQ,nP,fp['symmetry'],earlyExit=True,tolKG=tolKG)
+        rec['convex']=bool(rec['cvxCheck'][3]>=tolKG)
+    return rec
+
+
+'''
+function:'fitMinEpsilon'
+--Finds the smallest convexity bound 'epsilon' (on the grid of step 'dEpsilon') for which the SHYqp model is convex
+  (minimum Gaussian curvature found by 'SHYqp_HessGaussCheck' >= tolKG):
+----starting from 'epsilon', the bound is increased while the model is not convex (up to 'maxEpsilon')
+    or decreased while it is (down to 'minEpsilon');
+----all solves reuse the normal equations and the constraints and are warm-started (see 'fitSweep')
+--Returns the record (see 'fitSweep') of the smallest 'epsilon' with a convex model;
+  if none is found, a warning is printed and the record of the largest 'epsilon' is returned ('convex'=False)
+'''
+@profiled()
+def fitMinEpsilon(data,uaxData,lbd,qpSolver='cvxopt',epsilon=0.01,dEpsilon=0.0025,minEpsilon=0.0,maxEpsilon=0.1,
+                  nEquator=200,nSections=15,cuttingPlane=False,cacheDir=None,tolKG=0.0,refineLevels=0):
+    fp=fitProblem(data,uaxData,lbd,nSections=nSections)
+    MAA,MBB=fitNormalEquations(fp,data['weight'])
+    warmStart={}
+    def fSolve(eps):
+        print('fitMinEpsilon: epsilon = {}'.format(eps))
+        return fitSweepSolve(fp,MAA,MBB,data['weight'],eps,qpSolver,nEquator,cuttingPlane,cacheDir,warmStart,True,tolKG,refineLevels)
+    rec=fSolve(epsilon)
+    if(rec['convex']):
+        while(rec['epsilon']-dEpsilon>=minEpsilon-1.0e-12):
+            recNext=fSolve(max(round(rec['epsilon']-dEpsilon,12),minEpsilon))
+            if(not recNext['convex']):break
+            rec=recNext
+    else:
+        while(not rec['convex'] and rec['epsilon']+dEpsilon<=maxEpsilon+1.0e-12):
+            rec=fSolve(round(rec['epsilon']+dEpsilon,12))
+        if(not rec['convex']):
+            print("WARNING from 'fitMinEpsilon': no convex model found for epsilon <= {}".format(maxEpsilon))
+    print('fitMinEpsilon: epsilon = {}, minimum Gaussian curvature = {}'.format(rec['epsilon'],rec['cvxCheck'][3]))
+    return rec
+
+
+'''
+function:'fitGramParts'
+--Calculates the unit-weight products of the block of rows 'vv' (targets 'vb') that do not depend on the values of the fixed coefficients:
+  Af'*Af, Af'*Ax and Af'*vb (Af=vv[:,vFree], Ax=vv[:,vFixed]); the right side of the block is then Af'*vb-Af'*Ax*cFixed (see 'fitGram')
+'''
+def fitGramParts(vv,vb,vFree,vFixed):
+    nRow=vv.shape[0]
+    MAA,MBX=weightedGram(vv,np.hstack((vv[:,vFixed],vb.reshape((nRow,1)))),np.ones(nRow),vCol=vFree)
+    return MAA,MBX[:,0:-1],MBX[:,-1:]
+
+
+'''
+class:'SHYqpSession'
+--Incremental calibration: keeps the SHYqp fit of a material in memory, so that the model is re-fitted quickly 
+  after a modification of a few input values (e.g., one r-value, one biaxial stress or one shape parameter)
+----the least-squares rows are grouped by the input data they are calculated from (the owners, see 'fitBlocksSHYqp');
+    a modified value recalculates only the rows of its owners (and the directional curves and the proto-model, if they depend on it);
+----the normal equations are sums of the unit-weight products of the blocks (see 'fitGramParts'): only the products of the recalculated rows change;
+----the fixed coefficients (cP0,cP1,cQ0,cQ1: sC0, rT0, rC0) only shift the right sides and the bounds of the constraints;
+----the constraints are generated once (cuttingPlane=True: the basis of the grid and the generated constraints are kept, see 'solveQPCuttingPlane')
+    and each solve is warm-started from the previous solution (see 'solveQP')
+--data: the data structure returned by 'readData' (the session works on its own copy)
+--solve(): returns the SHYqp coefficients of the current data (vCoeff,ddMon,nQ,nP), as 'dataFitSHYqp' and 'dataFitSHYqpSymm'
+--update(changes): modifies the input values of the dictionary 'changes' and returns 'solve()'; the keys are the names of the input file:
+----'sT45','rT45','sC22.5',... (directional data; the stresses are relative to sT0, as in 'data'; sT0 itself cannot be changed),
+    'sTb','rTb','sCb','rCb','LTAN','LUAX','LBAX','LBAX1',...,'LBAX4','ww','DEG' and 'fileData' (the (sxx,syy,sxy) points, relative to sT0);
+----'DEG' recalculates everything (new rows and constraints);
+----raises 'DataFormatError' for an unknown key and 'NonConvexDataError' (see 'protoData'); the session is then unchanged
+--The current data are kept in 'data', 'uaxData' and 'lbd' (e.g., for 'SHYqp_Predictions' and the plots)
+--Usage: ss=SHYqpSession(data); vCoeff,ddMon,nQ,nP=ss.solve(); vCoeff,ddMon,nQ,nP=ss.update({'rT45':0.85})
+'''
+class SHYqpSession:
+    def __init__(self,data,qpSolver='cvxopt',nEquator=200,epsilon=0.01,cuttingPlane=True,cacheDir=None,nPIplaneSections=31,nSections=15,
+                 symmetry=None):
+        self.qpSolver=qpSolver;self.nEquator=nEquator;self.epsilon=epsilon
+        self.cuttingPlane=cuttingPlane;self.cacheDir=cacheDir;self.symmetry=symmetry
+        self.nPIplaneSections=nPIplaneSections;self.nSections=nSections
+        self.data=self.copyData(data)
+        self.uaxData=uaxLambda(self.data)
+        self.lbd=protoData(self.uaxData,nPIplaneSections)[0]
+        self.setup()
+
+    @staticmethod
+    def copyData(data):
+        dd=dict(data)
+        for key in ('sT','rT','sC','rC','thetaT','thetaC'):dd[key]=dict(data[key])
+        if(not data['assym']):
+            dd['sC']=dd['sT'];dd['rC']=dd['rT'];dd['thetaC']=dd['thetaT']
+        dd['shapeVBAX']=np.array(data['shapeVBAX']);dd['fileData']=np.array(data['fileData'])
+        return dd
+
+    def setup(self):
+        self.fp=fitProblem(self.data,self.uaxData,self.lbd,nSections=self.nSections,symmetry=self.symmetry)
+        self.vGram=self.blockGrams(self.data,self.uaxData,self.lbd)
+        self.warmStart={}
+        fp=self.fp
+        if(self.cuttingPlane):
+            self.basis=constraintBasis(fp['ddMon'],fp['degQ'],self.nEquator,self.cacheDir,fp['symmetry'],fp['nPqp'])
+            return
+        ##all the columns (the fixed ones last): the bounds are then recalculated for any cFixed and epsilon
+        nFree=len(fp['vFree']);vCol=fp['vFree']+fp['vFixed']
+        if(self.qpSolver=='cvxoptSOC'):
+            MCC,MUB=genConstraintsSOC2D(fp['ddMon'],fp['degQ'],fp['nPqp'],vCol,[],np.zeros(0),self.nEquator,0.0,self.cacheDir,fp['symmetry'])
+        else:
+            MCC,MUB=constraintMatrix(fp['ddMon'],fp['degQ'],fp['nPqp'],vCol,[],np.zeros(0),self.nEquator,0.0,self.cacheDir,fp['symmetry'])
+        self.cons={'MCC':np.ascontiguousarray(MCC[:,0:nFree]),'MFix':np.ascontiguousarray(MCC[:,nFree:]),'MUB':np.array(MUB)}
+
+    def blockGrams(self,data,uaxData,lbd,vOwner=None):
+        fp=self.fp
+        if(data['assym']):
+            vBlocks=fitBlocksSHYqp(data,uaxData,lbd,fp['ddMon'],fp['degQ'],vOwner)[0]
+        else:
+            vBlocks=fitBlocksSHYqpSymm(data,uaxData,lbd,fp['ddMon'],fp['degQ'],self.nSections,vOwner)[0]
+        vGram={owner:[] for owner in vOwner} if(vOwner) else {}
+        for vv,vb,kind,owner in vBlocks:
+            vGram.setdefault(owner,[]).append((kind,vv.shape[0])+fitGramParts(vv,vb,fp['vFree'],fp['vFixed']))
+        return vGram
+
+    def setValue(self,data,key,val):
+        assym=data['assym']
+        if(key=='DEG'):
+            data['DEG']=int(val);return set(),False
+        if(key=='ww'):
+            data['weight']=val;return set(),False
+        if(key in ('LTAN','LUAX')):
+            data['shapeTAN' if key=='LTAN' else 'shapeUAX']=val;return {'uaxT','uaxC','YS'},True
+        if(key=='LBAX'):
+            data['shapeBAX']=val;return {'YS'},True
+        if(key in ('LBAX1','LBAX2','LBAX3','LBAX4')):
+            vIdx=np.array([0,1,0,2,3,2] if assym else [0,1,0,0,1,0])
+            data['shapeVBAX'][vIdx==int(key[4])-1]=val;return {'YS'},False
+        if(key=='fileData'):
+            data['fileData']=np.array(val,dtype=float).reshape((-1,3));return {'ZZ'},False
+        if(key[0:1] in ('s','r') and key[1:2] in ('T','C')):
+            if(key[1]=='C' and not assym):
+                raise DataFormatError("{}: the material is symmetric (use the tension value '{}T{}')".format(key,key[0],key[2:]))
+            if(key[2:]=='b'):
+                data[key]=val;data['w'+key]=1
+                if(not assym):data[key[0]+'Cb']=val;data['w'+key[0]+'Cb']=1
+                return {'bax'+key[1],'YS'},True
+            if(key[2:] in data['theta'+key[1]]):
+                if(key=='sT0'):
+                    raise DataFormatError('sT0: the stresses are relative to sT0 (read the modified input file instead)')
+                data[key[0:2]][key[2:]]=val;return {'uax'+key[1],'YS'},True
+        raise DataFormatError("SHYqpSession: unknown (or missing) input value '{}'".format(key))
+
+    @profiled('SHYqpSession.update')
+    def update(self,changes):
+        data=self.copyData(self.data)
+        vOwner=set();newProto=False
+        for key in changes:
+            vv,pp=self.setValue(data,key,changes[key])
+            vOwner|=vv;newProto=newProto or pp
+        uaxData=uaxLambda(data)
+        lbd=protoData(uaxData,self.nPIplaneSections)[0] if(newProto) else self.lbd
+        if('DEG' in changes):
+            self.data,self.uaxData,self.lbd=data,uaxData,lbd
+            print('SHYqpSession: DEG = {}, all the rows and constraints are recalculated'.format(data['DEG']))
+            self.setup()
+            return self.solve()
+        vGram=self.blockGrams(data,uaxData,lbd,vOwner) if(vOwner) else {}
+        cFixed=fitFixedCoeff(data,self.fp['degQ'])[1]
+        self.data,self.uaxData,self.lbd=data,uaxData,lbd
+        self.vGram.update(vGram);self.fp['cFixed']=cFixed
+        print('SHYqpSession: modified {}; recalculated rows: {}'.format(', '.join(changes),', '.join(sorted(vGram)) if vGram else 'none'))
+        return self.solve()
+
+    def normalEquations(self):
+        cF=self.fp['cFixed'].reshape((-1,1))
+        self.fp['vGram']=[(kind,nRow,MAAk,Mbk-np.dot(MAXk,cF)) for owner in self.vGram for kind,nRow,MAAk,MAXk,Mbk in self.vGram[owner]]
+        return fitNormalEquations(self.fp,self.data['weight'])
+
+    @profiled('SHYqpSession.solve')
+    def solve(self):
+        fp=self.fp
+        MAA,MBB=self.normalEquations()
+        print("{}: Calculating SHYqp parameters (warm start)....".format(self.qpSolver))
+        if(self.cuttingPlane):
+            vsq=solveQPCuttingPlane(MAA,MBB,fp['ddMon'],fp['degQ'],fp['nPqp'],fp['nQ'],fp['vFree'],fp['vFixed'],fp['cFixed'],self.qpSolver,
+                                    self.nEquator,self.epsilon,warmStart=self.warmStart,symmetry=fp['symmetry'],basis=self.basis)
+        else:
+            cons=self.cons
+            MUB=(1.0-self.epsilon)*cons['MUB']-np.dot(cons['MFix'],fp['cFixed'].reshape((-1,1)))
+            vsq=solveQP(MAA,MBB,cons['MCC'],MUB,self.qpSolver,self.warmStart)
+        self.vCoeff=fitCoeff(fp,vsq)
+        return self.vCoeff,fp['ddMon'],fp['nQ'],fp['nP']
+
+
+'''
+function:'SHYqp_uax_PlotData'
+--Calculates the plot data of 'SHYqp_uax_Plot' (see 'renderPlot'): the directional properties of the SHYqp model and the data points
+'''
+def SHYqp_uax_PlotData(uaxData,vCoeff,ddMon,nQ,nP):
     degQ=ddMon['nQ']
     degQm1=degQ-1;degPm1=degQ-2
     sq3=np.sqrt(3.0);sq6=np.sqrt(6.0);sq2=np.sqrt(2.0)
@@ -1644,19 +2509,16 @@ def SHYqp_uax_Plot(uaxData,vCoeff,ddMon,nQ,nP,savePng=False):
     vu[:,1]=0.5*sq3*sTheta**2
     vu[:,2]=sq3*cTheta*sTheta
     vu3=vu[:,2]**2
-    vMon=np.zeros((nTheta,nP))
-    vMonD1=np.zeros((nTheta,nP));vMonD2=np.zeros((nTheta,nP))
+    vPow=monomialPowers(vu[:,0:2],degQ)
     vTerms=np.zeros((nTheta,nPidx))
     vTermsD1=np.zeros((nTheta,nPidx));vTermsD2=np.zeros((nTheta,nPidx));vTermsD3=np.zeros((nTheta,nPidx))
-    for k in range(nP):
-        vMon[:,k]=vu[:,0]**vP[k][0]*vu[:,1]**vP[k][1]
-        vMonD1[:,k]=vC1P[k]*vu[:,0]**vD1P[k][0]*vu[:,1]**vD1P[k][1]
-        vMonD2[:,k]=vC2P[k]*vu[:,0]**vD2P[k][0]*vu[:,1]**vD2P[k][1]
+    vMon=monomialEval(vPow,vP)
+    vMonD1=monomialEval(vPow,vD1P,vC1P);vMonD2=monomialEval(vPow,vD2P,vC2P)
     for k in range(nPidx):
-        vTerms[:,k]=np.dot(vMon[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD1[:,k]=np.dot(vMonD1[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD2[:,k]=np.dot(vMonD2[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD3[:,k]=vC3P[vPidx[k][1][0]]*vTerms[:,k]    
+        vTerms[:,k]=np.dot(vMon[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD1[:,k]=np.dot(vMonD1[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD2[:,k]=np.dot(vMonD2[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD3[:,k]=vC3P[vPidx[k,1]]*vTerms[:,k]    
     vvP=vTerms[:,-1];vPD1=vTermsD1[:,-1];vPD2=vTermsD2[:,-1];vPD3=vTermsD3[:,-1]
     for k in range(nPidx-2,-1,-1):
         vvP[:]=vTerms[:,k]+vu3*vvP
@@ -1665,19 +2527,15 @@ def SHYqp_uax_Plot(uaxData,vCoeff,ddMon,nQ,nP,savePng=False):
     for k in range(nPidx-2,0,-1):        
         vPD3[:]=vTermsD3[:,k]+vu3*vPD3
     vPD3[:]*=vu[:,2]    
-    vMon=np.zeros((nTheta,nQ))
-    vMonD1=np.zeros((nTheta,nQ));vMonD2=np.zeros((nTheta,nQ))
     vTerms=np.zeros((nTheta,nQidx))
     vTermsD1=np.zeros((nTheta,nQidx));vTermsD2=np.zeros((nTheta,nQidx));vTermsD3=np.zeros((nTheta,nQidx))
-    for k in range(nQ):
-        vMon[:,k]=vu[:,0]**vQ[k][0]*vu[:,1]**vQ[k][1]
-        vMonD1[:,k]=vC1Q[k]*vu[:,0]**vD1Q[k][0]*vu[:,1]**vD1Q[k][1]
-        vMonD2[:,k]=vC2Q[k]*vu[:,0]**vD2Q[k][0]*vu[:,1]**vD2Q[k][1]
+    vMon=monomialEval(vPow,vQ)
+    vMonD1=monomialEval(vPow,vD1Q,vC1Q);vMonD2=monomialEval(vPow,vD2Q,vC2Q)
     for k in range(nQidx):
-        vTerms[:,k]=np.dot(vMon[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD1[:,k]=np.dot(vMonD1[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD2[:,k]=np.dot(vMonD2[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD3[:,k]=vC3Q[vQidx[k][1][0]]*vTerms[:,k]        
+        vTerms[:,k]=np.dot(vMon[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD1[:,k]=np.dot(vMonD1[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD2[:,k]=np.dot(vMonD2[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD3[:,k]=vC3Q[vQidx[k,1]]*vTerms[:,k]        
     vvQ=vTerms[:,-1];vQD1=vTermsD1[:,-1];vQD2=vTermsD2[:,-1];vQD3=vTermsD3[:,-1]
     for k in range(nQidx-2,-1,-1):
         vvQ[:]=vTerms[:,k]+vu3*vvQ
@@ -1697,19 +2555,16 @@ def SHYqp_uax_Plot(uaxData,vCoeff,ddMon,nQ,nP,savePng=False):
     vu[:,0]=-vu[:,0]
     vu[:,1]=-vu[:,1]
     vu[:,2]=-vu[:,2]
-    vMon=np.zeros((nTheta,nP))
-    vMonD1=np.zeros((nTheta,nP));vMonD2=np.zeros((nTheta,nP))
+    vPow=monomialPowers(vu[:,0:2],degQ)
     vTerms=np.zeros((nTheta,nPidx))
     vTermsD1=np.zeros((nTheta,nPidx));vTermsD2=np.zeros((nTheta,nPidx));vTermsD3=np.zeros((nTheta,nPidx))
-    for k in range(nP):
-        vMon[:,k]=vu[:,0]**vP[k][0]*vu[:,1]**vP[k][1]
-        vMonD1[:,k]=vC1P[k]*vu[:,0]**vD1P[k][0]*vu[:,1]**vD1P[k][1]
-        vMonD2[:,k]=vC2P[k]*vu[:,0]**vD2P[k][0]*vu[:,1]**vD2P[k][1]
+    vMon=monomialEval(vPow,vP)
+    vMonD1=monomialEval(vPow,vD1P,vC1P);vMonD2=monomialEval(vPow,vD2P,vC2P)
     for k in range(nPidx):
-        vTerms[:,k]=np.dot(vMon[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD1[:,k]=np.dot(vMonD1[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD2[:,k]=np.dot(vMonD2[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD3[:,k]=vC3P[vPidx[k][1][0]]*vTerms[:,k]    
+        vTerms[:,k]=np.dot(vMon[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD1[:,k]=np.dot(vMonD1[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD2[:,k]=np.dot(vMonD2[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD3[:,k]=vC3P[vPidx[k,1]]*vTerms[:,k]    
     vvP=vTerms[:,-1];vPD1=vTermsD1[:,-1];vPD2=vTermsD2[:,-1];vPD3=vTermsD3[:,-1]
     for k in range(nPidx-2,-1,-1):
         vvP[:]=vTerms[:,k]+vu3*vvP
@@ -1718,19 +2573,15 @@ def SHYqp_uax_Plot(uaxData,vCoeff,ddMon,nQ,nP,savePng=False):
     for k in range(nPidx-2,0,-1):        
         vPD3[:]=vTermsD3[:,k]+vu3*vPD3
     vPD3[:]*=vu[:,2]    
-    vMon=np.zeros((nTheta,nQ))
-    vMonD1=np.zeros((nTheta,nQ));vMonD2=np.zeros((nTheta,nQ))
     vTerms=np.zeros((nTheta,nQidx))
     vTermsD1=np.zeros((nTheta,nQidx));vTermsD2=np.zeros((nTheta,nQidx));vTermsD3=np.zeros((nTheta,nQidx))
-    for k in range(nQ):
-        vMon[:,k]=vu[:,0]**vQ[k][0]*vu[:,1]**vQ[k][1]
-        vMonD1[:,k]=vC1Q[k]*vu[:,0]**vD1Q[k][0]*vu[:,1]**vD1Q[k][1]
-        vMonD2[:,k]=vC2Q[k]*vu[:,0]**vD2Q[k][0]*vu[:,1]**vD2Q[k][1]
+    vMon=monomialEval(vPow,vQ)
+    vMonD1=monomialEval(vPow,vD1Q,vC1Q);vMonD2=monomialEval(vPow,vD2Q,vC2Q)
     for k in range(nQidx):
-        vTerms[:,k]=np.dot(vMon[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD1[:,k]=np.dot(vMonD1[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD2[:,k]=np.dot(vMonD2[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD3[:,k]=vC3Q[vQidx[k][1][0]]*vTerms[:,k]        
+        vTerms[:,k]=np.dot(vMon[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD1[:,k]=np.dot(vMonD1[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD2[:,k]=np.dot(vMonD2[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD3[:,k]=vC3Q[vQidx[k,1]]*vTerms[:,k]        
     vvQ=vTerms[:,-1];vQD1=vTermsD1[:,-1];vQD2=vTermsD2[:,-1];vQD3=vTermsD3[:,-1]
     for k in range(nQidx-2,-1,-1):
         vvQ[:]=vTerms[:,k]+vu3*vvQ
@@ -1748,33 +2599,40 @@ def SHYqp_uax_Plot(uaxData,vCoeff,ddMon,nQ,nP,savePng=False):
     DY=D2/sq2-D1/sq6
     rThetaC=(2*DZ*sTheta*cTheta-DX*sTheta**2-DY*cTheta**2)/(DX+DY)
     vTheta*=180.0/np.pi
+    pd={'vTheta':vTheta,'sigThetaT':sigThetaT,'sigThetaC':sigThetaC,'rThetaT':rThetaT,'rThetaC':rThetaC}
+    for key in ['pointsST','pointsSC','pointsRT','pointsRC']:
+        pd[key]=uaxData[key]
+    pd['vFile']=[figDir+uaxData['name']+'_SHYqp_deg'+str(degQ)+'_UaxS',figDir+uaxData['name']+'_SHYqp_deg'+str(degQ)+'_UaxR']
+    return pd
+
+def SHYqp_uaxRender(pd,plt):
     fgS=plt.figure();axS=fgS.add_subplot(1,1,1)
-    axS.plot(vTheta,sigThetaT,'k-',linewidth=lineWidthUax)
-    axS.plot(uaxData['pointsST'][0,:],uaxData['pointsST'][1,:],'bs',markerfacecolor='b',markersize=6,label='Exp data')
-    axS.plot(vTheta,sigThetaC,'k--',linewidth=lineWidthUax)
-    axS.plot(uaxData['pointsSC'][0,:],uaxData['pointsSC'][1,:],'bo',markerfacecolor='b',markersize=6.5,label='Exp data')
-    ##axS.text(0,0.95*max(uaxData['pointsST'][1,:]),r'$\overline{\sigma}_{\theta}$',fontsize=14) 
+    axS.plot(pd['vTheta'],pd['sigThetaT'],'k-',linewidth=lineWidthUax)
+    axS.plot(pd['pointsST'][0,:],pd['pointsST'][1,:],'bs',markerfacecolor='b',markersize=6,label='Exp data')
+    axS.plot(pd['vTheta'],pd['sigThetaC'],'k--',linewidth=lineWidthUax)
+    axS.plot(pd['pointsSC'][0,:],pd['pointsSC'][1,:],'bo',markerfacecolor='b',markersize=6.5,label='Exp data')
+    ##axS.text(0,0.95*max(pd['pointsST'][1,:]),r'$\overline{\sigma}_{\theta}$',fontsize=14) 
     axS.text(0.022,0.93,r'$\overline{\sigma}_{\theta}$',fontsize=16,
     horizontalalignment='center',verticalalignment='center',transform = axS.transAxes)
-    ##axS.set_ylim([0.9*np.min(uaxData['pointsST'][1,:]),1.05*np.max(uaxData['pointsST'][1,:])])  
-    maxS=np.max([np.max(uaxData['pointsST'][1,:]),np.max(uaxData['pointsSC'][1,:]),np.max(sigThetaT),np.max(sigThetaC)])
-    minS=np.min([np.min(uaxData['pointsST'][1,:]),np.min(uaxData['pointsSC'][1,:]),np.min(sigThetaT),np.min(sigThetaC)])
+    ##axS.set_ylim([0.9*np.min(pd['pointsST'][1,:]),1.05*np.max(pd['pointsST'][1,:])])  
+    maxS=np.max([np.max(pd['pointsST'][1,:]),np.max(pd['pointsSC'][1,:]),np.max(pd['sigThetaT']),np.max(pd['sigThetaC'])])
+    minS=np.min([np.min(pd['pointsST'][1,:]),np.min(pd['pointsSC'][1,:]),np.min(pd['sigThetaT']),np.min(pd['sigThetaC'])])
     axS.set_ylim([0.97*minS,1.03*maxS])   
     axS.set_xticks([0,15,30,45,60,75,90])
     axS.set_xticklabels(['$0^o$','$15^o$','$30^o$','$45^o$','$60^o$','$75^o$','$90^o$'],fontsize=12) 
     axS.tick_params(axis="y", labelsize=12)    
     axS.grid()
     fgR=plt.figure();axR=fgR.add_subplot(1,1,1)
-    axR.plot(vTheta,rThetaT,'k-',linewidth=lineWidthUax)
-    axR.plot(uaxData['pointsRT'][0,:],uaxData['pointsRT'][1,:],'bs',markerfacecolor='b',markersize=6,label='Exp data')
-    axR.plot(vTheta,rThetaC,'k--',linewidth=lineWidthUax)
-    axR.plot(uaxData['pointsRC'][0,:],uaxData['pointsRC'][1,:],'bo',markerfacecolor='b',markersize=6.5,label='Exp data') 
-    ##axR.text(0,0.95*max(uaxData['pointsRT'][1,:]),r'$r_{\theta}$',fontsize=14) 
-    ##axR.set_ylim([0.9*np.min(uaxData['pointsRT'][1,:]),1.05*np.max(uaxData['pointsRT'][1,:])])     
+    axR.plot(pd['vTheta'],pd['rThetaT'],'k-',linewidth=lineWidthUax)
+    axR.plot(pd['pointsRT'][0,:],pd['pointsRT'][1,:],'bs',markerfacecolor='b',markersize=6,label='Exp data')
+    axR.plot(pd['vTheta'],pd['rThetaC'],'k--',linewidth=lineWidthUax)
+    axR.plot(pd['pointsRC'][0,:],pd['pointsRC'][1,:],'bo',markerfacecolor='b',markersize=6.5,label='Exp data') 
+    ##axR.text(0,0.95*max(pd['pointsRT'][1,:]),r'$r_{\theta}$',fontsize=14) 
+    ##axR.set_ylim([0.9*np.min(pd['pointsRT'][1,:]),1.05*np.max(pd['pointsRT'][1,:])])     
     axR.text(0.022,0.92,r'$r_{\theta}$',fontsize=16,
     horizontalalignment='center',verticalalignment='center',transform = axR.transAxes)
-    maxR=np.max([np.max(uaxData['pointsRT'][1,:]),np.max(uaxData['pointsRC'][1,:]),np.max(rThetaT),np.max(rThetaC)])
-    minR=np.min([np.min(uaxData['pointsRT'][1,:]),np.min(uaxData['pointsRC'][1,:]),np.min(rThetaT),np.min(rThetaC)])
+    maxR=np.max([np.max(pd['pointsRT'][1,:]),np.max(pd['pointsRC'][1,:]),np.max(pd['rThetaT']),np.max(pd['rThetaC'])])
+    minR=np.min([np.min(pd['pointsRT'][1,:]),np.min(pd['pointsRC'][1,:]),np.min(pd['rThetaT']),np.min(pd['rThetaC'])])
     if(minR<0.5):
         axR.set_ylim([-0.1,1.05*maxR])
     else:
@@ -1783,70 +2641,109 @@ def SHYqp_uax_Plot(uaxData,vCoeff,ddMon,nQ,nP,savePng=False):
     axR.set_xticklabels(['$0^o$','$15^o$','$30^o$','$45^o$','$60^o$','$75^o$','$90^o$'],fontsize=12)
     axR.tick_params(axis="y", labelsize=12)     
     axR.grid()
-    if(savePng):
-        fgS.savefig('{name}.{ext}'.format(name=figDir+uaxData['name']+'_SHYqp_deg'+str(degQ)+'_UaxS',ext='png'),dpi=300,bbox_inches='tight') 
-        fgR.savefig('{name}.{ext}'.format(name=figDir+uaxData['name']+'_SHYqp_deg'+str(degQ)+'_UaxR',ext='png'),dpi=300,bbox_inches='tight')    
+    return [fgS,fgR]
+
+'''
+function:'SHYqp_uax_Plot'
+--Plots the directional properties (uniaxial yield stress and r-value) of the SHYqp model
+--If a 'queue' (see 'RenderQueue') is provided the figures are rendered and saved (png) by the queue, in background
+'''
+@profiled()
+def SHYqp_uax_Plot(uaxData,vCoeff,ddMon,nQ,nP,savePng=False,queue=None):
+    pd=SHYqp_uax_PlotData(uaxData,vCoeff,ddMon,nQ,nP)
+    if(queue is not None):
+        return queue.submit('SHYqp_uax',pd)
+    renderPlot('SHYqp_uax',pd,savePng)
     return
 
 
-def SHYqp_bax_Plot(vCoeff,ddMon,nQ,nP,assym,name,savePng=False):
-    sq3=np.sqrt(3.0);sq32=np.sqrt(1.5);sq6=np.sqrt(6.0);sq2=np.sqrt(2.0)
-    vP=ddMon['vP'];vPidx=ddMon['vPidx'];nPidx=len(vPidx)##;print("vPidx\n",vPidx)
-    vQ=ddMon['vQ'];vQidx=ddMon['vQidx'];nQidx=len(vQidx)##;print("vQidx\n",vQidx)
-    nx=400
-    x=np.linspace(-1.5,1.5,nx)
-    y=np.linspace(-1.5,1.5,nx)
-    nSamples=nx*nx    
-    vx,vy=np.meshgrid(x,y)
-    vx=vx.reshape(nSamples)
-    vy=vy.reshape(nSamples)
-    zz=np.zeros(nSamples)
-    vx=(2.0*vx-vy)/sq6;vy=vy/sq2;vx2y2=vx**2+vy**2
-    if(assym):
-        vsxy=np.linspace(0,1/(sq3*(1.0+vCoeff[-1])),6)  ##;print("c=",vCoeff[-1])
-    else:  
-        vsxy=np.linspace(0,0.965/(sq3*(1.0+vCoeff[-1])),7) 
-        ##vsxy=np.linspace(0,0.9999/(sq3*(1.0+vCoeff[-1])),11)        
-    vMod=np.zeros(nSamples)
-    vux=np.zeros(nSamples);vuy=np.zeros(nSamples);vuz=np.zeros(nSamples)
-    vMonP=np.zeros((nSamples,nP));vTermsP=np.zeros((nSamples,nPidx))
-    vMonQ=np.zeros((nSamples,nQ));vTermsQ=np.zeros((nSamples,nQidx))
-    print("Calculating biaxial sections for plots...")
-    fg=plt.figure();ax=fg.add_subplot(1,1,1)
+'''
+function:'SHYqp_bax_Sections'
+--Calculates the biaxial sections (sigma_xx,sigma_yy) of the SHYqp yield surface at the shear stress levels 'vsxy' (any list)
+--Each point of a section is the intersection of the ray (r*cos(t),r*sin(t),sigma_xy), r>0, with the yield surface f=1 ('nRays' rays):
+----sigma_xy=0: r=1/f(cos(t),sin(t),0) (f is 1-homogeneous)
+----sigma_xy>0: Newton iterations on r, started from the sigma_xy=0 value; since f is convex and even in sigma_xy,
+    the start is on the right of the root and the iterations decrease monotonically to it
+--Returns the list of sections as closed polylines, (nRays+1,2)-arrays [sigma_xx,sigma_yy];
+  None for a level beyond the yield stress in pure shear (f(0,0,sigma_xy)>=1: no section)
+--A warning is printed if the Newton iterations of a section do not converge within 'nIter' iterations
+'''
+def SHYqp_bax_Sections(vCoeff,ddMon,nQ,nP,vsxy,nRays=360,tol=1.0e-12,nIter=50,model=None):
+    if(model is None):model=SHYqpModel(vCoeff,ddMon,nQ,nP)
+    vt=np.linspace(0,2*np.pi,nRays+1)[0:nRays]
+    vDir=np.zeros((nRays,3));vDir[:,0]=np.cos(vt);vDir[:,1]=np.sin(vt)
+    r0=1.0/model.value(vDir)
+    vSections=[]
     for sxy in vsxy:
         print("--section sigma_xy = {}".format(sxy))
-        vMod[:]=np.sqrt(vx2y2+2*sxy**2)
-        vux[:]=vx/vMod;vuy[:]=vy/vMod;vuz[:]=(2*sxy**2)/vMod**2
-        for k in range(nP):
-            vMonP[:,k]=vux**vP[k][0]*vuy**vP[k][1]
-        for k in range(nPidx):
-            vTermsP[:,k]=np.dot(vMonP[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vsP=vTermsP[:,-1]
-        for k in range(nPidx-2,-1,-1):
-            ##print("vsP[{}]".format(k),vsP)
-            vsP[:]=vTermsP[:,k]+vuz*vsP
-        for k in range(nQ):
-            vMonQ[:,k]=vux**vQ[k][0]*vuy**vQ[k][1]
-        for k in range(nQidx):
-            vTermsQ[:,k]=np.dot(vMonQ[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        ##vTermsQ[:,nQidx-1]=vCoeff[-1]        
-        ##print("check vCoeff:",vCoeff[nP+vQidx[2][1][0]:nP+vQidx[2][1][-1]]);print(nP+vQidx[2][1][0],nP+vQidx[2][1][-1]);print(vMonQ[:,-1]) ;exit()           
-        vsQ=vTermsQ[:,-1]
-        for k in range(nQidx-2,-1,-1):
-            ##print("vsQ[{}]".format(k),vsQ)
-            vsQ[:]=vTermsQ[:,k]+vuz*vsQ
-        zz[:]=sq32*vMod*(1.0+vsP+vsQ)
-        ax.contour(x,y,zz.reshape(nx,nx),levels=[1])
+        if(sxy!=0.0 and model.value(np.array([0.0,0.0,sxy]))[0]>=1.0):
+            vSections.append(None);continue
+        vr=r0.copy()
+        if(sxy!=0.0):
+            vSigma=vDir*vr[:,None];vSigma[:,2]=sxy
+            for it in range(nIter):
+                vF,vG=model.evaluate(vSigma,1)
+                vr-=(vF-1.0)/np.sum(vG[:,0:2]*vDir[:,0:2],axis=1)
+                vSigma[:,0:2]=vDir[:,0:2]*vr[:,None]
+                if(np.max(np.abs(vF-1.0))<tol):break
+            else:
+                print("WARNING from 'SHYqp_bax_Sections': section sigma_xy = {} not converged after {} iterations (max|f-1| = {})".format(
+                      sxy,nIter,np.max(np.abs(model.value(vSigma)-1.0))))
+        vSection=vDir[:,0:2]*vr[:,None]
+        vSections.append(np.concatenate((vSection,vSection[0:1]),axis=0))
+    return vSections
+
+
+'''
+function:'SHYqp_bax_PlotData'
+--Calculates the plot data of 'SHYqp_bax_Plot' (see 'renderPlot'): the biaxial sections at the shear stress levels 'vsxy'
+'''
+def SHYqp_bax_PlotData(vCoeff,ddMon,nQ,nP,assym,name,vsxy=None):
+    sq3=np.sqrt(3.0)
+    if(vsxy is None):
+        if(assym):
+            vsxy=np.linspace(0,1/(sq3*(1.0+vCoeff[-1])),6)  ##;print("c=",vCoeff[-1])
+        else:  
+            vsxy=np.linspace(0,0.965/(sq3*(1.0+vCoeff[-1])),7) 
+            ##vsxy=np.linspace(0,0.9999/(sq3*(1.0+vCoeff[-1])),11)        
+    print("Calculating biaxial sections for plots...")
+    vSections=SHYqp_bax_Sections(vCoeff,ddMon,nQ,nP,vsxy)
+    return {'vSections':[vSection for vSection in vSections if vSection is not None],
+            'vFile':[figDir+name+'_SHYqp_deg'+str(ddMon['nQ'])+'_Biax']}
+
+def SHYqp_baxRender(pd,plt):
+    fg=plt.figure();ax=fg.add_subplot(1,1,1)
+    for vSection in pd['vSections']:
+        ax.plot(vSection[:,0],vSection[:,1])
     ax.set_aspect('equal')
     ax.grid()
     ax.text(0.06,0.925,r'$\overline{\sigma}_{yy}$',fontsize=16,
     horizontalalignment='center',verticalalignment='center',transform = ax.transAxes)
     ax.text(0.94,0.05,r'$\overline{\sigma}_{xx}$',fontsize=16,
     horizontalalignment='center',verticalalignment='center',transform = ax.transAxes)
-    if(savePng):
-        fg.savefig('{name}.{ext}'.format(name=figDir+name+'_SHYqp_deg'+str(ddMon['nQ'])+'_Biax',ext='png'),dpi=300,bbox_inches='tight')
+    return [fg]
+
+'''
+function:'SHYqp_bax_Plot'
+--Plots the biaxial sections of the SHYqp yield surface (see 'SHYqp_bax_Sections') 
+--vsxy: the shear stress levels of the sections; default: from zero to (about) the yield stress in pure shear 
+--If a 'queue' (see 'RenderQueue') is provided the figure is rendered and saved (png) by the queue, in background
+'''
+@profiled()
+def SHYqp_bax_Plot(vCoeff,ddMon,nQ,nP,assym,name,savePng=False,vsxy=None,queue=None):
+    pd=SHYqp_bax_PlotData(vCoeff,ddMon,nQ,nP,assym,name,vsxy)
+    if(queue is not None):
+        return queue.submit('SHYqp_bax',pd)
+    renderPlot('SHYqp_bax',pd,savePng)
     return
 
+'''
+function:'SHYqp_Predictions'
+--Writes the report file (*_Err_and_Coeff.txt: convexity check, predictions vs data, coefficients) 
+  and the binary model file (*_Model.shyqp, see 'saveModel') of the SHYqp model
+--fileCoeff: optional file of coefficients replacing 'vCoeff' (a binary model file or a text file with one coefficient per line)
+'''
+@profiled()
 def SHYqp_Predictions(uaxData,vCoeff,ddMon,nQ,nP,qpSolver,cvxCheck,fileCoeff=None):
     degQ=ddMon['nQ']
     degQm1=degQ-1;degPm1=degQ-2
@@ -1857,12 +2754,13 @@ def SHYqp_Predictions(uaxData,vCoeff,ddMon,nQ,nP,qpSolver,cvxCheck,fileCoeff=Non
     vQ=ddMon['vQ'];vQidx=ddMon['vQidx'];nQidx=len(vQidx)
     vD1Q=ddMon['vD1Q'];vD2Q=ddMon['vD2Q'];vD3Q=ddMon['vD3Q']
     vC1Q=ddMon['vC1Q'];vC2Q=ddMon['vC2Q'];vC3Q=ddMon['vC3Q']
-    if(fileCoeff):
+    if(fileCoeff and isModelFile(fileCoeff)):
+        vCoeff=np.array(readModel(fileCoeff)['vCoeff'])
+    elif(fileCoeff):
         try:
             ff=open(fileCoeff,'r')
         except IOError as err:
-            print(err)
-            print('SHYqp_Predictions: early exit (with no report)')
+            raise DataFormatError('SHYqp_Predictions: cannot read the coefficients file: {}'.format(err))
         vCoeff=np.zeros(nP+nQ)
         k=0        
         for line in ff:
@@ -1877,19 +2775,16 @@ def SHYqp_Predictions(uaxData,vCoeff,ddMon,nQ,nP,qpSolver,cvxCheck,fileCoeff=Non
     vu[:,1]=0.5*sq3*sTheta**2
     vu[:,2]=sq3*cTheta*sTheta
     vu3=vu[:,2]**2
-    vMon=np.zeros((nTheta,nP))
-    vMonD1=np.zeros((nTheta,nP));vMonD2=np.zeros((nTheta,nP))
+    vPow=monomialPowers(vu[:,0:2],degQ)
     vTerms=np.zeros((nTheta,nPidx))
     vTermsD1=np.zeros((nTheta,nPidx));vTermsD2=np.zeros((nTheta,nPidx));vTermsD3=np.zeros((nTheta,nPidx))
-    for k in range(nP):
-        vMon[:,k]=vu[:,0]**vP[k][0]*vu[:,1]**vP[k][1]
-        vMonD1[:,k]=vC1P[k]*vu[:,0]**vD1P[k][0]*vu[:,1]**vD1P[k][1]
-        vMonD2[:,k]=vC2P[k]*vu[:,0]**vD2P[k][0]*vu[:,1]**vD2P[k][1]
+    vMon=monomialEval(vPow,vP)
+    vMonD1=monomialEval(vPow,vD1P,vC1P);vMonD2=monomialEval(vPow,vD2P,vC2P)
     for k in range(nPidx):
-        vTerms[:,k]=np.dot(vMon[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD1[:,k]=np.dot(vMonD1[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD2[:,k]=np.dot(vMonD2[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD3[:,k]=vC3P[vPidx[k][1][0]]*vTerms[:,k]    
+        vTerms[:,k]=np.dot(vMon[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD1[:,k]=np.dot(vMonD1[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD2[:,k]=np.dot(vMonD2[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD3[:,k]=vC3P[vPidx[k,1]]*vTerms[:,k]    
     vvP=vTerms[:,-1];vPD1=vTermsD1[:,-1];vPD2=vTermsD2[:,-1];vPD3=vTermsD3[:,-1]
     for k in range(nPidx-2,-1,-1):
         vvP[:]=vTerms[:,k]+vu3*vvP
@@ -1898,19 +2793,15 @@ def SHYqp_Predictions(uaxData,vCoeff,ddMon,nQ,nP,qpSolver,cvxCheck,fileCoeff=Non
     for k in range(nPidx-2,0,-1):        
         vPD3[:]=vTermsD3[:,k]+vu3*vPD3
     vPD3[:]*=vu[:,2]    
-    vMon=np.zeros((nTheta,nQ))
-    vMonD1=np.zeros((nTheta,nQ));vMonD2=np.zeros((nTheta,nQ))
     vTerms=np.zeros((nTheta,nQidx))
     vTermsD1=np.zeros((nTheta,nQidx));vTermsD2=np.zeros((nTheta,nQidx));vTermsD3=np.zeros((nTheta,nQidx))
-    for k in range(nQ):
-        vMon[:,k]=vu[:,0]**vQ[k][0]*vu[:,1]**vQ[k][1]
-        vMonD1[:,k]=vC1Q[k]*vu[:,0]**vD1Q[k][0]*vu[:,1]**vD1Q[k][1]
-        vMonD2[:,k]=vC2Q[k]*vu[:,0]**vD2Q[k][0]*vu[:,1]**vD2Q[k][1]
+    vMon=monomialEval(vPow,vQ)
+    vMonD1=monomialEval(vPow,vD1Q,vC1Q);vMonD2=monomialEval(vPow,vD2Q,vC2Q)
     for k in range(nQidx):
-        vTerms[:,k]=np.dot(vMon[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD1[:,k]=np.dot(vMonD1[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD2[:,k]=np.dot(vMonD2[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD3[:,k]=vC3Q[vQidx[k][1][0]]*vTerms[:,k]        
+        vTerms[:,k]=np.dot(vMon[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD1[:,k]=np.dot(vMonD1[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD2[:,k]=np.dot(vMonD2[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD3[:,k]=vC3Q[vQidx[k,1]]*vTerms[:,k]        
     vvQ=vTerms[:,-1];vQD1=vTermsD1[:,-1];vQD2=vTermsD2[:,-1];vQD3=vTermsD3[:,-1]
     for k in range(nQidx-2,-1,-1):
         vvQ[:]=vTerms[:,k]+vu3*vvQ
@@ -1935,19 +2826,16 @@ def SHYqp_Predictions(uaxData,vCoeff,ddMon,nQ,nP,qpSolver,cvxCheck,fileCoeff=Non
     vu[:,1]=-0.5*sq3*sTheta**2
     vu[:,2]=-sq3*cTheta*sTheta
     vu3=vu[:,2]**2
-    vMon=np.zeros((nTheta,nP))
-    vMonD1=np.zeros((nTheta,nP));vMonD2=np.zeros((nTheta,nP))
+    vPow=monomialPowers(vu[:,0:2],degQ)
     vTerms=np.zeros((nTheta,nPidx))
     vTermsD1=np.zeros((nTheta,nPidx));vTermsD2=np.zeros((nTheta,nPidx));vTermsD3=np.zeros((nTheta,nPidx))
-    for k in range(nP):
-        vMon[:,k]=vu[:,0]**vP[k][0]*vu[:,1]**vP[k][1]
-        vMonD1[:,k]=vC1P[k]*vu[:,0]**vD1P[k][0]*vu[:,1]**vD1P[k][1]
-        vMonD2[:,k]=vC2P[k]*vu[:,0]**vD2P[k][0]*vu[:,1]**vD2P[k][1]
+    vMon=monomialEval(vPow,vP)
+    vMonD1=monomialEval(vPow,vD1P,vC1P);vMonD2=monomialEval(vPow,vD2P,vC2P)
     for k in range(nPidx):
-        vTerms[:,k]=np.dot(vMon[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD1[:,k]=np.dot(vMonD1[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD2[:,k]=np.dot(vMonD2[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD3[:,k]=vC3P[vPidx[k][1][0]]*vTerms[:,k]    
+        vTerms[:,k]=np.dot(vMon[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD1[:,k]=np.dot(vMonD1[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD2[:,k]=np.dot(vMonD2[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD3[:,k]=vC3P[vPidx[k,1]]*vTerms[:,k]    
     vvP=vTerms[:,-1];vPD1=vTermsD1[:,-1];vPD2=vTermsD2[:,-1];vPD3=vTermsD3[:,-1]
     for k in range(nPidx-2,-1,-1):
         vvP[:]=vTerms[:,k]+vu3*vvP
@@ -1956,19 +2844,15 @@ def SHYqp_Predictions(uaxData,vCoeff,ddMon,nQ,nP,qpSolver,cvxCheck,fileCoeff=Non
     for k in range(nPidx-2,0,-1):        
         vPD3[:]=vTermsD3[:,k]+vu3*vPD3
     vPD3[:]*=vu[:,2]    
-    vMon=np.zeros((nTheta,nQ))
-    vMonD1=np.zeros((nTheta,nQ));vMonD2=np.zeros((nTheta,nQ))
     vTerms=np.zeros((nTheta,nQidx))
     vTermsD1=np.zeros((nTheta,nQidx));vTermsD2=np.zeros((nTheta,nQidx));vTermsD3=np.zeros((nTheta,nQidx))
-    for k in range(nQ):
-        vMon[:,k]=vu[:,0]**vQ[k][0]*vu[:,1]**vQ[k][1]
-        vMonD1[:,k]=vC1Q[k]*vu[:,0]**vD1Q[k][0]*vu[:,1]**vD1Q[k][1]
-        vMonD2[:,k]=vC2Q[k]*vu[:,0]**vD2Q[k][0]*vu[:,1]**vD2Q[k][1]
+    vMon=monomialEval(vPow,vQ)
+    vMonD1=monomialEval(vPow,vD1Q,vC1Q);vMonD2=monomialEval(vPow,vD2Q,vC2Q)
     for k in range(nQidx):
-        vTerms[:,k]=np.dot(vMon[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD1[:,k]=np.dot(vMonD1[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD2[:,k]=np.dot(vMonD2[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD3[:,k]=vC3Q[vQidx[k][1][0]]*vTerms[:,k]        
+        vTerms[:,k]=np.dot(vMon[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD1[:,k]=np.dot(vMonD1[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD2[:,k]=np.dot(vMonD2[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD3[:,k]=vC3Q[vQidx[k,1]]*vTerms[:,k]        
     vvQ=vTerms[:,-1];vQD1=vTermsD1[:,-1];vQD2=vTermsD2[:,-1];vQD3=vTermsD3[:,-1]
     for k in range(nQidx-2,-1,-1):
         vvQ[:]=vTerms[:,k]+vu3*vvQ
@@ -2091,10 +2975,18 @@ def SHYqp_Predictions(uaxData,vCoeff,ddMon,nQ,nP,qpSolver,cvxCheck,fileCoeff=Non
     for jj in range(nP,nP+nQ):
         ff.write('{}\n'.format(vCoeff[jj]))
     ff.close()
+    saveModel(figDir+uaxData['name']+'_SHYqp_deg'+str(degQ)+'_Model.shyqp',vCoeff,ddMon,nQ,nP,uaxData['assym'],
+              {'name':uaxData['name'],'solver':qpSolver,'minDet1':float(cvxCheck[0]),'minDet2':float(cvxCheck[1]),
+               'minDet3':float(cvxCheck[2]),'minGaussCurvature':float(cvxCheck[3])})
     return
         
 
-def SHYqp_HessGaussCheck(vCoeff,ddMon,nQ,nP):
+'''
+function:'hessGaussPoints'
+--Hessian leading principal minors and Gaussian curvature of the SHYqp model at the points 'vu' (nPoints,3) of the unit sphere
+--Returns the array (nPoints,4) with the columns (det_1,det_2,det_3,Gaussian curvature)
+'''
+def hessGaussPoints(vu,vCoeff,ddMon,nP):
     degQ=ddMon['nQ']
     degQm1=degQ-1;degPm1=degQ-2
     vP=ddMon['vP'];vPidx=ddMon['vPidx'];nPidx=len(vPidx)
@@ -2111,56 +3003,29 @@ def SHYqp_HessGaussCheck(vCoeff,ddMon,nQ,nP):
     vDD22Q=ddMon['vH22Q'];vDD23Q=ddMon['vH23Q'];vDD33Q=ddMon['vH33Q']
     vCD11Q=ddMon['vCH11Q'];vCD12Q=ddMon['vCH12Q'];vCD13Q=ddMon['vCH13Q']
     vCD22Q=ddMon['vCH22Q'];vCD23Q=ddMon['vCH23Q'];vCD33Q=ddMon['vCH33Q']
-    if(0):
-        nPoints=3500
-        np.random.seed(99)
-        vu=np.random.normal(0,1,(nPoints,3)) ##nPoints on 2D unit sphere of 3D 
-        vNorm=np.sqrt(np.sum(vu**2,axis=1))
-        vu[:,0]/=vNorm;vu[:,1]/=vNorm;vu[:,2]/=vNorm
-    if(0):
-        vu=genConstraintsPoints2DOptPoints(nPoints=200)
-        nPoints=vu.shape[0]
-    np.random.seed(99)     
-    vuRandom=np.random.normal(0,1,(3500,3)) ##nPoints on 2D unit sphere of 3D
-    vNorm=np.sqrt(np.sum(vuRandom**2,axis=1))
-    vuRandom[:,0]/=vNorm;vuRandom[:,1]/=vNorm;vuRandom[:,2]/=vNorm
-    vu=genConstraintsPoints2DOptPoints(nPoints=200)
-    vu=np.concatenate((vu[:,0:3],vuRandom),axis=0)
-    nPoints=vu.shape[0]    
+    nPoints=vu.shape[0]
     vu3=vu[:,2]**2
+    vPow=monomialPowers(vu[:,0:2],degQ)
     ##vMonB=np.zeros((nPoints,nP));vMonD1B=np.zeros((nPoints,nP));vMonD11B=np.zeros((nPoints,nP))
-    vMon=np.zeros((nPoints,nP))
-    vMonD1=np.zeros((nPoints,nP));vMonD2=np.zeros((nPoints,nP))
-    vMonD11=np.zeros((nPoints,nP));vMonD22=np.zeros((nPoints,nP))#;vMonD33=np.zeros((nPoints,nP))
-    vMonD12=np.zeros((nPoints,nP));vMonD13=np.zeros((nPoints,nP));vMonD23=np.zeros((nPoints,nP))
     vTerms=np.zeros((nPoints,nPidx))
     vTermsD1=np.zeros((nPoints,nPidx));vTermsD2=np.zeros((nPoints,nPidx));vTermsD3=np.zeros((nPoints,nPidx))
     vTermsD11=np.zeros((nPoints,nPidx));vTermsD22=np.zeros((nPoints,nPidx));vTermsD33=np.zeros((nPoints,nPidx))
     vTermsD12=np.zeros((nPoints,nPidx));vTermsD13=np.zeros((nPoints,nPidx));vTermsD23=np.zeros((nPoints,nPidx))
-    for k in range(nP):
-        ##vMonB[:,k]=vu[:,0]**vP[k][0]*vu[:,1]**vP[k][1]*vu[:,2]**vP[k][2]
-        ##vMonD1B[:,k]=vC1P[k]*vu[:,0]**vD1P[k][0]*vu[:,1]**vD1P[k][1]*vu[:,2]**vD1P[k][2]
-        ##vMonD11B[:,k]=vCD11P[k]*vu[:,0]**vDD11P[k][0]*vu[:,1]**vDD11P[k][1]*vu[:,2]**vDD11P[k][2]
-        vMon[:,k]=vu[:,0]**vP[k][0]*vu[:,1]**vP[k][1]
-        vMonD1[:,k]=vC1P[k]*vu[:,0]**vD1P[k][0]*vu[:,1]**vD1P[k][1]
-        vMonD2[:,k]=vC2P[k]*vu[:,0]**vD2P[k][0]*vu[:,1]**vD2P[k][1]
-        vMonD11[:,k]=vCD11P[k]*vu[:,0]**vDD11P[k][0]*vu[:,1]**vDD11P[k][1]
-        vMonD22[:,k]=vCD22P[k]*vu[:,0]**vDD22P[k][0]*vu[:,1]**vDD22P[k][1]
-        ##vMonD33[:,k]=vCD33P[k]*vu[:,0]**vDD33P[k][0]*vu[:,1]**vDD33P[k][1]
-        vMonD12[:,k]=vCD12P[k]*vu[:,0]**vDD12P[k][0]*vu[:,1]**vDD12P[k][1]
-        vMonD13[:,k]=vCD13P[k]*vu[:,0]**vDD13P[k][0]*vu[:,1]**vDD13P[k][1]
-        vMonD23[:,k]=vCD23P[k]*vu[:,0]**vDD23P[k][0]*vu[:,1]**vDD23P[k][1]
+    vMon=monomialEval(vPow,vP)
+    vMonD1=monomialEval(vPow,vD1P,vC1P);vMonD2=monomialEval(vPow,vD2P,vC2P)
+    vMonD11=monomialEval(vPow,vDD11P,vCD11P);vMonD22=monomialEval(vPow,vDD22P,vCD22P)
+    vMonD12=monomialEval(vPow,vDD12P,vCD12P);vMonD13=monomialEval(vPow,vDD13P,vCD13P);vMonD23=monomialEval(vPow,vDD23P,vCD23P)
     for k in range(nPidx):
-        vTerms[:,k]=np.dot(vMon[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD1[:,k]=np.dot(vMonD1[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD2[:,k]=np.dot(vMonD2[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD3[:,k]=vC3P[vPidx[k][1][0]]*vTerms[:,k]
-        vTermsD11[:,k]=np.dot(vMonD11[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD22[:,k]=np.dot(vMonD22[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD12[:,k]=np.dot(vMonD12[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD13[:,k]=np.dot(vMonD13[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD23[:,k]=np.dot(vMonD23[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-        vTermsD33[:,k]=vCD33P[vPidx[k][1][0]]*vTerms[:,k]
+        vTerms[:,k]=np.dot(vMon[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD1[:,k]=np.dot(vMonD1[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD2[:,k]=np.dot(vMonD2[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD3[:,k]=vC3P[vPidx[k,1]]*vTerms[:,k]
+        vTermsD11[:,k]=np.dot(vMonD11[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD22[:,k]=np.dot(vMonD22[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD12[:,k]=np.dot(vMonD12[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD13[:,k]=np.dot(vMonD13[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD23[:,k]=np.dot(vMonD23[:,vPidx[k,1]:vPidx[k,2]],vCoeff[vPidx[k,1]:vPidx[k,2]])
+        vTermsD33[:,k]=vCD33P[vPidx[k,1]]*vTerms[:,k]
     ##vPB=np.dot(vMonB,vCoeff[0:nP]);vPD1B=np.dot(vMonD1B,vCoeff[0:nP]);vPD11B=np.dot(vMonD11B,vCoeff[0:nP])        
     vP=vTerms[:,-1]
     vPD1=vTermsD1[:,-1];vPD2=vTermsD2[:,-1];vPD3=vTermsD3[:,-1]
@@ -2180,37 +3045,25 @@ def SHYqp_HessGaussCheck(vCoeff,ddMon,nQ,nP):
         vPD23[:]=vTermsD23[:,k]+vu3*vPD23
     vPD3[:]*=vu[:,2];vPD13[:]*=vu[:,2];vPD23[:]*=vu[:,2] 
     ##vMonB=np.zeros((nPoints,nQ));vMonD1B=np.zeros((nPoints,nQ));vMonD11B=np.zeros((nPoints,nQ))
-    vMon=np.zeros((nPoints,nQ))
-    vMonD1=np.zeros((nPoints,nQ));vMonD2=np.zeros((nPoints,nQ))
-    vMonD11=np.zeros((nPoints,nQ));vMonD22=np.zeros((nPoints,nQ))
-    vMonD12=np.zeros((nPoints,nQ));vMonD13=np.zeros((nPoints,nQ));vMonD23=np.zeros((nPoints,nQ))
     vTerms=np.zeros((nPoints,nQidx))
     vTermsD1=np.zeros((nPoints,nQidx));vTermsD2=np.zeros((nPoints,nQidx));vTermsD3=np.zeros((nPoints,nQidx))
     vTermsD11=np.zeros((nPoints,nQidx));vTermsD22=np.zeros((nPoints,nQidx));vTermsD33=np.zeros((nPoints,nQidx))
     vTermsD12=np.zeros((nPoints,nQidx));vTermsD13=np.zeros((nPoints,nQidx));vTermsD23=np.zeros((nPoints,nQidx))
-    for k in range(nQ):
-        ##vMonB[:,k]=vu[:,0]**vQ[k][0]*vu[:,1]**vQ[k][1]*vu[:,2]**vQ[k][2]
-        ##vMonD1B[:,k]=vC1Q[k]*vu[:,0]**vD1Q[k][0]*vu[:,1]**vD1Q[k][1]*vu[:,2]**vD1Q[k][2]
-        ##vMonD11B[:,k]=vCD11Q[k]*vu[:,0]**vDD11Q[k][0]*vu[:,1]**vDD11Q[k][1]*vu[:,2]**vDD11Q[k][2]
-        vMon[:,k]=vu[:,0]**vQ[k][0]*vu[:,1]**vQ[k][1]
-        vMonD1[:,k]=vC1Q[k]*vu[:,0]**vD1Q[k][0]*vu[:,1]**vD1Q[k][1]
-        vMonD2[:,k]=vC2Q[k]*vu[:,0]**vD2Q[k][0]*vu[:,1]**vD2Q[k][1]
-        vMonD11[:,k]=vCD11Q[k]*vu[:,0]**vDD11Q[k][0]*vu[:,1]**vDD11Q[k][1]
-        vMonD22[:,k]=vCD22Q[k]*vu[:,0]**vDD22Q[k][0]*vu[:,1]**vDD22Q[k][1]
-        vMonD12[:,k]=vCD12Q[k]*vu[:,0]**vDD12Q[k][0]*vu[:,1]**vDD12Q[k][1]
-        vMonD13[:,k]=vCD13Q[k]*vu[:,0]**vDD13Q[k][0]*vu[:,1]**vDD13Q[k][1]
-        vMonD23[:,k]=vCD23Q[k]*vu[:,0]**vDD23Q[k][0]*vu[:,1]**vDD23Q[k][1]
+    vMon=monomialEval(vPow,vQ)
+    vMonD1=monomialEval(vPow,vD1Q,vC1Q);vMonD2=monomialEval(vPow,vD2Q,vC2Q)
+    vMonD11=monomialEval(vPow,vDD11Q,vCD11Q);vMonD22=monomialEval(vPow,vDD22Q,vCD22Q)
+    vMonD12=monomialEval(vPow,vDD12Q,vCD12Q);vMonD13=monomialEval(vPow,vDD13Q,vCD13Q);vMonD23=monomialEval(vPow,vDD23Q,vCD23Q)
     for k in range(nQidx):
-        vTerms[:,k]=np.dot(vMon[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD1[:,k]=np.dot(vMonD1[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD2[:,k]=np.dot(vMonD2[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD3[:,k]=vC3Q[vQidx[k][1][0]]*vTerms[:,k]
-        vTermsD11[:,k]=np.dot(vMonD11[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD22[:,k]=np.dot(vMonD22[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD12[:,k]=np.dot(vMonD12[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD13[:,k]=np.dot(vMonD13[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD23[:,k]=np.dot(vMonD23[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-        vTermsD33[:,k]=vCD33Q[vQidx[k][1][0]]*vTerms[:,k]
+        vTerms[:,k]=np.dot(vMon[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD1[:,k]=np.dot(vMonD1[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD2[:,k]=np.dot(vMonD2[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD3[:,k]=vC3Q[vQidx[k,1]]*vTerms[:,k]
+        vTermsD11[:,k]=np.dot(vMonD11[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD22[:,k]=np.dot(vMonD22[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD12[:,k]=np.dot(vMonD12[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD13[:,k]=np.dot(vMonD13[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD23[:,k]=np.dot(vMonD23[:,vQidx[k,1]:vQidx[k,2]],vCoeff[nP+vQidx[k,1]:nP+vQidx[k,2]])
+        vTermsD33[:,k]=vCD33Q[vQidx[k,1]]*vTerms[:,k]
     ##vQB=np.dot(vMonB,vCoeff[nP:nP+nQ]);vQD1B=np.dot(vMonD1B,vCoeff[nP:nP+nQ]);vQD11B=np.dot(vMonD11B,vCoeff[nP:nP+nQ])   
     ##print("vTerms\n",vTerms[500,:])    
     vQ=vTerms[:,-1]
@@ -2241,12 +3094,8 @@ def SHYqp_HessGaussCheck(vCoeff,ddMon,nQ,nP):
     H12a=vPhi2*vu[:,0]*vu[:,1]-(degPm1*(vu[:,0]*vPD2+vPD1*vu[:,1])+degQm1*(vu[:,0]*vQD2+vQD1*vu[:,1]))+vPD12+vQD12
     H13a=vPhi2*vu[:,0]*vu[:,2]-(degPm1*(vu[:,0]*vPD3+vPD1*vu[:,2])+degQm1*(vu[:,0]*vQD3+vQD1*vu[:,2]))+vPD13+vQD13
     H23a=vPhi2*vu[:,1]*vu[:,2]-(degPm1*(vu[:,1]*vPD3+vPD2*vu[:,2])+degQm1*(vu[:,1]*vQD3+vQD2*vu[:,2]))+vPD23+vQD23
-    print("Hessian leading principal minors (min_value over the unit sphere):")
-    k=np.argmin(H11a);m1=H11a[k];print("min det_1 = ",m1)
-    ddet=H11a*H22a-H12a*H12a
-    k=np.argmin(ddet);m2=ddet[k];print("min det_2 = ",m2)
-    ddet=H33a*ddet+H13a*(H12a*H23a-H22a*H13a)+H23a*(H12a*H13a-H11a*H23a)
-    k=np.argmin(ddet);m3=ddet[k];print("min det_3 = ",m3)
+    ddet2=H11a*H22a-H12a*H12a
+    ddet3=H33a*ddet2+H13a*(H12a*H23a-H22a*H13a)+H23a*(H12a*H13a-H11a*H23a)
     sq3=np.sqrt(3.0);sq32=np.sqrt(1.5)
     H11=(2.0/3.0)*H11a
     H12=H12a/sq3-H11a/3
@@ -2269,25 +3118,143 @@ def SHYqp_HessGaussCheck(vCoeff,ddMon,nQ,nP):
     G1[:]/=vNorm;G2[:]/=vNorm;G3[:]/=vNorm
     KG=H11s*G1*G1+H22s*G2*G2+H33s*G3*G3+2.0*(H12s*G1*G2+H13s*G1*G3+H23s*G2*G3)
     KG=sq32*KG/vNorm**2
-    mm=np.min(KG);print("min(Gaussian curvature) = ",mm)
+    return np.stack((H11a,ddet2,ddet3,KG),axis=1)
+
+
+'''
+function:'tangentBasis'
+--Orthonormal basis (t1,t2) of the tangent planes of the unit sphere at the points 'vu' (nPoints,3)
+'''
+def tangentBasis(vu):
+    vAxis=np.zeros(vu.shape)
+    vAxis[np.arange(vu.shape[0]),np.argmin(np.abs(vu),axis=1)]=1.0
+    t1=np.cross(vu,vAxis)
+    t1/=np.sqrt(np.sum(t1*t1,axis=1,keepdims=True))
+    return t1,np.cross(vu,t1)
+
+
+'''
+function:'hessGaussStarts'
+--Indexes of (at most) 'nStart' points with the lowest values 'vVal', at least 'minAngle' (radians) apart from each other 
+'''
+def hessGaussStarts(vu,vVal,nStart,minAngle=0.1):
+    cosMin=np.cos(minAngle)
+    vStart=[]
+    for k in np.argsort(vVal)[0:50*nStart]:
+        if(all(np.dot(vu[k],vu[j])<cosMin for j in vStart)):
+            vStart.append(k)
+            if(len(vStart)==nStart):break
+    return np.array(vStart,dtype=int)
+
+
+'''
+function:'hessGaussRefine'
+--Local minimization on the unit sphere of the columns 'vCol' of 'hessGaussPoints' starting from the points 'vu0' (one column per point)
+--All the starting points are advanced together (batched projected Newton with a trust region):
+----gradient and Hessian with respect to the coordinates of the tangent plane by central differences (step 'hh'),
+    the new points are projected back on the sphere
+----Newton step if the Hessian is positive definite, steepest descent otherwise; both limited to the trust radius
+----a step is accepted only if it decreases the value (the radius is then doubled, otherwise halved)
+--stopBelow: the iterations are stopped as soon as the Gaussian curvature (column 3) of a point falls below this value (None = no stop)
+--Returns the final points and their values
+'''
+def hessGaussRefine(vu0,vCol,vCoeff,ddMon,nP,nIter=20,radius=0.05,hh=1.0e-3,stopBelow=None):
+    nStart=vu0.shape[0];rg=np.arange(nStart)
+    vStencil=hh*np.array([[0,0],[1,0],[-1,0],[0,1],[0,-1],[1,1],[1,-1],[-1,1],[-1,-1]],dtype=float)
+    def project(vu,t1,t2,vd):
+        vp=vu+vd[...,0:1]*t1+vd[...,1:2]*t2
+        return vp/np.sqrt(np.sum(vp*vp,axis=-1,keepdims=True))
+    vu=vu0/np.sqrt(np.sum(vu0*vu0,axis=1,keepdims=True))
+    vVal=hessGaussPoints(vu,vCoeff,ddMon,nP)[rg,vCol]
+    vRad=np.full(nStart,radius)
+    for it in range(nIter):
+        vAct=vRad>hh
+        if(not np.any(vAct)):break
+        if((stopBelow is not None) and np.any((vCol==3)&(vVal<stopBelow))):break
+        ua=vu[vAct];ca=vCol[vAct];na=ua.shape[0]
+        t1,t2=tangentBasis(ua)
+        vp=project(ua[:,None,:],t1[:,None,:],t2[:,None,:],vStencil[None,:,:])
+        FF=hessGaussPoints(vp.reshape((9*na,3)),vCoeff,ddMon,nP)[np.arange(9*na),np.repeat(ca,9)].reshape((na,9))
+        g1=(FF[:,1]-FF[:,2])/(2*hh);g2=(FF[:,3]-FF[:,4])/(2*hh)
+        h11=(FF[:,1]-2*FF[:,0]+FF[:,2])/hh**2;h22=(FF[:,3]-2*FF[:,0]+FF[:,4])/hh**2
+        h12=(FF[:,5]-FF[:,6]-FF[:,7]+FF[:,8])/(4*hh**2)
+        det=h11*h22-h12*h12
+        vNewton=(h11>0)&(det>0)
+        sdet=np.where(vNewton,det,1.0)
+        vd=np.where(vNewton[:,None],-np.stack((h22*g1-h12*g2,h11*g2-h12*g1),axis=1)/sdet[:,None],-np.stack((g1,g2),axis=1))
+        dNorm=np.sqrt(np.sum(vd*vd,axis=1))
+        ra=vRad[vAct]
+        vd*=(np.minimum(dNorm,ra)/np.maximum(dNorm,1.0e-300))[:,None]
+        ut=project(ua,t1,t2,vd)
+        vt=hessGaussPoints(ut,vCoeff,ddMon,nP)[np.arange(na),ca]
+        vOk=vt<FF[:,0]
+        ka=np.nonzero(vAct)[0]
+        vu[ka[vOk]]=ut[vOk];vVal[ka[vOk]]=vt[vOk]
+        vRad[ka]=np.where(vOk,np.minimum(2*ra,4*radius),0.5*ra)
+        vRad[ka[dNorm<1.0e-2*hh]]=0.0 ##stationary point 
+    return vu,vVal
+
+
+'''
+function:'SHYqp_HessGaussCheck'
+--Checks the convexity of the SHYqp model (minors of the Hessian and Gaussian curvature) in two stages:
+----coarse scan: dense grid ('nEquator', see 'genConstraintsPoints2DOptPoints') and 'nRandom' random points of the unit sphere
+----refinement: local minimization ('hessGaussRefine') of det_1, det_2 and Gaussian curvature starting from 
+    the 'nRefine' worst (well separated) samples of each (nRefine=0: coarse scan only)
+    (det_3 is not refined: the Hessian of the 1-homogeneous yield function is singular along u and det_3 is zero up to round-off)
+--symmetry: the points are taken from the fundamental domain of the symmetry group (see 'symmetryMask') with the same density;
+  default: inferred from the coefficients (see 'modelSymmetry')
+--earlyExit=True: the refinement is skipped/stopped as soon as a Gaussian curvature below 'tolKG' is found (the model is not convex)
+--Returns the minimum values found (det_1,det_2,det_3,Gaussian curvature)
+  and, if 'returnLocations=True', also the array (4,3) of their locations on the unit sphere
+'''
+@profiled()
+def SHYqp_HessGaussCheck(vCoeff,ddMon,nQ,nP,symmetry=None,nEquator=200,nRandom=3500,nRefine=8,earlyExit=False,tolKG=0.0,
+                         returnLocations=False):
+    if(symmetry is None):symmetry=modelSymmetry(vCoeff,nP)
+    vu=genConstraintsPoints2DOptPoints(nPoints=nEquator,symmetry=symmetry)
+    if(nRandom):
+        np.random.seed(99)     
+        vuRandom=np.random.normal(0,1,(nRandom if symmetry=='orthotropic' else nRandom//2,3)) ##nPoints on 2D unit sphere of 3D
+        vNorm=np.sqrt(np.sum(vuRandom**2,axis=1))
+        vuRandom[:,0]/=vNorm;vuRandom[:,1]/=vNorm;vuRandom[:,2]/=vNorm
+        if(symmetry!='orthotropic'):vuRandom=symmetryFold(vuRandom,symmetry)
+        vu=np.concatenate((vu,vuRandom),axis=0)
+    vH=hessGaussPoints(vu,vCoeff,ddMon,nP)
+    vIdx=np.argmin(vH,axis=0)
+    vMin=vH[vIdx,np.arange(4)];vLoc=vu[vIdx]
+    if(nRefine>0 and not (earlyExit and vMin[3]<tolKG)):
+        vRefine=[0,1,3]
+        vStart=[hessGaussStarts(vu,vH[:,col],nRefine) for col in vRefine]
+        vCol=np.concatenate([np.full(len(kk),col) for kk,col in zip(vStart,vRefine)])
+        vuR,vValR=hessGaussRefine(vu[np.concatenate(vStart)],vCol,vCoeff,ddMon,nP,stopBelow=tolKG if earlyExit else None)
+        for col in vRefine:
+            kk=np.nonzero(vCol==col)[0];k=kk[np.argmin(vValR[kk])]
+            if(vValR[k]<vMin[col]):vMin[col]=vValR[k];vLoc[col]=vuR[k]
+    m1,m2,m3,mm=vMin
+    print("Hessian leading principal minors (min_value over the unit sphere):")
+    print("min det_1 = ",m1)
+    print("min det_2 = ",m2)
+    print("min det_3 = ",m3)
+    print("min(Gaussian curvature) = ",mm)
     if(mm<0):
-        k=np.argmin(KG);print("KG[{}] = {}; location: u=[{},{},{}]".format(k,KG[k],vu[k,0],vu[k,1],vu[k,2]))
-        ###test for numerical instability
-        ##kg=SHYqp_KGCheckPoint(np.array([-vu[k,0],-vu[k,1],vu[k,2]]).reshape(1,3),vCoeff,ddMon,nQ,nP)
-        ##print("kg = ",kg)
-        ##A=np.array([[H11s[k],H12s[k],H13s[k]],[H12s[k],H22s[k],H23s[k]],[H13s[k],H23s[k],H33s[k]]]).reshape((3,3))
-        ##print("eigenvalues = ",np.linalg.eigvalsh(A))
+        print("KG = {}; location: u=[{},{},{}]".format(mm,vLoc[3,0],vLoc[3,1],vLoc[3,2]))
+    profileInfo(minDet1=m1,minDet2=m2,minDet3=m3,minGaussCurvature=mm)
+    if(returnLocations):
+        return (m1,m2,m3,mm),vLoc
     return (m1,m2,m3,mm)
  
 
  
 
 
-def SHYqp_surf_Plot(vCoeff,ddMon,nQ,nP,name,savePng=False):
+'''
+function:'SHYqp_surf_PlotData'
+--Calculates the plot data of 'SHYqp_surf_Plot' (see 'renderPlot'): the (sxx,syy,sxy>=0) grid of the SHYqp yield surface
+'''
+def SHYqp_surf_PlotData(vCoeff,ddMon,nQ,nP,name):
     degQ=ddMon['nQ']
-    degQm1=degQ-1;degPm1=degQ-2;sq3=np.sqrt(3.0)
-    vP=ddMon['vP'];vPidx=ddMon['vPidx'];nPidx=len(vPidx)
-    vQ=ddMon['vQ'];vQidx=ddMon['vQidx'];nQidx=len(vQidx)
+    model=SHYqpModel(vCoeff,ddMon,nQ,nP)
     n2=50;n1=4*n2;nPoints=n1*n2
     t1=np.linspace(0,2*np.pi,n1)
     t2=np.linspace(0,0.5*np.pi,n2)
@@ -2296,41 +3263,33 @@ def SHYqp_surf_Plot(vCoeff,ddMon,nQ,nP,name,savePng=False):
     vt2=vt2.reshape(nPoints)
     ct1=np.cos(vt1);st1=np.sin(vt1)
     ct2=np.cos(vt2);st2=np.sin(vt2)
-    ####print("min vtt = ",np.min(1.0+2*ct2*ct2-ct1*st1*st2*st2))
-    vtt=np.sqrt(1.0+2*ct2*ct2-ct1*st1*st2*st2)
-    vu=np.zeros((nPoints,3))
-    vu[:,0]=(0.5*st2*(2*ct1-st1))/vtt
-    vu[:,1]=(0.5*sq3*st2*st1)/vtt
-    vu[:,2]=(sq3*ct2)/vtt
-    vu3=vu[:,2]**2
-    vMon=np.zeros((nPoints,nP));vTerms=np.zeros((nPoints,nPidx))
-    for k in range(nP):
-        vMon[:,k]=vu[:,0]**vP[k][0]*vu[:,1]**vP[k][1]
-    for k in range(nPidx):
-        vTerms[:,k]=np.dot(vMon[:,vPidx[k][1][0]:vPidx[k][1][-1]+1],vCoeff[vPidx[k][1][0]:vPidx[k][1][-1]+1])
-    vP=vTerms[:,-1]
-    for k in range(nPidx-2,-1,-1):
-        vP[:]=vTerms[:,k]+vu3*vP
-    vMon=np.zeros((nPoints,nQ));vTerms=np.zeros((nPoints,nQidx))
-    for k in range(nQ):
-        vMon[:,k]=vu[:,0]**vQ[k][0]*vu[:,1]**vQ[k][1]
-    for k in range(nQidx):
-        vTerms[:,k]=np.dot(vMon[:,vQidx[k][1][0]:vQidx[k][1][-1]+1],vCoeff[nP+vQidx[k][1][0]:nP+vQidx[k][1][-1]+1])
-    vQ=vTerms[:,-1]
-    for k in range(nQidx-2,-1,-1):
-        vQ[:]=vTerms[:,k]+vu3*vQ        
-    RR=1.0/(vtt*(1+vP+vQ))
+    RR=1.0/model.value(np.stack((st2*ct1,st2*st1,ct2),axis=1))
     x=(RR*st2*ct1).reshape((n2,n1))
     y=(RR*st2*st1).reshape((n2,n1))
     z=(RR*ct2).reshape((n2,n1))
+    return {'x':x,'y':y,'z':z,'vFile':[figDir+name+'_SHYqp_deg'+str(degQ)+'_Surf']}
+
+def SHYqp_surfRender(pd,plt):
+    x,y,z=pd['x'],pd['y'],pd['z']
     fg=plt.figure();ax=fg.add_subplot(1,1,1,projection='3d')
     vColor=np.array([200/255,210/255,220/255])
     ax.plot_surface(x,y,z,color=vColor,alpha=0.45,linewidth=0.3, edgecolors=0.55*vColor)
     ax.plot_surface(x,y,-z,color=vColor,alpha=0.45,linewidth=0.3, edgecolors=0.55*vColor)
     ax.set_xlabel(r'$\overline{\sigma}_{xx}$',fontsize=14)
     ax.set_ylabel(r'$\overline{\sigma}_{yy}$',fontsize=14)
-    if(savePng):
-        fg.savefig('{name}.{ext}'.format(name=figDir+name+'_SHYqp_deg'+str(degQ)+'_Surf',ext='png'),dpi=300,bbox_inches='tight')
+    return [fg]
+
+'''
+function:'SHYqp_surf_Plot'
+--Plots the SHYqp yield surface in the (sxx,syy,sxy)-space
+--If a 'queue' (see 'RenderQueue') is provided the figure is rendered and saved (png) by the queue, in background
+'''
+@profiled()
+def SHYqp_surf_Plot(vCoeff,ddMon,nQ,nP,name,savePng=False,queue=None):
+    pd=SHYqp_surf_PlotData(vCoeff,ddMon,nQ,nP,name)
+    if(queue is not None):
+        return queue.submit('SHYqp_surf',pd)
+    renderPlot('SHYqp_surf',pd,savePng)
     return
     
 '''
@@ -2339,6 +3298,7 @@ function: 'testUaxInterpPlot'
 --Used only for testing/illustration of the influence of the shape parameter
 '''
 def testUaxInterpPlot(data,savePng=False):
+    plt=pyplot()
     uaxData=uaxLambda(data)
     nData=uaxData['pointsST'].shape[1]
     fg=plt.figure()
@@ -2373,138 +3333,243 @@ def testUaxInterpPlot(data,savePng=False):
     return
 
 '''
-function:'protoBez5YS_uaxPlot'
---Plots the protoBez5YS interpolated directional properties 
---Utility for assesing the overall aspect (as determined by the shape parameters lambdaMax)
+function:'protoBez5YS_uaxPlotData'
+--Calculates the plot data of 'protoBez5YS_uaxPlot' (see 'renderPlot'):
+--the interpolated directional curves (one (2,n)-array for each segment) and the data points  
 '''
-def protoBez5YS_uaxPlot(uaxData,savePng=False):
+def protoBez5YS_uaxPlotData(uaxData):
+    pd={'assym':uaxData['assym'],'vFile':[figDir+uaxData['name']+'_Bezier5YS_Uax']}
+    for XX in (['T','C'] if uaxData['assym'] else ['T']):
+        for YY in ['S','R']:
+            key=YY+XX
+            vPoints,vTan=uaxData['points'+key],uaxData['tan'+key]
+            Lshape=uaxData['shapeUAX']*uaxData['lambda'+key+'max']
+            pd['points'+key]=vPoints
+            pd['curves'+key]=[curveSeg(vPoints[:,kk-1].reshape(2,1),vTan[:,kk-1].reshape(2,1),
+                              vPoints[:,kk].reshape(2,1),vTan[:,kk].reshape(2,1),Lshape) for kk in range(1,vPoints.shape[1])]
+    return pd
+
+def protoBez5YS_uaxRender(pd,plt):
     fg=plt.figure()
     ax1=fg.add_subplot(2,1,1);ax2=fg.add_subplot(2,1,2)
-    nData=uaxData['pointsST'].shape[1]
-    LshapeS=uaxData['shapeUAX']*uaxData['lambdaSTmax']
-    LshapeR=uaxData['shapeUAX']*uaxData['lambdaRTmax']
-    for kk in range(1,nData):
-        vv=curveSeg(uaxData['pointsST'][:,kk-1].reshape(2,1),uaxData['tanST'][:,kk-1].reshape(2,1),
-                    uaxData['pointsST'][:,kk].reshape(2,1),uaxData['tanST'][:,kk].reshape(2,1),LshapeS)
+    for vv in pd['curvesST']:
         ax1.plot(vv[0,:],vv[1,:],color='k',linestyle='-',linewidth=lineWidthUax)
-        vv=curveSeg(uaxData['pointsRT'][:,kk-1].reshape(2,1),uaxData['tanRT'][:,kk-1].reshape(2,1),
-                    uaxData['pointsRT'][:,kk].reshape(2,1),uaxData['tanRT'][:,kk].reshape(2,1),LshapeR)
+    for vv in pd['curvesRT']:
         ax2.plot(vv[0,:],vv[1,:],color='k',linestyle='-',linewidth=lineWidthUax)
-    ax1.plot(uaxData['pointsST'][0,:],uaxData['pointsST'][1,:],'bs',markerfacecolor='b',markersize=6,label='Exp data')
-    ax2.plot(uaxData['pointsRT'][0,:],uaxData['pointsRT'][1,:],'bs',markerfacecolor='b',markersize=6,label='Exp data')
+    ax1.plot(pd['pointsST'][0,:],pd['pointsST'][1,:],'bs',markerfacecolor='b',markersize=6,label='Exp data')
+    ax2.plot(pd['pointsRT'][0,:],pd['pointsRT'][1,:],'bs',markerfacecolor='b',markersize=6,label='Exp data')
     ax1.set_xticks([0,15,30,45,60,75,90])
     ax1.set_xticklabels(['$0^o$','$15^o$','$30^o$','$45^o$','$60^o$','$75^o$','$90^o$'],fontsize=10) 
     ax1.grid()
-    ##ax1.text(92,0.95*min(uaxData['pointsST'][1,:]),r'$\theta$',fontsize=14)
-    ##ax1.text(-4,0.88*max(uaxData['pointsST'][1,:]),r'$\overline{\sigma}_{\theta}$',fontsize=14)
+    ##ax1.text(92,0.95*min(pd['pointsST'][1,:]),r'$\theta$',fontsize=14)
+    ##ax1.text(-4,0.88*max(pd['pointsST'][1,:]),r'$\overline{\sigma}_{\theta}$',fontsize=14)
     ax1.text(0.022,0.88,r'$\overline{\sigma}_{\theta}$',fontsize=14,
     horizontalalignment='center',verticalalignment='center',transform = ax1.transAxes)
     ax2.set_xticks([0,15,30,45,60,75,90])
     ax2.set_xticklabels(['$0^o$','$15^o$','$30^o$','$45^o$','$60^o$','$75^o$','$90^o$'],fontsize=10) 
     ax2.grid()
-    ##ax2.text(-4,0.8*max(uaxData['pointsRT'][1,:]),r'$r_{\theta}$',fontsize=14)
+    ##ax2.text(-4,0.8*max(pd['pointsRT'][1,:]),r'$r_{\theta}$',fontsize=14)
     ax2.text(0.022,0.92,r'$r_{\theta}$',fontsize=14,
     horizontalalignment='center',verticalalignment='center',transform = ax2.transAxes)
-    ##ax2.text(91.25,0.95*min(uaxData['pointsRT'][1,:]),r'$\theta$',fontsize=14)
+    ##ax2.text(91.25,0.95*min(pd['pointsRT'][1,:]),r'$\theta$',fontsize=14)
     ##ax2.text(1,0,r'$\theta$',fontsize=14,
     ##horizontalalignment='center',verticalalignment='center',transform = ax2.transAxes)
-    if(not uaxData['assym']):
-        if(savePng):
-            fg.savefig('{name}.{ext}'.format(name=figDir+uaxData['name']+'_Bezier5YS_Uax',ext='png'),dpi=300,bbox_inches='tight')
-        return
-    nData=uaxData['pointsSC'].shape[1]
-    LshapeS=uaxData['shapeUAX']*uaxData['lambdaSCmax']
-    LshapeR=uaxData['shapeUAX']*uaxData['lambdaRCmax']
-    for kk in range(1,nData):
-        vv=curveSeg(uaxData['pointsSC'][:,kk-1].reshape(2,1),uaxData['tanSC'][:,kk-1].reshape(2,1),
-                    uaxData['pointsSC'][:,kk].reshape(2,1),uaxData['tanSC'][:,kk].reshape(2,1),LshapeS)
+    if(not pd['assym']):
+        return [fg]
+    for vv in pd['curvesSC']:
         ax1.plot(vv[0,:],vv[1,:],color='k',linestyle='--',linewidth=lineWidthUax)
-        vv=curveSeg(uaxData['pointsRC'][:,kk-1].reshape(2,1),uaxData['tanRC'][:,kk-1].reshape(2,1),
-                    uaxData['pointsRC'][:,kk].reshape(2,1),uaxData['tanRC'][:,kk].reshape(2,1),LshapeR)
+    for vv in pd['curvesRC']:
         ax2.plot(vv[0,:],vv[1,:],color='k',linestyle='--',linewidth=lineWidthUax)        
-    ax1.plot(uaxData['pointsSC'][0,:],uaxData['pointsSC'][1,:],'bo',markerfacecolor='b',markersize=6.5,label='Exp data')
-    ax2.plot(uaxData['pointsRC'][0,:],uaxData['pointsRC'][1,:],'bo',markerfacecolor='b',markersize=6.5,label='Exp data')
-    maxS=np.max([np.max(uaxData['pointsST'][1,:]),np.max(uaxData['pointsSC'][1,:])])
-    minS=np.min([np.min(uaxData['pointsST'][1,:]),np.min(uaxData['pointsSC'][1,:])])
+    ax1.plot(pd['pointsSC'][0,:],pd['pointsSC'][1,:],'bo',markerfacecolor='b',markersize=6.5,label='Exp data')
+    ax2.plot(pd['pointsRC'][0,:],pd['pointsRC'][1,:],'bo',markerfacecolor='b',markersize=6.5,label='Exp data')
+    maxS=np.max([np.max(pd['pointsST'][1,:]),np.max(pd['pointsSC'][1,:])])
+    minS=np.min([np.min(pd['pointsST'][1,:]),np.min(pd['pointsSC'][1,:])])
     ax1.set_ylim([0.97*minS,1.03*maxS])
-    maxR=np.max([np.max(uaxData['pointsRT'][1,:]),np.max(uaxData['pointsRC'][1,:])])
-    minR=np.min([np.min(uaxData['pointsRT'][1,:]),np.min(uaxData['pointsRC'][1,:])])
+    maxR=np.max([np.max(pd['pointsRT'][1,:]),np.max(pd['pointsRC'][1,:])])
+    minR=np.min([np.min(pd['pointsRT'][1,:]),np.min(pd['pointsRC'][1,:])])
     ax2.set_ylim([0.05*minR,1.05*maxR])
-    if(savePng):
-        fg.savefig('{name}.{ext}'.format(name=figDir+uaxData['name']+'_Bezier5YS_Uax',ext='png'),dpi=300,bbox_inches='tight')
+    return [fg]
+
+'''
+function:'protoBez5YS_uaxPlot'
+--Plots the protoBez5YS interpolated directional properties 
+--Utility for assesing the overall aspect (as determined by the shape parameters lambdaMax)
+--If a 'queue' (see 'RenderQueue') is provided the figure is rendered and saved (png) by the queue, in background
+'''
+@profiled()
+def protoBez5YS_uaxPlot(uaxData,savePng=False,queue=None):
+    pd=protoBez5YS_uaxPlotData(uaxData)
+    if(queue is not None):
+        return queue.submit('protoBez5YS_uax',pd)
+    renderPlot('protoBez5YS_uax',pd,savePng)
     return
 
 
-def plotUAX3D(uaxData,ax):
+'''
+function:'plotUAX3DData'
+--The uniaxial (directional) curves of the protoBez5YS in the (sxx,syy,sxy)-space
+--Returns the list of (3,n)-arrays to be plotted (see 'plotUAX3D')
+'''
+def plotUAX3DData(uaxData):
     rad=np.pi/180
+    vCurves=[]
     lbd=uaxData['lambdaSTmax']*uaxData['shapeUAX']
     vsT=uaxData['pointsST']
     vsTtan=uaxData['tanST']
     for kk in range(vsT.shape[1]-1):
         vv=curveSeg(vsT[:,kk].reshape((2,1)),vsTtan[:,kk].reshape((2,1)),vsT[:,kk+1].reshape((2,1)),vsTtan[:,kk+1].reshape((2,1)),lbd)
         vv[0,:]=rad*vv[0,:]
-        zz=[vv[1,:]*(np.cos(vv[0,:]))**2,vv[1,:]*(np.sin(vv[0,:]))**2,vv[1,:]*np.cos(vv[0,:])*np.sin(vv[0,:])]
-        ax.plot(zz[0],zz[1],zz[2],color='b')
-        ax.plot(zz[0],zz[1],-zz[2],color='b')
+        zz=np.array([vv[1,:]*(np.cos(vv[0,:]))**2,vv[1,:]*(np.sin(vv[0,:]))**2,vv[1,:]*np.cos(vv[0,:])*np.sin(vv[0,:])])
+        vCurves+=[zz,zz*[[1],[1],[-1]]]
         if(not uaxData['assym']):
-            ax.plot(-zz[0],-zz[1],-zz[2],color='b')
-            ax.plot(-zz[0],-zz[1],zz[2],color='b')
-    if(not uaxData['assym']):return
+            vCurves+=[-zz,zz*[[-1],[-1],[1]]]
+    if(not uaxData['assym']):return vCurves
     lbd=uaxData['lambdaSCmax']*uaxData['shapeUAX']
     vsT=uaxData['pointsSC']
     vsTtan=uaxData['tanSC']
     for kk in range(vsT.shape[1]-1):
         vv=curveSeg(vsT[:,kk].reshape((2,1)),vsTtan[:,kk].reshape((2,1)),vsT[:,kk+1].reshape((2,1)),vsTtan[:,kk+1].reshape((2,1)),lbd)
         vv[0,:]=rad*vv[0,:]
-        zz=[-vv[1,:]*(np.cos(vv[0,:]))**2,-vv[1,:]*(np.sin(vv[0,:]))**2,-vv[1,:]*np.cos(vv[0,:])*np.sin(vv[0,:])]
+        zz=np.array([-vv[1,:]*(np.cos(vv[0,:]))**2,-vv[1,:]*(np.sin(vv[0,:]))**2,-vv[1,:]*np.cos(vv[0,:])*np.sin(vv[0,:])])
+        vCurves+=[zz,zz*[[1],[1],[-1]]]
+    return vCurves
+
+def plotUAX3D(uaxData,ax,vCurves=None):
+    if(vCurves is None):vCurves=plotUAX3DData(uaxData)
+    for zz in vCurves:
         ax.plot(zz[0],zz[1],zz[2],color='b')
-        ax.plot(zz[0],zz[1],-zz[2],color='b')
     return   
     
 '''
-function:'protoBez5YS_Plot'
--Plots the yield surface (by plane sections) of the Bezier5YS proto-model
-'''        
-def protoBez5YS_Plot(maxLambda,shapeBAX,vPatch,uaxData,savePng=False):
-    fg=plt.figure();ax=fg.add_subplot(1,1,1,projection='3d');linewidth=0.4
+function:'protoBez5YS_PlotData'
+--Calculates the plot data of 'protoBez5YS_Plot' (see 'renderPlot'):
+--the plane sections of the patches (one (3,n)-array for each segment, see 'protoSectionCurves') and the uniaxial curves (see 'plotUAX3DData')
+'''
+def protoBez5YS_PlotData(maxLambda,shapeBAX,vPatch,uaxData):
     lbd=maxLambda*shapeBAX
     #print('Bez5YS lbd:\n',lbd)
+    vCurves=list(protoSectionCurves(lbd,vPatch).reshape((-1,3,101)))
+    #shapeBAX=str(shapeBAX)
+    shapeBAX=str(shapeBAX[0])
+    shapeBAX='Lambda_'+shapeBAX[0]+'p'+shapeBAX[2:]
+    return {'curves':vCurves,'uaxCurves':plotUAX3DData(uaxData),'vFile':[figDir+uaxData['name']+'_Bezier5YS_'+shapeBAX]}
+
+def protoBez5YS_Render(pd,plt):
+    fg=plt.figure();ax=fg.add_subplot(1,1,1,projection='3d');linewidth=0.4
     pp=1
     #vColors=['k','g','r','b','y','m'] ##for visualizing each patch; below use this with vColors
-    for dd in vPatch:
-        for kk in range(5):
-            vv=curveSeg3(dd['Points'][:,kk].reshape(3,1),dd['Tangents'][:,kk].reshape(3,1),dd['Points'][:,kk+1].reshape(3,1),dd['Tangents'][:,kk+1].reshape(3,1),lbd[kk],lbd[kk+1])
-            ax.plot(vv[0,:],vv[1,:],vv[2,:],color='k',linewidth=pp*linewidth)
-            ax.plot(vv[0,:],vv[1,:],-vv[2,:],color='k',linewidth=pp*linewidth)
-            #ax.plot(vv[0,:],vv[1,:],vv[2,:],color=vColors[kk%6],linewidth=pp**linewidth)
-            #ax.plot(vv[0,:],vv[1,:],-vv[2,:],color=vColors[kk%6],linewidth=pp*linewidth)
-        vv=curveSeg3(dd['Points'][:,5].reshape(3,1),dd['Tangents'][:,5].reshape(3,1),dd['Points'][:,0].reshape(3,1),dd['Tangents'][:,0].reshape(3,1),lbd[5],lbd[0])
+    for kk,vv in enumerate(pd['curves']):
         ax.plot(vv[0,:],vv[1,:],vv[2,:],color='k',linewidth=pp*linewidth)
         ax.plot(vv[0,:],vv[1,:],-vv[2,:],color='k',linewidth=pp*linewidth)
-        #ax.plot(vv[0,:],vv[1,:],vv[2,:],color=vColors[5],linewidth=pp*linewidth)
-        #ax.plot(vv[0,:],vv[1,:],-vv[2,:],color=vColors[5],linewidth=pp*linewidth) 
+        #ax.plot(vv[0,:],vv[1,:],vv[2,:],color=vColors[kk%6],linewidth=pp*linewidth)
+        #ax.plot(vv[0,:],vv[1,:],-vv[2,:],color=vColors[kk%6],linewidth=pp*linewidth)
     ax.set_xlabel(r'$\overline{\sigma}_{xx}$',fontsize=14)
     ax.set_ylabel(r'$\overline{\sigma}_{yy}$',fontsize=14)
-    plotUAX3D(uaxData,ax)
-    if(savePng):
-        #ax.view_init(elev=90,azim=-90) ## view from top (z-axis) to check biaxial shape
-        #ax.view_init(elev=15,azim=115) ## side view of discontinuity (in case of arbitrary six shape parameters)
-        #shapeBAX=str(shapeBAX)
-        shapeBAX=str(shapeBAX[0])
-        shapeBAX='Lambda_'+shapeBAX[0]+'p'+shapeBAX[2:]
-        fg.savefig('{name}.{ext}'.format(name=figDir+uaxData['name']+'_Bezier5YS_'+shapeBAX,ext='png'),dpi=300,bbox_inches='tight')    
+    plotUAX3D(None,ax,pd['uaxCurves'])
+    #ax.view_init(elev=90,azim=-90) ## view from top (z-axis) to check biaxial shape
+    #ax.view_init(elev=15,azim=115) ## side view of discontinuity (in case of arbitrary six shape parameters)
+    return [fg]
+
+'''
+function:'protoBez5YS_Plot'
+--Plots the yield surface (by plane sections) of the Bezier5YS proto-model
+--If a 'queue' (see 'RenderQueue') is provided the figure is rendered and saved (png) by the queue, in background
+'''        
+@profiled()
+def protoBez5YS_Plot(maxLambda,shapeBAX,vPatch,uaxData,savePng=False,queue=None):
+    pd=protoBez5YS_PlotData(maxLambda,shapeBAX,vPatch,uaxData)
+    if(queue is not None):
+        return queue.submit('protoBez5YS',pd)
+    renderPlot('protoBez5YS',pd,savePng)
     return
     
 
+'''
+dict:'plotRenderers'
+--The drawing functions of the plot data calculated by the '*PlotData' functions: renderer(pd,plt) -> list of figures
+'''
+plotRenderers={'protoBez5YS_uax':protoBez5YS_uaxRender,'protoBez5YS':protoBez5YS_Render,
+               'SHYqp_uax':SHYqp_uaxRender,'SHYqp_bax':SHYqp_baxRender,'SHYqp_surf':SHYqp_surfRender}
+
+'''
+function:'renderPlot'
+--Draws the plot data 'pd' of the type 'kind' (a key of 'plotRenderers')
+--If savePng=True the figures are saved as pd['vFile'][k]+'.png'
+--Returns the list of figures
+'''
+def renderPlot(kind,pd,savePng=False,dpi=300):
+    vFig=plotRenderers[kind](pd,pyplot())
+    if(savePng):
+        for fg,fName in zip(vFig,pd['vFile']):
+            fg.savefig('{name}.{ext}'.format(name=fName,ext='png'),dpi=dpi,bbox_inches='tight')
+    return vFig
+
+'''
+function:'renderWorkerInit'
+--Initializer of the worker processes of 'RenderQueue': selects the (non-interactive) Agg backend
+'''
+def renderWorkerInit():
+    os.environ['MPLBACKEND']='Agg'
+    pyplot().switch_backend('Agg')##a forked worker may inherit an interactive backend
+
+'''
+function:'renderPngWorker'
+--Renders the plot data 'pd' of the type 'kind' and saves the figures as png (in a worker process of 'RenderQueue')
+--Returns the list of png files
+'''
+def renderPngWorker(kind,pd,dpi):
+    plt=pyplot()
+    for fg in renderPlot(kind,pd,True,dpi):
+        plt.close(fg)
+    return [fName+'.png' for fName in pd['vFile']]
+
+'''
+class:'RenderQueue'
+--Renders plot data (see 'renderPlot') to png files in 'nJobs' worker processes (Agg backend, no figures are shown),
+  so that the calculations continue while the figures are drawn and saved
+--Usage: queue=RenderQueue(2); SHYqp_uax_Plot(...,queue=queue); ...; vFiles=queue.close()
+--submit(kind,pd): queues the plot data 'pd'; returns a 'concurrent.futures.Future' (the list of png files)
+--close(): waits for the queued figures and stops the workers; returns the list of png files
+  (the error of a failed figure is raised here)
+--NOTE: with the 'spawn' start method (Windows, macOS) the calling script must be protected by "if __name__=='__main__':"
+'''
+class RenderQueue:
+    def __init__(self,nJobs=2,dpi=300):
+        from concurrent.futures import ProcessPoolExecutor
+        self.dpi=dpi
+        self.vFuture=[]
+        self.pool=ProcessPoolExecutor(max_workers=max(1,nJobs),initializer=renderWorkerInit)
+
+    def submit(self,kind,pd):
+        if(kind not in plotRenderers):
+            raise SHYqpError("RenderQueue: unknown plot type '{}'".format(kind))
+        ft=self.pool.submit(renderPngWorker,kind,pd,self.dpi)
+        self.vFuture.append(ft)
+        return ft
+
+    def close(self):
+        vFiles=[]
+        try:
+            for ft in self.vFuture:
+                vFiles+=ft.result()
+        finally:
+            self.vFuture=[]
+            self.pool.shutdown(wait=True)
+        return vFiles
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+        return False
+
 
 def testProtoYSBiax_Plot(lbd,data):
+    plt=pyplot()
     fg=plt.figure();ax=fg.add_subplot(1,1,1)
-    dd=data[0]##;print('dd=\n',dd)
-    for kk in range(5):
-        vv=curveSeg3(dd['Points'][:,kk].reshape(3,1),dd['Tangents'][:,kk].reshape(3,1),dd['Points'][:,kk+1].reshape(3,1),dd['Tangents'][:,kk+1].reshape(3,1),lbd)
+    for vv in protoSectionCurves(lbd*np.ones(6),data)[0]:##the first section
         ax.plot(vv[0,:],vv[1,:],color='k')
-    vv=curveSeg3(dd['Points'][:,5].reshape(3,1),dd['Tangents'][:,5].reshape(3,1),dd['Points'][:,0].reshape(3,1),dd['Tangents'][:,0].reshape(3,1),lbd)
-    ax.plot(vv[0,:],vv[1,:],color='k')
     nn=101;nSamples=nn*nn
     vx=np.linspace(-1.2,1.2,nn)
     vy=np.linspace(-1.2,1.2,nn)
@@ -2522,6 +3587,7 @@ function:'bxCurve2'
 --Compares Bezier interpolated baxial curve to SHYqp-predicted curve 
 '''
 def bxCurve2(vCoeff,deg,nnP):
+    plt=pyplot()
     nQ=deg;nQ1=nQ+1;nP=nQ-1
     vP=[(nP-k,k) for k in range(0,nQ)]
     vQ=[(nQ-k,k) for k in range(0,nQ1)]
@@ -2564,39 +3630,14 @@ def bxCurve2(vCoeff,deg,nnP):
 
 
 ### function 'getCoeff': utility function
-### use it to extract back the SHYqp coefficients from a '*_Err_and_Coeff.txt' file    
-def getCoeff(fName):
-    ff=open(fName,'r')
-    line=ff.readline()
-    line=ff.readline()
-    deg=int(line.strip().split(':')[1])
-    print('degQ = ',deg)
-    while('P-Coeffs' not in line):
-        line=ff.readline()
-    line=ff.readline()    
-    vCoeff=[]    
-    while('Q-Coeffs' not in line):
-        vCoeff.append(float(line.strip()))
-        line=ff.readline()
-    print('P-coeff: Done')        
-    while(True):
-        line=ff.readline().strip()
-        if(line):
-            vCoeff.append(float(line))
-        else:
-            break
-    print('Q-coeff: Done')        
-    return deg,np.array(vCoeff)       
-
+### use it to extract back the SHYqp coefficients from a '*_Model.shyqp' or '*_Err_and_Coeff.txt' file    
+### (or 'readModel'/'SHYqpModel.fromFile' for the complete binary model)
 
 
-if(not (osp.exists(figDir) and osp.isdir(figDir))):
-    print("The local folder for saving reports and figures was not found")
-    print("Make sure a folder \'FIGS\' exists at the same location as this script")
-    print("Calculations aborted");exit()
-    
 
 if __name__ == "__main__": 
+    plt=pyplot()
+    setOutputDir('FIGS')
     ###Read mechanical data and other global parameters from text file  
     data=readData('mat000File.txt')
     ### echo data 
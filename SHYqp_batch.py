@@ -0,0 +1,187 @@
+'''
+--This is the batch driver script for SHYqpV1
+--Calibrates a list of materials (input files and/or glob patterns) in a process pool:
+----readData -> uaxLambda -> protoData -> dataFitSHYqp(Symm) -> SHYqp_HessGaussCheck -> SHYqp_Predictions
+--No plots are shown; each material gets its own output directory (outDir/<input file name>/)
+  with the *Err_and_Coeff.txt report, the binary model file (*_Model.shyqp) and a log of the printed messages;
+  a summary table of all materials is written to outDir/SHYqp_batch_summary.csv
+--The convexity constraint arrays are cached in 'cacheDir' and shared by all workers
+--A material that fails (e.g., 'SHYqpError' raised on incorrect input data) gets its own error record (the batch continues)
+--With '--minEpsilon' each material is calibrated with the smallest 'epsilon' that gives a convex model (see 'fitMinEpsilon')
+--With '--plots' the figures of each material are also saved (png, Agg backend) in its output directory;
+  by default the rendering is skipped (only the numerical results are calculated)
+--With '--refineLevels N' the constraint grid of '--nEquator' is refined where convexity is tight (see 'solveQPAdaptive'; no caching)
+--With '--profile' the stages of each material are recorded (see 'SHYqpV1.StageProfiler'): SHYqp_profile.json/.csv in its output directory
+  and all the stages of all the materials in outDir/SHYqp_batch_profile.csv ('--profileMemory': the memory of each stage is also traced)
+--Usage (from the directory of the material files):
+  python SHYqp_batch.py "mat*.txt" [-j 4] [-o BATCH] [--cacheDir SHYqpCache] [--solver cvxopt] [--full] [--minEpsilon] [--refineLevels 3 --nEquator 80] [--plots] [--profile]
+'''
+import os
+import sys
+import glob
+import csv
+import argparse
+import traceback
+import contextlib
+import multiprocessing as mp
+from time import time
+
+summaryFields=['file','name','DEG','assym','status','epsilon','minDet1','minDet2','minDet3','minGaussCurvature',
+               'tPre','tFit','tTotal','report','model','error']
+
+
+def initWorker():
+    os.environ.setdefault('MPLBACKEND','Agg')##no display (matplotlib itself is imported only if a plot is made)
+
+
+def materialFiles(vPatterns):
+    vFiles=[]
+    for pattern in vPatterns:
+        vMatch=sorted(glob.glob(pattern)) if any(c in pattern for c in '*?[') else [pattern]
+        for fName in vMatch:
+            if(fName not in vFiles):vFiles.append(fName)
+    return vFiles
+
+
+'''
+function:'warmCache'
+--Calculates (once, before the workers start) the cached constraint arrays of all the degrees (and symmetries) found in 'vFiles'
+--The full sets of constraint rows are generated by 'nJobs' processes (see 'SHYqpV1.genConstraintsRows2D')
+'''
+def warmCache(vFiles,cacheDir,nEquator,cuttingPlane,qpSolver='cvxopt',nJobs=1):
+    import SHYqpV1 as SHYqp
+    SHYqp.consJobs=nJobs
+    vDeg=set()
+    for fName in vFiles:
+        try:
+            with open(os.devnull,'w') as ff,contextlib.redirect_stdout(ff):
+                data=SHYqp.readData(fName)
+            vDeg.add((data['DEG'],'orthotropic' if data['assym'] else 'orthotropicCS'))
+        except (SHYqp.SHYqpError,Exception):
+            pass##the error is recorded by the worker
+    for degQ,symmetry in sorted(vDeg):
+        print('caching constraints: DEG = {}, nEquator = {}, symmetry = {}'.format(degQ,nEquator,symmetry))
+        ddMon=SHYqp.vPoly(degQ)
+        nP=None if(symmetry=='orthotropic') else 0##the symmetric fit uses only the Q-columns
+        if(qpSolver=='cvxoptSOC'):
+            SHYqp.constraintRowsSOC(ddMon,degQ,nEquator,cacheDir,symmetry,nP)
+        elif(cuttingPlane):
+            SHYqp.constraintBasis(ddMon,degQ,nEquator,cacheDir,symmetry,nP)
+        else:
+            SHYqp.constraintRows(ddMon,degQ,nEquator,cacheDir,symmetry,nP)
+
+
+'''
+function:'runMaterial'
+--Calibrates the material of the input file 'fName' (executed by a worker process)
+--Returns the summary record of the material (profile=True: the stage records are in rec['profile']; profileMemory=True: with the memory)
+'''
+def runMaterial(fName,outDir,cacheDir,qpSolver,nEquator,epsilon,cuttingPlane,minEpsilon=False,refineLevels=0,plots=False,nPIplaneSections=31,
+                profile=False,profileMemory=False):
+    import SHYqpV1 as SHYqp
+    mDir=os.path.join(outDir,os.path.splitext(os.path.basename(fName))[0])
+    SHYqp.setOutputDir(mDir,create=True)
+    rec={key:'' for key in summaryFields}
+    rec['file']=fName
+    tStart=time()
+    prof=SHYqp.StageProfiler(memory=profileMemory).start() if profile else None
+    if(prof is not None):prof.tags['file']=fName
+    with open(os.path.join(mDir,'SHYqp_batch_log.txt'),'w') as ff,contextlib.redirect_stdout(ff):
+        try:
+            data=SHYqp.readData(fName)
+            rec['name']=data['name'];rec['DEG']=data['DEG'];rec['assym']=data['assym']
+            if(prof is not None):prof.tags.update(material=data['name'],DEG=data['DEG'])
+            uaxData=SHYqp.uaxLambda(data)
+            lbd,vPatch=SHYqp.protoData(uaxData,nPIplaneSections)
+            t1=time()
+            if(minEpsilon):
+                res=SHYqp.fitMinEpsilon(data,uaxData,lbd,qpSolver,epsilon=epsilon,nEquator=nEquator,
+                                        cuttingPlane=cuttingPlane,cacheDir=cacheDir,refineLevels=refineLevels)
+                vCoeff,ddMon,nQ,nP,cvxCheck=res['vCoeff'],res['ddMon'],res['nQ'],res['nP'],res['cvxCheck']
+                epsilon=res['epsilon']
+            else:
+                if(data['assym']):
+                    vCoeff,ddMon,nQ,nP=SHYqp.dataFitSHYqp(data,uaxData,lbd,qpSolver,nEquator=nEquator,epsilon=epsilon,
+                                                           cuttingPlane=cuttingPlane,cacheDir=cacheDir,refineLevels=refineLevels)
+                else:
+                    vCoeff,ddMon,nQ,nP=SHYqp.dataFitSHYqpSymm(data,uaxData,lbd,qpSolver,nEquator=nEquator,epsilon=epsilon,
+                                                               cuttingPlane=cuttingPlane,cacheDir=cacheDir,refineLevels=refineLevels)
+                cvxCheck=SHYqp.SHYqp_HessGaussCheck(vCoeff,ddMon,nQ,nP)
+            rec['epsilon']=epsilon
+            t2=time()
+            SHYqp.SHYqp_Predictions(uaxData,vCoeff,ddMon,nQ,nP,qpSolver,cvxCheck)
+            rec['minDet1'],rec['minDet2'],rec['minDet3'],rec['minGaussCurvature']=[float(x) for x in cvxCheck]
+            rec['tPre']='{:.2f}'.format(t1-tStart);rec['tFit']='{:.2f}'.format(t2-t1)
+            rec['report']=SHYqp.figDir+uaxData['name']+'_SHYqp_deg'+str(data['DEG'])+'_Err_and_Coeff.txt'
+            rec['model']=SHYqp.figDir+uaxData['name']+'_SHYqp_deg'+str(data['DEG'])+'_Model.shyqp'
+            if(plots):
+                SHYqp.protoBez5YS_uaxPlot(uaxData,True)
+                SHYqp.protoBez5YS_Plot(lbd,data['shapeVBAX'],vPatch,uaxData,True)
+                SHYqp.SHYqp_uax_Plot(uaxData,vCoeff,ddMon,nQ,nP,True)
+                SHYqp.SHYqp_bax_Plot(vCoeff,ddMon,nQ,nP,data['assym'],uaxData['name'],True)
+                SHYqp.SHYqp_surf_Plot(vCoeff,ddMon,nQ,nP,uaxData['name'],True)
+                SHYqp.pyplot().close('all')
+            rec['status']='ok'
+        except (SHYqp.SHYqpError,Exception) as err:
+            traceback.print_exc(file=ff)
+            rec['status']='error'
+            rec['error']='{}: {}'.format(type(err).__name__,err)
+    rec['tTotal']='{:.2f}'.format(time()-tStart)
+    if(prof is not None):
+        prof.stop()
+        prof.writeJSON(os.path.join(mDir,'SHYqp_profile.json'));prof.writeCSV(os.path.join(mDir,'SHYqp_profile.csv'))
+        rec['profile']=prof.records()
+    return rec
+
+
+def runMaterialStar(args):
+    return runMaterial(*args)
+
+
+if __name__=='__main__':
+    parser=argparse.ArgumentParser(description='Batch calibration of SHYqp models')
+    parser.add_argument('files',nargs='+',help='material input files and/or glob patterns (e.g., "mat*.txt")')
+    parser.add_argument('-j','--jobs',type=int,default=os.cpu_count(),help='number of worker processes')
+    parser.add_argument('-o','--outDir',default='BATCH',help='output directory')
+    parser.add_argument('--cacheDir',default='SHYqpCache',help='directory of cached convexity constraints')
+    parser.add_argument('--solver',default='cvxopt',choices=['cvxopt','quadprog','cvxoptSOC'])
+    parser.add_argument('--nEquator',type=int,default=200)
+    parser.add_argument('--epsilon',type=float,default=0.01)
+    parser.add_argument('--full',action='store_true',help='generate all constraints at once (no cutting-plane)')
+    parser.add_argument('--minEpsilon',action='store_true',help='search the smallest epsilon that gives a convex model')
+    parser.add_argument('--refineLevels',type=int,default=0,help='adaptive refinement levels of the constraint grid (0 = uniform grid)')
+    parser.add_argument('--plots',action='store_true',help='save the figures (png) of each material (skipped by default)')
+    parser.add_argument('--profile',action='store_true',help='record the stages of each material (times, sizes, solver statistics)')
+    parser.add_argument('--profileMemory',action='store_true',help='with --profile, also trace the memory of each stage (slower)')
+    args=parser.parse_args()
+    initWorker()
+    vFiles=materialFiles(args.files)
+    if(not vFiles):
+        print('no material files found');sys.exit(1)
+    tStart=time()
+    cuttingPlane=not args.full
+    os.makedirs(args.outDir,exist_ok=True)
+    if(not args.refineLevels):
+        warmCache(vFiles,args.cacheDir,args.nEquator,cuttingPlane,args.solver,args.jobs)
+    vTasks=[(fName,args.outDir,args.cacheDir,args.solver,args.nEquator,args.epsilon,cuttingPlane,args.minEpsilon,args.refineLevels,args.plots,
+             31,args.profile,args.profileMemory) for fName in vFiles]
+    vRec=[];vStage=[]
+    with mp.Pool(processes=max(1,min(args.jobs,len(vFiles))),initializer=initWorker) as pool:
+        for rec in pool.imap(runMaterialStar,vTasks):
+            print('{}: {} ({} s){}'.format(rec['file'],rec['status'],rec['tTotal'],
+                                          ' -- '+rec['error'] if rec['error'] else ''))
+            vStage+=rec.pop('profile',[])
+            vRec.append(rec)
+    fSummary=os.path.join(args.outDir,'SHYqp_batch_summary.csv')
+    with open(fSummary,'w',newline='') as ff:
+        writer=csv.DictWriter(ff,fieldnames=summaryFields)
+        writer.writeheader()
+        writer.writerows(vRec)
+    if(args.profile):
+        import SHYqpV1 as SHYqp
+        print('stage profiles: {}'.format(SHYqp.writeProfileCSV(os.path.join(args.outDir,'SHYqp_batch_profile.csv'),vStage)))
+    nErr=sum(1 for rec in vRec if rec['status']!='ok')
+    print('{} materials, {} errors; summary: {}'.format(len(vRec),nErr,fSummary))
+    dt=int(time()-tStart)
+    print('Overall elapsed time= {}:{}'.format(dt//60,dt%60))
+    sys.exit(1 if nErr else 0)
@@ -0,0 +1,58 @@
+'''
+--Startup benchmark of the SHYqp modules: import time (in a fresh interpreter, median of 'n' runs) of
+----numpy (the reference: 'python -c "import numpy"') and, in the same interpreter, of SHYqpEval (model evaluation only) 
+    and SHYqpV1 (calibration) once numpy is loaded, i.e., the time added by the module itself
+--Checks that the time added by SHYqpEval stays within max('budget' ms, 'ratio'*numpy) (the headroom absorbs the
+  noise of a loaded machine) and that importing SHYqpEval or SHYqpV1 does not load the solvers or matplotlib 
+  (these are imported on first use)
+--Usage (from the directory of SHYqpV1.py):
+  python SHYqp_importBench.py [-n 9] [--budget 40] [--ratio 0.5]
+--Exit code 1 if a check fails
+'''
+import sys
+import argparse
+import subprocess
+
+vHeavy=('matplotlib','cvxopt','quadprog')
+
+code='''
+import sys,time
+t=time.perf_counter()
+import numpy
+t1=time.perf_counter()
+import {}
+t2=time.perf_counter()
+print(1000*(t1-t),1000*(t2-t1),','.join(m for m in {} if m in sys.modules))
+'''
+
+
+def median(vT):
+    vT=sorted(vT);n=len(vT)
+    return vT[n//2] if(n%2) else 0.5*(vT[n//2-1]+vT[n//2])
+
+
+def importTime(module,n):
+    vBase=[];vT=[];vLoaded=set()
+    for k in range(n):
+        out=subprocess.run([sys.executable,'-c',code.format(module,vHeavy)],capture_output=True,text=True,check=True).stdout.split()
+        vBase.append(float(out[0]));vT.append(float(out[1]))
+        if(len(out)>2):vLoaded.update(out[2].split(','))
+    return median(vBase),median(vT),sorted(vLoaded)
+
+
+if __name__=='__main__':
+    parser=argparse.ArgumentParser(description='Import time of the SHYqp modules')
+    parser.add_argument('-n',type=int,default=9,help='number of runs (median)')
+    parser.add_argument('--budget',type=float,default=40.0,help='max import time (ms) of SHYqpEval above numpy')
+    parser.add_argument('--ratio',type=float,default=0.5,help='max import time of SHYqpEval above numpy, as a fraction of the numpy import time')
+    args=parser.parse_args()
+    ok=True
+    for module in ('SHYqpEval','SHYqpV1'):
+        tBase,tt,vLoaded=importTime(module,args.n)
+        print('{:10s}: {:7.1f} ms (numpy: {:.1f} ms + {:.1f} ms){}'.format(module,tBase+tt,tBase,tt,'; loaded: '+', '.join(vLoaded) if vLoaded else ''))
+        if(vLoaded):ok=False
+        if(module=='SHYqpEval'):
+            tMax=max(args.budget,args.ratio*tBase)
+            if(tt>tMax):
+                print('--SHYqpEval import is over budget ({:.1f} ms above numpy)'.format(tMax));ok=False
+    sys.exit(0 if ok else 1)
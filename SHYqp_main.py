@@ -8,8 +8,19 @@ from matplotlib import pyplot as plt
 from time import time
 tStart=time()
 
+###Folder where reports and figures are saved (it must exist)
+SHYqp.setOutputDir('FIGS')
+###Record the wall time, matrix sizes and solver statistics (and, optionally, the memory) of each stage (see 'StageProfiler')
+###The trace is saved as '*_profile.json' and '*_profile.csv' in the output folder (and '*_profile.prof' with 'profileCProfile=True')
+###Change this to 'True' to activate
+profileStages=False
+###Also trace the memory of each stage ('tracemalloc'; the wall times are then larger)
+profileMemory=False
+profileCProfile=False
+prof=SHYqp.StageProfiler(memory=profileMemory,cProfile=profileCProfile).start() if profileStages else None
 ###Read mechanical data and other global parameters from text file  
 data=SHYqp.readData('mat000File.txt')
+if(prof is not None):prof.tags.update(material=data['name'],DEG=data['DEG'])
 ### echo data 
 SHYqp.prtData(data)  
 
@@ -19,14 +30,19 @@ SHYqp.prtData(data)
 uaxData=SHYqp.uaxLambda(data)  #;print(uaxData)
 #######plot Bezier5YS
 savePngProtoModel=True  ##change this to 'False' if saving figures is not desired
-SHYqp.protoBez5YS_uaxPlot(uaxData,savePngProtoModel)
+#######Render and save (png) all the figures in background processes while the calculations continue (no figures are shown)
+#######Change this to 'True' to activate
+#######(with the 'spawn' start method, e.g., on Windows, the body of this script must be placed under "if __name__=='__main__':")
+renderBackground=False
+plotQueue=SHYqp.RenderQueue(nJobs=2) if renderBackground else None
+SHYqp.protoBez5YS_uaxPlot(uaxData,savePngProtoModel,queue=plotQueue)
 
 ###'nPIplaneSections' represents the number of PI-plane sections used to calculate Lambda_max
 ###(do NOT decrease this number, as Lambda_max is actually a minimum over these sections)
 nPIplaneSections=31
 lbd,vPatch=SHYqp.protoData(uaxData,nPIplaneSections)
 print("sectional shape parameter Lambda_max = ",lbd)
-SHYqp.protoBez5YS_Plot(lbd,data['shapeVBAX'],vPatch,uaxData,savePngProtoModel)
+SHYqp.protoBez5YS_Plot(lbd,data['shapeVBAX'],vPatch,uaxData,savePngProtoModel,queue=plotQueue)
 
 t1=time()
 t2=t1;t3=t1
@@ -40,25 +56,51 @@ t2=t1;t3=t1
 ####NOTE:
 #####'epsilon' represents the lower bound of a convexity constraint;
 #####If convexity is not achieved, increase 'epsilon' slightly, by 0.0025 increments (rather than 'nEquator') 
+#####(or set 'minEpsilon=True' below to search automatically for the smallest 'epsilon' that gives a convex model)
 if(1):
     ######Select the solver   
     #qpSolver='quadprog'  
+    #qpSolver='cvxoptSOC'  ##convexity as second-order cones (all tangent directions at each location; fewer constraints)
     qpSolver='cvxopt'       
-    ######Calculate SHYqp parameters     
-    if(data['assym']):
-        vCoeff,ddMon,nQ,nP=SHYqp.dataFitSHYqp(data,uaxData,lbd,qpSolver,nEquator=200,epsilon=0.01)
+    ######Generate all convexity constraints at once (default)
+    ######Change this to 'True' to generate them iteratively (only the active ones are passed to the solver; faster,
+    ######the solution satisfies all the constraints of 'nEquator' up to 'tolViolation' of 'solveQPCuttingPlane')
+    cuttingPlane=False
+    ######Number of processes generating all the constraints at once; 1 = single process
+    ######Change this to the number of available cores to activate 
+    ######(with the 'spawn' start method, e.g., on Windows, the body of this script must be placed under "if __name__=='__main__':")
+    SHYqp.consJobs=1
+    ######Directory where the (material independent) convexity constraints are saved and reused by subsequent runs
+    ######Change this to a directory name (e.g., './SHYqpCache') to activate
+    cacheDir=None
+    ######Search the smallest 'epsilon' (0.0025 increments, warm-started solves) for which the model is convex
+    ######Change this to 'True' to activate
+    minEpsilon=False
+    ######Refine the constraint grid adaptively (where convexity is tight) instead of a uniform 'nEquator=200' grid
+    ######Change this to a number of levels (e.g., 3, starting from 'nEquator=80') to activate
+    refineLevels=0
+    nEquator=80 if refineLevels else 200
+    ######Calculate SHYqp parameters and check convexity     
+    if(minEpsilon):
+        rec=SHYqp.fitMinEpsilon(data,uaxData,lbd,qpSolver,epsilon=0.01,nEquator=nEquator,cuttingPlane=cuttingPlane,cacheDir=cacheDir,
+                                refineLevels=refineLevels)
+        vCoeff,ddMon,nQ,nP,cvxCheck=rec['vCoeff'],rec['ddMon'],rec['nQ'],rec['nP'],rec['cvxCheck']
     else:
-        vCoeff,ddMon,nQ,nP=SHYqp.dataFitSHYqpSymm(data,uaxData,lbd,qpSolver,nEquator=200,epsilon=0.01)
-    ######Check convexity     
-    cvxCheck=SHYqp.SHYqp_HessGaussCheck(vCoeff,ddMon,nQ,nP)
+        if(data['assym']):
+            vCoeff,ddMon,nQ,nP=SHYqp.dataFitSHYqp(data,uaxData,lbd,qpSolver,nEquator=nEquator,epsilon=0.01,cuttingPlane=cuttingPlane,cacheDir=cacheDir,
+                                                   refineLevels=refineLevels)
+        else:
+            vCoeff,ddMon,nQ,nP=SHYqp.dataFitSHYqpSymm(data,uaxData,lbd,qpSolver,nEquator=nEquator,epsilon=0.01,cuttingPlane=cuttingPlane,cacheDir=cacheDir,
+                                                       refineLevels=refineLevels)
+        cvxCheck=SHYqp.SHYqp_HessGaussCheck(vCoeff,ddMon,nQ,nP)
     t2=time()
     ######Calculate overall performance report 
     SHYqp.SHYqp_Predictions(uaxData,vCoeff,ddMon,nQ,nP,qpSolver,cvxCheck)
     ######Calculate  plots 
     savePngSHYqp=True
-    SHYqp.SHYqp_uax_Plot(uaxData,vCoeff,ddMon,nQ,nP,savePngSHYqp)
-    SHYqp.SHYqp_bax_Plot(vCoeff,ddMon,nQ,nP,data['assym'],uaxData['name'],savePngSHYqp)
-    SHYqp.SHYqp_surf_Plot(vCoeff,ddMon,nQ,nP,uaxData['name'],savePngSHYqp)
+    SHYqp.SHYqp_uax_Plot(uaxData,vCoeff,ddMon,nQ,nP,savePngSHYqp,queue=plotQueue)
+    SHYqp.SHYqp_bax_Plot(vCoeff,ddMon,nQ,nP,data['assym'],uaxData['name'],savePngSHYqp,queue=plotQueue)
+    SHYqp.SHYqp_surf_Plot(vCoeff,ddMon,nQ,nP,uaxData['name'],savePngSHYqp,queue=plotQueue)
     t3=time()
 print('-----------Elapsed times (approxs to minutes:seconds)')    
 dt=int(t1-tStart)
@@ -69,7 +111,18 @@ dt=int(t3-t2)
 print('postProcessing time (Plots calculations)= {}:{}'.format(dt//60,dt%60))
 dt=int(t3-tStart)
 print('Overall elapsed time= {}:{}'.format(dt//60,dt%60))    
-###Show all plots 
-plt.show()
+if(prof is not None):
+    prof.stop()
+    fProfile=SHYqp.figDir+data['name']+'_profile'
+    prof.writeJSON(fProfile+'.json');prof.writeCSV(fProfile+'.csv')
+    if(profileCProfile):prof.writeCProfile(fProfile+'.prof')
+    prof.printSummary()
+if(plotQueue is not None):
+    ###Wait for the figures rendered in background
+    vFiles=plotQueue.close()
+    print('{} figures saved (png) in background'.format(len(vFiles)))
+else:
+    ###Show all plots 
+    plt.show()
 
 
@@ -0,0 +1,44 @@
+'''
+--Tests of the SHYqp calibration (run from the repository directory: python -m pytest -q)
+--The material files of the repository are used; the constraint grids are coarse (nEquator=60) to keep the tests fast
+'''
+import os
+import sys
+import os.path as osp
+
+os.environ.setdefault('MPLBACKEND','Agg')
+repoDir=osp.dirname(osp.dirname(osp.abspath(__file__)))
+if(repoDir not in sys.path):sys.path.insert(0,repoDir)
+
+import SHYqpV1 as SHYqp
+
+
+'''
+function:'materialProblem'
+--Reads the material file 'name' (in the repository directory) and returns (data,fp,MAA,MBB): the data, the fit problem
+  (see 'SHYqpV1.fitProblem') and its normal equations
+'''
+def materialProblem(name):
+    data=SHYqp.readData(osp.join(repoDir,name))
+    uaxData=SHYqp.uaxLambda(data)
+    lbd=SHYqp.protoData(uaxData,31)[0]
+    fp=SHYqp.fitProblem(data,uaxData,lbd)
+    MAA,MBB=SHYqp.fitNormalEquations(fp,data['weight'])
+    return data,fp,MAA,MBB
+
+
+'''
+function:'fullSolve'
+--Solves the fit problem 'fp' with all the convexity constraints of the grid 'nEquator' at once; returns (vsq,MCC,MUB)
+'''
+def fullSolve(fp,MAA,MBB,nEquator,epsilon=0.01):
+    MCC,MUB=SHYqp.constraintMatrix(fp['ddMon'],fp['degQ'],fp['nPqp'],fp['vFree'],fp['vFixed'],fp['cFixed'],nEquator,epsilon,None,fp['symmetry'])
+    return SHYqp.solveQP(MAA,MBB,MCC,MUB,'cvxopt'),MCC,MUB
+
+
+'''
+function:'objective'
+--The value of the quadratic objective 0.5*x'*MAA*x-MBB'*x (see 'SHYqpV1.solveQP')
+'''
+def objective(MAA,MBB,vsq):
+    return 0.5*vsq@MAA@vsq-MBB[:,0]@vsq
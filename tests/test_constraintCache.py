@@ -0,0 +1,60 @@
+'''
+--The cached constraint arrays ('cachedArray') are those of a fresh build: at the first call (written to the cache) and at a cache hit
+'''
+import os
+import numpy as np
+import pytest
+
+import SHYqpV1 as SHYqp
+
+degQ,nEquator=6,40
+
+
+@pytest.mark.parametrize('nP',[None,0])
+@pytest.mark.parametrize('symmetry',['orthotropic','orthotropicCS'])
+def test_cacheHitEqualsFreshBuild(tmp_path,symmetry,nP):
+    ddMon=SHYqp.vPoly(degQ)
+    cacheDir=str(tmp_path)
+    for fArr in (lambda cd:SHYqp.constraintBasis(ddMon,degQ,nEquator,cd,symmetry,nP),
+                 lambda cd:(SHYqp.constraintRows(ddMon,degQ,nEquator,cd,symmetry,nP),),
+                 lambda cd:(SHYqp.constraintRowsSOC(ddMon,degQ,nEquator,cd,symmetry,nP),)):
+        vFresh=fArr(None)
+        nFiles=len(os.listdir(cacheDir))
+        vFirst=fArr(cacheDir)
+        nFiles,nFiles0=len(os.listdir(cacheDir)),nFiles
+        assert nFiles>nFiles0
+        vHit=fArr(cacheDir)
+        assert len(os.listdir(cacheDir))==nFiles##nothing generated again
+        for aa,bb,cc in zip(vFresh,vFirst,vHit):
+            assert isinstance(cc,np.memmap)
+            np.testing.assert_array_equal(np.asarray(bb),aa)
+            np.testing.assert_array_equal(np.asarray(cc),aa)
+
+
+def test_cacheColumns(tmp_path):
+    ddMon=SHYqp.vPoly(degQ)
+    nQ=SHYqp.nMonoms(degQ)[0]
+    vAll=SHYqp.constraintBasis(ddMon,degQ,nEquator,str(tmp_path))[1]
+    vQ=SHYqp.constraintBasis(ddMon,degQ,nEquator,str(tmp_path),nP=0)[1]
+    assert vQ.shape[2]==nQ
+    np.testing.assert_array_equal(vQ,vAll[:,:,vAll.shape[2]-nQ:])
+
+
+def test_cacheStage32(tmp_path,monkeypatch):
+    ddMon=SHYqp.vPoly(degQ)
+    v64=np.array(SHYqp.constraintRows(ddMon,degQ,nEquator,str(tmp_path)))
+    monkeypatch.setattr(SHYqp,'consStage32',True)
+    v32=np.array(SHYqp.constraintRows(ddMon,degQ,nEquator,str(tmp_path)))
+    monkeypatch.setattr(SHYqp,'consStage32',False)
+    np.testing.assert_array_equal(np.array(SHYqp.constraintRows(ddMon,degQ,nEquator,str(tmp_path))),v64)
+    assert np.max(np.abs(v32-v64))>0.0
+
+
+@pytest.mark.parametrize('shape',[None,(1000,10)])
+def test_cacheFailedGeneration(tmp_path,shape):
+    def fGen(out=None):
+        if(out is not None):out[:]=1.0
+        raise KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        SHYqp.cachedArray(str(tmp_path),'failed',(1,),fGen,shape)
+    assert os.listdir(str(tmp_path))==[]##no temporary file left
@@ -0,0 +1,43 @@
+'''
+--The rows of 'genConstraintsRows2D' do not depend on the block size ('memBlock') nor on the number of worker processes ('nJobs')
+'''
+import os
+import numpy as np
+import pytest
+
+import SHYqpV1 as SHYqp
+from conftest import materialProblem
+
+nEquator=40
+
+
+@pytest.fixture(scope='module')
+def problem():
+    fp=materialProblem('matTiG4_Raemy2017.txt')[1]
+    vUG=SHYqp.genConstraintsPoints2DOpt(nEquator,symmetry=fp['symmetry'])
+    nQ=SHYqp.nMonoms(fp['degQ'])[0]
+    return fp,vUG,nQ
+
+
+def rows(problem,fixed,**kw):
+    fp,vUG,nQ=problem
+    if(fixed):
+        return SHYqp.genConstraintsRows2D(fp['ddMon'],fp['degQ'],fp['nPqp'],nQ,vUG,fp['vFree'],fp['vFixed'],fp['cFixed'],**kw)
+    return (SHYqp.genConstraintsRows2D(fp['ddMon'],fp['degQ'],fp['nPqp'],nQ,vUG,**kw),)
+
+
+@pytest.mark.parametrize('fixed',[False,True])
+@pytest.mark.parametrize('kw',[dict(memBlock=2**16,nJobs=1),dict(memBlock=2**16,nJobs=2),dict(nJobs=2)])
+def test_rowsIndependentOfBlocks(problem,fixed,kw):
+    vRef=rows(problem,fixed,memBlock=2**40,nJobs=1)##a single block
+    for aa,bb in zip(rows(problem,fixed,**kw),vRef):
+        np.testing.assert_allclose(aa,bb,rtol=0,atol=1e-13*np.abs(bb).max())
+
+
+@pytest.mark.skipif(not os.path.isdir('/dev/shm'),reason='no /dev/shm')
+def test_failedTaskReleasesBlocks(problem):
+    fp,vUG,nQ=problem
+    vBefore=set(os.listdir('/dev/shm'))
+    with pytest.raises(IndexError):
+        SHYqp.genConstraintsRows2D(fp['ddMon'],fp['degQ'],fp['nPqp'],nQ,vUG,vFree=[0,10**6],memBlock=2**16,nJobs=2)
+    assert not [ff for ff in set(os.listdir('/dev/shm'))-vBefore if ff.startswith('shyqp')]
@@ -0,0 +1,41 @@
+'''
+--The cutting-plane generation of the convexity constraints ('solveQPCuttingPlane') gives the solution of the full problem:
+  the same objective and no violated constraint of the grid (the coefficients themselves may differ where the objective is flat)
+'''
+import numpy as np
+import pytest
+
+import SHYqpV1 as SHYqp
+from conftest import materialProblem,fullSolve,objective
+
+nEquator=60
+
+
+@pytest.mark.parametrize('qpSolver',['cvxopt','cvxoptSOC'])
+@pytest.mark.parametrize('name',['matTiG4_Raemy2017.txt','matDP980_Li2020.txt'])
+def test_cuttingPlaneMatchesFullSolve(name,qpSolver):
+    data,fp,MAA,MBB=materialProblem(name)
+    vFull,MCC,MUB=fullSolve(fp,MAA,MBB,nEquator)
+    vsq=SHYqp.solveQPCuttingPlane(MAA,MBB,fp['ddMon'],fp['degQ'],fp['nPqp'],fp['nQ'],fp['vFree'],fp['vFixed'],fp['cFixed'],qpSolver,
+                                  nEquator,0.01,symmetry=fp['symmetry'])
+    fFull=objective(MAA,MBB,vFull)
+    assert abs(objective(MAA,MBB,vsq)-fFull)<=1.0e-5*abs(fFull)
+    assert np.max(np.dot(MCC,vsq)-MUB[:,0])<=1.0e-5
+
+
+def test_cuttingPlaneMaxIter():
+    data,fp,MAA,MBB=materialProblem('matTiG4_Raemy2017.txt')
+    with pytest.raises(SHYqp.SolverError):
+        SHYqp.solveQPCuttingPlane(MAA,MBB,fp['ddMon'],fp['degQ'],fp['nPqp'],fp['nQ'],fp['vFree'],fp['vFixed'],fp['cFixed'],'cvxopt',
+                                  nEquator,0.01,maxIter=1,symmetry=fp['symmetry'])
+
+
+@pytest.mark.parametrize('name',['matTiG4_Raemy2017.txt','matAA2090T3.txt'])
+def test_adaptiveNodes(name):
+    data,fp,MAA,MBB=materialProblem(name)
+    vsq,vUG=SHYqp.solveQPAdaptive(MAA,MBB,fp['ddMon'],fp['degQ'],fp['nPqp'],fp['nQ'],fp['vFree'],fp['vFixed'],fp['cFixed'],'cvxopt',
+                                  nEquator,0.01,refineLevels=1,symmetry=fp['symmetry'])
+    vFull,MCC,MUB=fullSolve(fp,MAA,MBB,nEquator)
+    assert np.unique(np.round(vUG[:,0:3],9),axis=0).shape[0]==vUG.shape[0]##no repeated node
+    fFull=objective(MAA,MBB,vFull)
+    assert abs(objective(MAA,MBB,vsq)-fFull)<=1.0e-4*abs(fFull)
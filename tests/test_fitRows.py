@@ -0,0 +1,110 @@
+'''
+--The batched array operations of the fits give the values of the former loops over the points and the monomials:
+----'monomialEval' (gathered from a table of powers) and the products of the powers, monomial by monomial
+----'weightedGram' (chunked accumulation) and the products with the dense diagonal matrix of the weights
+----'fitRowsUax', 'fitRowsBax', 'fitRowsPoints' (all the points at once) and the rows built one point after the other
+'''
+import numpy as np
+import pytest
+
+import SHYqpV1 as SHYqp
+
+
+'''
+function:'legacyMonomials'
+--The monomials with exponents 'vExp' (times the coefficients 'vCf') at the points 'vu', point by point (vu**vExp)
+'''
+def legacyMonomials(vu,vExp,vCf=None):
+    vMon=np.zeros((vu.shape[0],len(vExp)))
+    for k in range(vu.shape[0]):
+        power=vu[k:k+1,:]**vExp
+        vMon[k]=power[:,0]*power[:,1]*power[:,2]
+    if(vCf is not None):
+        vMon*=vCf
+    return vMon
+
+
+'''
+function:'legacyRows'
+--The value row [P,Q] at the point 'vu' (1,3) and, if 'slope' is given, the r-value row cc*deg*[P,Q]+sum(slope[j]*d[P,Q]/du_j)
+  (slope=(cc,a1,a2,a3)), built as in the former loops of 'dataFitSHYqp' (nP=0: only the Q-columns)
+'''
+def legacyRows(ddMon,degQ,nP,vu,slope=None):
+    vv=np.hstack([legacyMonomials(vu,ddMon['v'+XX]) for XX in ('PQ' if nP else 'Q')])
+    if(slope is None):
+        return vv[0]
+    cc=slope[0]
+    vs=[]
+    for XX,deg in (('P',degQ-2),('Q',degQ-1))[(0 if nP else 1):]:
+        vx=cc*deg*legacyMonomials(vu,ddMon['v'+XX])
+        for j in range(3):
+            vx+=slope[j+1]*legacyMonomials(vu,ddMon['vD'+str(j+1)+XX],ddMon['vC'+str(j+1)+XX])
+        vs.append(vx)
+    return vv[0],np.hstack(vs)[0]
+
+
+def randomPoints(nPoints,seed):
+    vu=np.random.default_rng(seed).standard_normal((nPoints,3))
+    return vu/np.sqrt(np.sum(vu**2,axis=1,keepdims=True))
+
+
+@pytest.mark.parametrize('degQ',[4,6,10])
+def test_monomialEvalMatchesLoops(degQ):
+    ddMon=SHYqp.vPoly(degQ)
+    vu=randomPoints(50,degQ)
+    vPow=SHYqp.monomialPowers(vu,degQ)
+    vPow32=SHYqp.monomialPowers(vu,degQ,dtype=np.float32)
+    for XX in 'PQ':
+        vKey=[('v'+XX,None)]+[('vD'+j+XX,'vC'+j+XX) for j in '123']+[('vH'+HH+XX,'vCH'+HH+XX) for HH in ('11','12','13','22','23','33')]
+        for key,keyC in vKey:
+            vCf=None if(keyC is None) else ddMon[keyC]
+            vRef=legacyMonomials(vu,ddMon[key],vCf)
+            np.testing.assert_allclose(SHYqp.monomialEval(vPow,ddMon[key],vCf),vRef,rtol=1.0e-13,atol=1.0e-13)
+            np.testing.assert_allclose(SHYqp.monomialEval(vPow32,ddMon[key],vCf),vRef,rtol=0,atol=1.0e-5*max(1.0,np.abs(vRef).max()))
+
+
+@pytest.mark.parametrize('chunkSize',[1,7,2048])
+@pytest.mark.parametrize('vCol',[None,[0,3,4,8,11]])
+def test_weightedGramMatchesDiag(chunkSize,vCol):
+    rng=np.random.default_rng(3)
+    AA=rng.standard_normal((100,12));BB=rng.standard_normal((100,1));vW=rng.uniform(0.0,2.0,100)
+    AAref=AA if(vCol is None) else AA[:,vCol]
+    vDiag=np.diag(vW)
+    MAA,MBB=SHYqp.weightedGram(AA,BB,vW,chunkSize=chunkSize,vCol=vCol)
+    np.testing.assert_allclose(MAA,np.dot(AAref.T,np.dot(vDiag,AAref)),rtol=1.0e-12,atol=1.0e-12)
+    np.testing.assert_allclose(MBB,np.dot(AAref.T,np.dot(vDiag,BB)),rtol=1.0e-12,atol=1.0e-12)
+
+
+@pytest.mark.parametrize('sign',[1.0,-1.0])
+@pytest.mark.parametrize('nP',[True,False])
+def test_fitRowsMatchLoops(sign,nP):
+    degQ=8
+    ddMon=SHYqp.vPoly(degQ)
+    nP=SHYqp.nMonoms(degQ)[1] if nP else 0
+    sq3=np.sqrt(3.0);sq32=np.sqrt(1.5);sq6=np.sqrt(6.0);sq2=np.sqrt(2.0)
+    rng=np.random.default_rng(4)
+    vTheta=np.linspace(0.0,0.5*np.pi,23)[1:];vS=rng.uniform(0.8,1.2,22);vR=rng.uniform(0.3,2.0,22)
+    vvS,vbS,vvR,vbR=SHYqp.fitRowsUax(ddMon,degQ,nP,vTheta,vS,vR,sign)
+    for kk,theta in enumerate(vTheta):
+        c,s=np.cos(theta),np.sin(theta)
+        vu=sign*np.array([[c**2-0.5*s**2,0.5*sq3*s**2,c*s*sq3]])
+        beta=vR[kk]+c**2;b2a=vR[kk]+s**2-0.5*beta;omega=c*s
+        cc=-b2a*vu[0,0]-0.5*sq3*beta*vu[0,1]+omega*sq3*vu[0,2]
+        vv,vs=legacyRows(ddMon,degQ,nP,vu,(cc,b2a,0.5*beta*sq3,-omega*sq3))
+        np.testing.assert_allclose(vvS[kk],vv,rtol=1.0e-12,atol=1.0e-12)
+        np.testing.assert_allclose(vvR[kk],vs,rtol=1.0e-12,atol=1.0e-12)
+        assert vbS[kk]==pytest.approx(1.0/vS[kk]-1.0,rel=1.0e-14) and vbR[kk]==pytest.approx(cc,rel=1.0e-12,abs=1.0e-14)
+    sb,rb=1.05,0.8
+    vvS,vbS,vvR,vbR=SHYqp.fitRowsBax(ddMon,degQ,nP,sb,rb,sign)
+    cc=0.5*sign*(rb-1.0)
+    vv,vs=legacyRows(ddMon,degQ,nP,sign*np.array([[0.5,0.5*sq3,0.0]]),(cc,-(rb+0.5),0.5*sq3,0.0))
+    np.testing.assert_allclose(vvS[0],vv,rtol=1.0e-12,atol=1.0e-12)
+    np.testing.assert_allclose(vvR[0],vs,rtol=1.0e-12,atol=1.0e-12)
+    assert vbS[0]==pytest.approx(1.0/sb-1.0) and vbR[0]==pytest.approx(cc)
+    vPoints=sign*rng.uniform(0.2,1.5,(30,3))
+    vvP,vbP=SHYqp.fitRowsPoints(ddMon,degQ,nP,vPoints)
+    for kk in range(vPoints.shape[0]):
+        vu=np.array([[(2*vPoints[kk,0]-vPoints[kk,1])/sq6,vPoints[kk,1]/sq2,vPoints[kk,2]*sq2]])
+        modS=np.sqrt(np.sum(vu**2))
+        np.testing.assert_allclose(vvP[kk],legacyRows(ddMon,degQ,nP,vu/modS),rtol=1.0e-12,atol=1.0e-12)
+        assert vbP[kk]==pytest.approx(1.0/(sq32*modS)-1.0,rel=1.0e-14)
@@ -0,0 +1,24 @@
+'''
+--The refinement of the convexity check ('SHYqp_HessGaussCheck', local minimization by 'hessGaussRefine') of a non-convex model
+  (the unconstrained fit) finds minima at most those of the coarse scan, at the returned locations
+'''
+import numpy as np
+import pytest
+
+import SHYqpV1 as SHYqp
+from conftest import materialProblem
+
+
+@pytest.mark.parametrize('name',['matTiG4_Raemy2017.txt','matAA2090T3.txt'])
+def test_refinedMinimumBelowGrid(name):
+    data,fp,MAA,MBB=materialProblem(name)
+    vCoeff=SHYqp.fitCoeff(fp,np.linalg.solve(MAA,MBB[:,0]))##no convexity constraints
+    args=(vCoeff,fp['ddMon'],fp['nQ'],fp['nP'])
+    vGrid=SHYqp.SHYqp_HessGaussCheck(*args,nEquator=60,nRandom=500,nRefine=0)
+    vMin,vLoc=SHYqp.SHYqp_HessGaussCheck(*args,nEquator=60,nRandom=500,returnLocations=True)
+    assert vGrid[3]<0.0##not convex
+    for col in (0,1,3):
+        assert vMin[col]<=vGrid[col]
+    assert vMin[3]<vGrid[3]
+    vH=SHYqp.hessGaussPoints(vLoc,vCoeff,fp['ddMon'],fp['nP'])
+    np.testing.assert_allclose(vH[np.arange(4),np.arange(4)],vMin,rtol=1.0e-10,atol=1.0e-12)
@@ -0,0 +1,70 @@
+'''
+--'SHYqpModel' (flattened tables, one product per evaluation) gives the values of the term by term evaluation of the monomials [P,Q]
+  (the evaluation of the original plotting code), its gradient and Hessian are the derivatives of the value (finite differences)
+  and zero stress is handled (value 0, zero gradient and Hessian, no warning)
+'''
+import warnings
+import numpy as np
+import pytest
+
+import SHYqpV1 as SHYqp
+import SHYqpEval
+from conftest import materialProblem,fullSolve
+
+
+'''
+function:'legacyValue'
+--The yield function at the stress states 'sigma', monomial by monomial: sqrt(3/2)*|u|*(1+P(u/|u|)+Q(u/|u|)) with
+  u=((2*sxx-syy)/sqrt(6),syy/sqrt(2),sqrt(2)*sxy)
+'''
+def legacyValue(sigma,vCoeff,ddMon,nQ,nP):
+    sq2=np.sqrt(2.0);sq6=np.sqrt(6.0)
+    vu=np.stack(((2.0*sigma[:,0]-sigma[:,1])/sq6,sigma[:,1]/sq2,sq2*sigma[:,2]),axis=1)
+    vMod=np.sqrt(np.sum(vu**2,axis=1))
+    vu=vu/vMod[:,None]
+    vF=np.ones(sigma.shape[0])
+    for vExp,vCf in ((ddMon['vP'][0:nP],vCoeff[0:nP]),(ddMon['vQ'][0:nQ],vCoeff[nP:nP+nQ])):
+        for ee,cc in zip(vExp,vCf):
+            vF+=cc*vu[:,0]**ee[0]*vu[:,1]**ee[1]*vu[:,2]**ee[2]
+    return np.sqrt(1.5)*vMod*vF
+
+
+@pytest.fixture(scope='module',params=['matTiG4_Raemy2017.txt','matISO.txt'])
+def fittedModel(request):
+    data,fp,MAA,MBB=materialProblem(request.param)
+    vCoeff=SHYqp.fitCoeff(fp,fullSolve(fp,MAA,MBB,60)[0])
+    return vCoeff,fp['ddMon'],fp['nQ'],fp['nP']
+
+
+def test_modelValueLegacy(fittedModel):
+    vCoeff,ddMon,nQ,nP=fittedModel
+    vSigma=np.random.default_rng(1).standard_normal((200,3))
+    model=SHYqpEval.SHYqpModel(vCoeff,ddMon,nQ,nP,chunkSize=64)
+    np.testing.assert_allclose(model.value(vSigma),legacyValue(vSigma,vCoeff,ddMon,nQ,nP),rtol=1.0e-12,atol=0.0)
+
+
+def test_modelDerivatives(fittedModel):
+    vCoeff,ddMon,nQ,nP=fittedModel
+    vSigma=np.random.default_rng(2).standard_normal((50,3))
+    model=SHYqpEval.SHYqpModel(vCoeff,ddMon,nQ,nP)
+    vF,vG,vH=model.evaluate(vSigma,2)
+    hh=1.0e-5
+    for j in range(3):
+        dS=np.zeros(3);dS[j]=hh
+        dF=(legacyValue(vSigma+dS,vCoeff,ddMon,nQ,nP)-legacyValue(vSigma-dS,vCoeff,ddMon,nQ,nP))/(2*hh)
+        np.testing.assert_allclose(vG[:,j],dF,rtol=0.0,atol=1.0e-7*np.max(np.abs(vG)))
+        dG=(model.gradient(vSigma+dS)-model.gradient(vSigma-dS))/(2*hh)
+        np.testing.assert_allclose(vH[:,:,j],dG,rtol=0.0,atol=1.0e-6*np.max(np.abs(vH)))
+    np.testing.assert_allclose(vH,vH.transpose((0,2,1)),rtol=0.0,atol=1.0e-12*np.max(np.abs(vH)))
+
+
+def test_modelZeroStress(fittedModel):
+    model=SHYqpEval.SHYqpModel(*fittedModel)
+    vSigma=np.array([[0.0,0.0,0.0],[1.0,0.5,0.1]])
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        vF,vG,vH=model.evaluate(vSigma,2)
+    assert vF[0]==0.0 and np.all(vG[0]==0.0) and np.all(vH[0]==0.0)
+    for aa,bb in zip((vF,vG,vH),model.evaluate(vSigma[1:],2)):
+        np.testing.assert_allclose(aa[1],bb[0],rtol=1.0e-14,atol=1.0e-14)
+    assert model.value(np.zeros(3))[0]==0.0
@@ -0,0 +1,51 @@
+'''
+--A model saved in a binary model file ('saveModel') is read back unchanged ('readModel', 'getCoeff') and evaluates as the fitted model;
+  'getCoeff' also reads the coefficients of a report file (*_Err_and_Coeff.txt)
+'''
+import numpy as np
+import pytest
+
+import SHYqpV1 as SHYqp
+import SHYqpEval
+from conftest import materialProblem,fullSolve
+
+
+@pytest.mark.parametrize('name',['matTiG4_Raemy2017.txt','matISO.txt'])
+def test_saveReadModel(tmp_path,name):
+    data,fp,MAA,MBB=materialProblem(name)
+    vCoeff=SHYqp.fitCoeff(fp,fullSolve(fp,MAA,MBB,60)[0])
+    ddMon,nQ,nP=fp['ddMon'],fp['nQ'],fp['nP']
+    fName=str(tmp_path/'model.shyqp')
+    meta={'name':data['name'],'solver':'cvxopt','nEquator':60}
+    SHYqpEval.saveModel(fName,vCoeff,ddMon,nQ,nP,data['assym'],meta)
+    assert SHYqpEval.isModelFile(fName)
+    for mmap in (True,False):
+        dd=SHYqpEval.readModel(fName,mmap)
+        assert (dd['degQ'],dd['nQ'],dd['nP'],dd['assym'],dd['meta'])==(fp['degQ'],nQ,nP,bool(data['assym']),meta)
+        np.testing.assert_array_equal(dd['vCoeff'],vCoeff)
+    degQ,vRead=SHYqpEval.getCoeff(fName)
+    assert degQ==fp['degQ']
+    np.testing.assert_array_equal(vRead,vCoeff)
+    vSigma=np.random.default_rng(0).standard_normal((50,3))
+    vRef=SHYqpEval.SHYqpModel(vCoeff,ddMon,nQ,nP).evaluate(vSigma)
+    for aa,bb in zip(SHYqpEval.SHYqpModel.fromFile(fName).evaluate(vSigma),vRef):
+        np.testing.assert_array_equal(aa,bb)
+
+
+def test_getCoeffReport(tmp_path,capsys):
+    vCoeff=np.random.default_rng(1).standard_normal(5+12)
+    fName=tmp_path/'mat_SHYqp_deg6_Err_and_Coeff.txt'
+    fName.write_text('mat\nSHYqp degree: 6\nSolver: cvxopt\n--------SHYqp-Coefficients\n---P-Coeffs\n'+
+                     ''.join('{}\n'.format(cc) for cc in vCoeff[0:5])+'---Q-Coeffs-----\n'+''.join('{}\n'.format(cc) for cc in vCoeff[5:]))
+    degQ,vRead=SHYqpEval.getCoeff(str(fName))
+    assert degQ==6
+    np.testing.assert_array_equal(vRead,vCoeff)
+    assert capsys.readouterr().out==''
+
+
+def test_readModelNotModel(tmp_path):
+    fName=tmp_path/'notModel.shyqp'
+    fName.write_bytes(b'SHYqp report\n')
+    assert not SHYqpEval.isModelFile(str(fName))
+    with pytest.raises(SHYqpEval.DataFormatError):
+        SHYqpEval.readModel(str(fName))
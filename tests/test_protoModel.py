@@ -0,0 +1,147 @@
+'''
+--The proto-model stage of the repository materials agrees with the former scalar implementations:
+----'curveSegTheta' (Halley iterations with a bisection fallback) with the damped Newton loop, at all the data segments
+----'protoData' (arrays of plane sections) with the loops over the sections and over the points of each section
+'''
+import glob
+import os.path as osp
+import numpy as np
+import pytest
+
+import SHYqpV1 as SHYqp
+from conftest import repoDir
+
+vMaterial=sorted(osp.basename(ff) for ff in glob.glob(osp.join(repoDir,'mat*.txt')))
+
+
+'''
+function:'legacyCurveSegTheta'
+--The former inversion of theta(t): damped scalar Newton iterations, one target angle after the other (|theta(t)-theta|<=1e-9)
+'''
+def legacyCurveSegTheta(vTheta,Bs,Ts,Be,Te,Lshape):
+    TTs=Lshape*Ts;TTe=Lshape*Te
+    B1=Bs+TTs;B2=B1+TTs;B4=Be-TTe;B3=B4-TTe
+    A1=5.0*(B1-Bs)
+    A2=10.0*(Bs+B2-2.0*B1)
+    A3=10.0*(3.0*B1-Bs+B3-3.0*B2)
+    A4=5.0*(Bs-4.0*B1+6.0*B2-4.0*B3+B4)
+    A5=5.0*(B1-2.0*B2+2.0*B3-B4)-Bs+Be
+    vtt=[]
+    t=0.0
+    for theta in vTheta:
+        for nn in range(500):
+            f=Bs+t*(A1+t*(A2+t*(A3+t*(A4+t*A5))))-theta
+            if(abs(f)<=1.0e-9):break
+            df=A1+t*(2.0*A2+t*(3.0*A3+t*(4.0*A4+5.0*A5*t)))
+            if(abs(df)<1.0e-12):break
+            t-=0.75*f/df
+        vtt.append(t)
+    return np.array(vtt)
+
+
+'''
+function:'legacyProtoData'
+--The former loop construction of the plane sections and of their maximum shape parameters (see 'SHYqpV1.protoData');
+  returns (vLbdMax,vPoints,vTangents), the points and tangents as (nS,3,6)-arrays
+'''
+def legacyProtoData(uaxData,nSections):
+    rad=np.pi/180.0
+    thetaTList,thetaCList=SHYqp.protoTheta(uaxData,nSections)
+    def half(thetaList,TC):
+        sg=1.0 if TC=='T' else -1.0
+        LshapeS=uaxData['shapeUAX']*uaxData['lambdaS'+TC+'max'];LshapeR=uaxData['shapeUAX']*uaxData['lambdaR'+TC+'max']
+        pS,tS,pR,tR=(uaxData[key+TC] for key in ('pointsS','tanS','pointsR','tanR'))
+        vSection=[]
+        for dd in thetaList:
+            vS=[];vDS=[];vR=[]
+            for pos in ('Top','Bottom'):
+                i0,i1=dd['idx'+pos]
+                ss,dss=SHYqp.curveSegFDF(pS[:,[i0]],tS[:,[i0]],pS[:,[i1]],tS[:,[i1]],LshapeS,dd['vStt'+pos])
+                vS.append(ss[1,:]);vDS.append(dss[1,:]/(rad*dss[0,:]))
+                vR.append(SHYqp.curveSegF(pR[:,[i0]],tR[:,[i0]],pR[:,[i1]],tR[:,[i1]],LshapeR,dd['vRtt'+pos])[1,:])
+            for kk,t in enumerate(rad*dd['vThetaTop']):
+                vV=np.array([-np.sin(2*t),np.sin(2*t),2*np.cos(2*t)])
+                tb=0.5*np.pi-t
+                vW=(np.array([vR[0][kk]+np.sin(t)**2,vR[0][kk]+np.cos(t)**2,-np.cos(t)*np.sin(t)]),
+                    np.array([vR[1][kk]+np.sin(tb)**2,vR[1][kk]+np.cos(tb)**2,np.cos(tb)*np.sin(tb)]))
+                vGamma=(sg*np.array([np.cos(t)**2,np.sin(t)**2,np.cos(t)*np.sin(t)]),sg*np.array([np.sin(t)**2,np.cos(t)**2,-np.cos(t)*np.sin(t)]))
+                vDGamma=(sg*np.array([-np.sin(2*t),np.sin(2*t),np.cos(2*t)]),sg*np.array([np.sin(2*t),-np.sin(2*t),-np.cos(2*t)]))
+                vPoints=np.zeros((3,3));vTangents=np.zeros((3,3))
+                vPoints[:,0]=vS[0][kk]*vGamma[0]
+                vTangents[:,0]=SHYqp.vectorProd(vV,SHYqp.vectorProd(vW[0],vDS[0][kk]*vGamma[0]+vS[0][kk]*vDGamma[0]))
+                vPoints[:,1]=[sg*uaxData['s'+TC+'b'],sg*uaxData['s'+TC+'b'],0.0]
+                vTangents[:,1]=SHYqp.vectorProd(vV,sg*np.array([1.0,uaxData['r'+TC+'b'],0])/np.sqrt(1.0+uaxData['r'+TC+'b']**2))
+                vPoints[:,2]=vS[1][kk]*vGamma[1]
+                vTangents[:,2]=SHYqp.vectorProd(vV,SHYqp.vectorProd(vW[1],-vDS[1][kk]*vGamma[1]+vS[1][kk]*vDGamma[1]))
+                vSection.append((vPoints,vTangents))
+        return vSection
+    vT=half(thetaTList,'T')
+    vC=half(thetaCList,'C') if(uaxData['assym']) else [(-pp,-tt) for pp,tt in vT]
+    vPoints=np.array([np.concatenate((pT,pC),axis=1) for (pT,tT),(pC,tC) in zip(vT,vC)])
+    vTangents=np.array([np.concatenate((tT,tC),axis=1) for (pT,tT),(pC,tC) in zip(vT,vC)])
+    vLbdMax=1.0e+3*np.ones(6)
+    for s in range(vPoints.shape[0]):
+        for kk in range(6):
+            lbd1,lbd2=SHYqp.lambdaMax(vPoints[s,:,kk],vTangents[s,:,kk],vPoints[s,:,(kk+1)%6],vTangents[s,:,(kk+1)%6])
+            assert lbd1>0 and lbd2>0
+            vLbdMax[kk]=min(vLbdMax[kk],lbd1);vLbdMax[(kk+1)%6]=min(vLbdMax[(kk+1)%6],lbd2)
+    if(not uaxData['assym']):
+        vLbdMax=np.array([vLbdMax[0],vLbdMax[1],vLbdMax[0],vLbdMax[0],vLbdMax[1],vLbdMax[0]])
+    else:
+        aa=min(vLbdMax[0],vLbdMax[2]);bb=min(vLbdMax[3],vLbdMax[5])
+        vLbdMax=np.array([aa,vLbdMax[1],aa,bb,vLbdMax[4],bb])
+    if(uaxData['shapeBAX']==0):
+        vLbdMax=np.min(vLbdMax)*np.ones(6)
+    return vLbdMax,vPoints,vTangents
+
+
+def uaxData(name):
+    return SHYqp.uaxLambda(SHYqp.readData(osp.join(repoDir,name)))
+
+
+@pytest.mark.parametrize('name',vMaterial)
+def test_curveSegThetaMatchesNewton(name):
+    data=uaxData(name)
+    for TC in ('TC' if data['assym'] else 'T'):
+        for SR in 'SR':
+            vPoints,vTan=data['points'+SR+TC],data['tan'+SR+TC]
+            Lshape=data['shapeUAX']*data['lambda'+SR+TC+'max']
+            for k in range(vPoints.shape[1]-1):
+                Bs,Be=vPoints[0,k],vPoints[0,k+1]
+                vTheta=np.linspace(Bs,Be,41)##including the segment ends
+                args=(Bs,vTan[0,k],Be,vTan[0,k+1],Lshape)
+                vtt=SHYqp.curveSegTheta(vTheta,*args)
+                np.testing.assert_allclose(vtt,legacyCurveSegTheta(vTheta,*args),rtol=0,atol=1.0e-8)
+                np.testing.assert_allclose(vtt,SHYqp.curveSegTheta(vTheta,*args,table=SHYqp.curveSegThetaTable(*args)),rtol=0,atol=1.0e-12)
+                vF=SHYqp.curveSegF(vPoints[:,[k]],vTan[:,[k]],vPoints[:,[k+1]],vTan[:,[k+1]],Lshape,vtt)
+                np.testing.assert_allclose(vF[0],vTheta,rtol=0,atol=1.0e-10)
+                assert vtt[0]==pytest.approx(0.0,abs=1.0e-12) and vtt[-1]==pytest.approx(1.0,abs=1.0e-12)
+
+
+@pytest.mark.parametrize('name',vMaterial)
+def test_inversionMatchesNewton(name,monkeypatch):
+    matData=SHYqp.readData(osp.join(repoDir,name))
+    data=SHYqp.uaxLambda(matData)
+    vTC='TC' if data['assym'] else 'T'
+    vNew=SHYqp.protoTheta(data,31)
+    vSamplesNew=[SHYqp.uaxFitSamples(matData,data,TC,11) for TC in vTC]
+    monkeypatch.setattr(SHYqp,'curveSegTheta',legacyCurveSegTheta)
+    vOld=SHYqp.protoTheta(data,31)
+    for vSNew,vSOld in zip(vSamplesNew,[SHYqp.uaxFitSamples(matData,data,TC,11) for TC in vTC]):##the data of the fits
+        for aa,bb in zip(vSNew,vSOld):
+            np.testing.assert_allclose(aa,bb,rtol=1.0e-8)
+    for lNew,lOld in zip(vNew,vOld):
+        assert len(lNew)==len(lOld)
+        for ddNew,ddOld in zip(lNew,lOld):
+            for key in ddNew:
+                np.testing.assert_allclose(ddNew[key],ddOld[key],rtol=0,atol=1.0e-8)
+
+
+@pytest.mark.parametrize('name',vMaterial)
+def test_protoDataMatchesLoops(name):
+    data=uaxData(name)
+    vLbdMax,vPatch=SHYqp.protoDataCalc(data,31)
+    lbdRef,vPointsRef,vTangentsRef=legacyProtoData(data,31)
+    np.testing.assert_allclose(vPatch['Points'],vPointsRef,rtol=0,atol=1.0e-12)
+    np.testing.assert_allclose(vPatch['Tangents'],vTangentsRef,rtol=0,atol=1.0e-12)
+    np.testing.assert_allclose(vLbdMax,lbdRef,rtol=1.0e-12)
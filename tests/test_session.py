@@ -0,0 +1,58 @@
+'''
+--A re-fit of 'SHYqpSession' after a modification of the input values equals a fresh fit of the modified data:
+  the same normal equations (only the rows of the modified values are recalculated) and the same solution
+'''
+import os.path as osp
+import numpy as np
+import pytest
+
+import SHYqpV1 as SHYqp
+from conftest import repoDir,fullSolve,objective
+
+nEquator=60
+
+
+'''
+function:'modifiedData'
+--Reads the material file 'name' and applies the modification 'key'=val to the data as the input file would
+'''
+def modifiedData(name,key,val):
+    data=SHYqp.readData(osp.join(repoDir,name))
+    if(key[2:]=='b'):
+        data[key]=val;data['w'+key]=1
+    else:
+        data[key[0:2]][key[2:]]=val
+    return data
+
+
+@pytest.mark.parametrize('cuttingPlane',[False,True])
+@pytest.mark.parametrize('key,scale',[('rT45',1.1),('sTb',1.03),('sC90',0.97)])
+def test_sessionRefitEqualsFreshFit(key,scale,cuttingPlane):
+    name='matTiG4_Raemy2017.txt'
+    data=SHYqp.readData(osp.join(repoDir,name))
+    val=scale*(data[key] if(key[2:]=='b') else data[key[0:2]][key[2:]])
+    ss=SHYqp.SHYqpSession(data,nEquator=nEquator,cuttingPlane=cuttingPlane)
+    ss.solve()
+    vCoeff=ss.update({key:val})[0]
+    MAAs,MBBs=ss.normalEquations()
+    data=modifiedData(name,key,val)
+    uaxData=SHYqp.uaxLambda(data)
+    fp=SHYqp.fitProblem(data,uaxData,SHYqp.protoData(uaxData,31)[0])
+    MAA,MBB=SHYqp.fitNormalEquations(fp,data['weight'])
+    np.testing.assert_allclose(MAAs,MAA,rtol=0.0,atol=1.0e-12*np.max(np.abs(MAA)))
+    np.testing.assert_allclose(MBBs,MBB,rtol=0.0,atol=1.0e-12*np.max(np.abs(MBB)))
+    np.testing.assert_array_equal(ss.fp['cFixed'],fp['cFixed'])
+    vFull,MCC,MUB=fullSolve(fp,MAA,MBB,nEquator)
+    vsq=vCoeff[fp['vFree']]
+    fFull=objective(MAA,MBB,vFull)
+    assert abs(objective(MAA,MBB,vsq)-fFull)<=1.0e-5*abs(fFull)
+    assert np.max(np.dot(MCC,vsq)-MUB[:,0])<=1.0e-5
+
+
+def test_sessionUnknownKey():
+    ss=SHYqp.SHYqpSession(SHYqp.readData(osp.join(repoDir,'matISO.txt')),nEquator=nEquator)
+    ss.solve()
+    with pytest.raises(SHYqp.DataFormatError):
+        ss.update({'rT44':1.0})
+    with pytest.raises(SHYqp.DataFormatError):
+        ss.update({'rC45':1.0})##symmetric material
@@ -0,0 +1,51 @@
+'''
+--The second-order-cone form of the convexity constraints ('constraintRowsSOC', qpSolver='cvxoptSOC'):
+----its slack at a point is the minimum eigenvalue of the 2x2 form on the tangent plane (the linear condition in every tangent direction)
+----the full solve gives the objective of the full solve with the fan of tangent directions ('constraintMatrix')
+'''
+import numpy as np
+import pytest
+
+import SHYqpV1 as SHYqp
+from conftest import materialProblem,fullSolve,objective
+
+nEquator,epsilon=60,0.01
+
+
+def socSolve(fp,MAA,MBB):
+    vSOC=SHYqp.constraintRowsSOC(fp['ddMon'],fp['degQ'],nEquator,None,fp['symmetry'],fp['nPqp'])
+    MCC,MUB=SHYqp.reduceConstraintsSOC(vSOC,fp['vFree'],fp['vFixed'],fp['cFixed'],epsilon)
+    return SHYqp.solveQP(MAA,MBB,MCC,MUB,'cvxoptSOC')
+
+
+@pytest.mark.parametrize('name',['matTiG4_Raemy2017.txt','matDP980_Li2020.txt','matAA2090T3.txt'])
+def test_socMatchesFanSolve(name):
+    data,fp,MAA,MBB=materialProblem(name)
+    vFan,MCC,MUB=fullSolve(fp,MAA,MBB,nEquator,epsilon)
+    vsq=socSolve(fp,MAA,MBB)
+    fFan=objective(MAA,MBB,vFan)
+    assert abs(objective(MAA,MBB,vsq)-fFan)<=1.0e-5*abs(fFan)
+    assert np.max(np.dot(MCC,vsq)-MUB[:,0])<=1.0e-5##the cone constraints hold in the directions of the fan
+
+
+def test_socSlackIsMinEigenvalue():
+    data,fp,MAA,MBB=materialProblem('matTiG4_Raemy2017.txt')
+    ddMon,degQ,nQ=fp['ddMon'],fp['degQ'],fp['nQ']
+    nP=SHYqp.nMonoms(degQ)[1]
+    vCoeff=SHYqp.fitCoeff(fp,socSolve(fp,MAA,MBB))
+    vUG=SHYqp.genConstraintsPoints2DOpt(nEquator)
+    nPoints=vUG.shape[0]
+    vs=-np.dot(SHYqp.constraintRowsSOC(ddMon,degQ,nEquator),vCoeff).reshape((nPoints,3))
+    vs[:,0]+=2.0*(1.0-epsilon)
+    vSlack=0.5*(vs[:,0]-np.sqrt(vs[:,1]**2+vs[:,2]**2))
+    ##the 2x2 form from the linear condition in the directions t1, t2 and (t1+t2)/sqrt(2)
+    t1,t2=vUG[:,3:6],vUG[:,6:9]
+    vUG3=np.hstack((vUG[:,0:3],t1,t2,(t1+t2)/np.sqrt(2.0)))
+    vg=(1.0-epsilon)-np.dot(SHYqp.genConstraintsRows2D(ddMon,degQ,nP,nQ,vUG3),vCoeff).reshape((nPoints,3))
+    AA=np.zeros((nPoints,2,2))
+    AA[:,0,0]=vg[:,0];AA[:,1,1]=vg[:,1]
+    AA[:,0,1]=AA[:,1,0]=vg[:,2]-0.5*(vg[:,0]+vg[:,1])
+    np.testing.assert_allclose(vSlack,np.linalg.eigvalsh(AA)[:,0],rtol=0,atol=1.0e-10)
+    ##the linear condition in the directions of the fan is bounded below by the slack
+    vFan=(1.0-epsilon)-np.dot(SHYqp.constraintRows(ddMon,degQ,nEquator),vCoeff).reshape((nPoints,-1))
+    assert np.all(np.min(vFan,axis=1)>=vSlack-1.0e-10)
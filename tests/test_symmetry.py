@@ -0,0 +1,37 @@
+'''
+--The constraint points of the fundamental domain of 'orthotropicCS' (see 'symmetryFoldRows') give the constraints of the full grid:
+  the solution of a symmetric material with the reduced points satisfies all the constraints of the full ('orthotropic') grid
+'''
+import numpy as np
+import pytest
+
+import SHYqpV1 as SHYqp
+from conftest import materialProblem,objective
+
+
+@pytest.mark.parametrize('nEquator',[60,120])
+def test_reducedSolutionSatisfiesFullGrid(nEquator):
+    data,fp,MAA,MBB=materialProblem('matAA2090T3.txt')
+    assert fp['symmetry']=='orthotropicCS'
+    ddMon,degQ,vFree,vFixed,cFixed=fp['ddMon'],fp['degQ'],fp['vFree'],fp['vFixed'],fp['cFixed']
+    MCC,MUB=SHYqp.constraintMatrix(ddMon,degQ,0,vFree,vFixed,cFixed,nEquator,0.01,None,'orthotropicCS')
+    MCCf,MUBf=SHYqp.constraintMatrix(ddMon,degQ,0,vFree,vFixed,cFixed,nEquator,0.01,None,'orthotropic')
+    assert MCC.shape[0]<MCCf.shape[0]
+    vsq=SHYqp.solveQP(MAA,MBB,MCC,MUB,'cvxopt')
+    vFull=SHYqp.solveQP(MAA,MBB,MCCf,MUBf,'cvxopt')
+    assert np.max(np.dot(MCCf,vsq)-MUBf[:,0])<=1.0e-5
+    fFull=objective(MAA,MBB,vFull)
+    assert abs(objective(MAA,MBB,vsq)-fFull)<=1.0e-6*abs(fFull)
+
+
+def test_foldedRowsAreImages():
+    vP=SHYqp.genConstraintsPoints2DOpt(60)
+    vR=SHYqp.genConstraintsPoints2DOpt(60,symmetry='orthotropicCS')
+    assert np.all(SHYqp.symmetryMask(vR[:,0:3],'orthotropicCS'))
+    vImage=vP.reshape((vP.shape[0],-1,3))*np.array([-1.0,-1.0,1.0])
+    vAll=np.concatenate((vP,vImage.reshape(vP.shape)),axis=0)
+    for row in vR:
+        kk=np.nonzero(np.all(np.abs(vAll-row)<1.0e-12,axis=1))[0]
+        assert kk.shape[0]>0##every reduced row is a row of the grid or the image of one
+    vKey=np.round(SHYqp.symmetryFold(vP[:,0:3],'orthotropicCS'),9)+0.0
+    assert np.unique(vKey,axis=0).shape[0]==vR.shape[0]##every point of the grid is represented